@@ -1,7 +1,16 @@
 import cv2
 import numpy as np
 import os
-import glob
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_runner import default_workers, print_summary, run_batch
+from folder_index import scan_tree, video_entries
+from frame_reader import VideoFrameReader, open_reader
+from manifest import Manifest
+from stage_timer import NO_TIMER, StageTimer, print_stages, write_metrics
+from video_index import video_info
 
 # 설정값
 base_folder = r'/Volumes/ボリューム/2025_gaze_experiment/sub5/day11'
@@ -10,6 +19,29 @@ frame_skip = 3
 record_start_sec = 60
 block_seconds = 40
 max_file_size_gb = 2.0
+use_sparse_reader = True  # 스킵/차단 프레임은 디코딩 없이 grab/seek
+use_prefetch = True  # 디코딩 스레드와 분석 병행
+frame_backend = 'opencv'  # 'ffmpeg'이면 rawvideo 파이프 (frame_skip 선택을 디코더에서)
+ffmpeg_scale = None  # (w, h): ffmpeg 디코더 내 축소 (std 값이 달라져 임계값 재조정 필요)
+batch_workers = default_workers  # 영상 병렬 처리 프로세스 수 (기본 1 = 순차, 빠른 저장장치면 2~4)
+shard_workers = 1  # 영상 1개를 시간 분할 병렬 검출할 샤드 수 (1 = 사용 안 함)
+shard_warmup_samples = 15  # 샤드 시작 전 이력 워밍업 샘플 수 (color_history 길이)
+use_two_pass = False  # 1초 간격 seek 샘플로 후보만 찾고 후보 주변만 정밀 재검출
+two_pass_coarse_sec = 1.0  # 1차 샘플 간격 (초)
+two_pass_candidate_ratio = 0.5  # 1차 샘플 변화량이 임계값의 이 비율을 넘으면 후보
+use_manifest = True  # 영상/파라미터 변경 없는 영상은 재처리 생략
+manifest_filename = '.aimlab_manifest.json'
+quiet = False  # True면 프레임 단위 진행 출력 (진행률, 초별 최대변화) 끔, 검출/요약 출력은 유지
+collect_metrics = True  # 영상별 단계 시간 측정 (open/decode/color/std/detect/write)
+metrics_filename = 'aimlab_metrics.json'  # base_folder에 영상별 메트릭 저장 (.csv면 CSV), None이면 저장 안 함
+
+
+def detector_params():
+    """결과에 영향을 주는 검출 파라미터 (매니페스트 키)"""
+    return {'color_change_threshold': color_change_threshold, 'frame_skip': frame_skip,
+            'record_start_sec': record_start_sec, 'block_seconds': block_seconds,
+            'frame_backend': frame_backend, 'ffmpeg_scale': ffmpeg_scale, 'use_two_pass': use_two_pass,
+            'two_pass_coarse_sec': two_pass_coarse_sec, 'two_pass_candidate_ratio': two_pass_candidate_ratio}
 
 
 def get_unique_filename(folder_path, base_filename):
@@ -41,45 +73,56 @@ def get_unique_filename(folder_path, base_filename):
         counter += 1
 
 
-def process_video(video_path):
-    """단일 영상 처리 함수"""
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    print(f"\n📹 처리 중: {os.path.basename(video_path)} | {total_frames // fps / 60:.1f}분")
-
-    color_history_h = []
-    color_history_s = []
-    trial_events = []
-    sec_counter = 0
-    max_std_per_sec = {}
-    processed_frames = 0
-    detection_blocked_until = 0
-    trial_num = 1
-
-    frame_idx = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        current_time = frame_idx / fps
+def frame_hs_std(frame, timer=NO_TIMER):
+    """프레임 전체 H/S 채널 표준편차 (timer: HSV 변환 → 'color', 표준편차 → 'std')"""
+    hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    timer.lap('color')
+    h, s, v = cv2.split(hsv_frame)
+    h_std, s_std = np.std(h), np.std(s)
+    timer.lap('std')
+    return h_std, s_std
+
+
+class TrialDetector:
+    """H+S 표준편차 급증 검출 상태 (최근 15샘플 이력, 40초 블록, trial 번호)"""
+
+    def __init__(self, fps, total_frames, verbose=True):
+        self.fps = fps
+        self.total_frames = total_frames
+        self.verbose = verbose
+        self.progress = verbose and not quiet  # 프레임 단위 진행 출력
+        self.color_history_h = []
+        self.color_history_s = []
+        self.trial_events = []
+        self.sec_counter = 0
+        self.max_std_per_sec = {}
+        self.processed_frames = 0
+        self.detection_blocked_until = 0
+        self.trial_num = 1
+
+    def visit(self, frame_idx):
+        """샘플 프레임 방문: 분석이 필요하면 True (차단 구간이면 False)"""
+        self.processed_frames += 1
+        return not self.is_blocked(frame_idx)
+
+    def is_blocked(self, frame_idx):
+        """검출 차단 구간인지만 확인 (방문으로 세지 않음)"""
+        return frame_idx / self.fps < self.detection_blocked_until
+
+    def reset_history(self):
+        """이력 비움 (구간 단위 재검출: 이전 구간 이력과 비교하지 않도록)"""
+        self.color_history_h, self.color_history_s = [], []
+
+    def warm_up(self, current_h_std, current_s_std):
+        """이력만 채움 (검출 판정 없음, 구간 단위 재검출의 워밍업용)"""
+        self.color_history_h = (self.color_history_h + [current_h_std])[-15:]
+        self.color_history_s = (self.color_history_s + [current_s_std])[-15:]
+
+    def update(self, frame_idx, current_h_std, current_s_std):
+        current_time = frame_idx / self.fps
         current_sec = int(current_time)
-
-        if frame_idx % frame_skip != 0:
-            frame_idx += 1
-            continue
-
-        processed_frames += 1
-        if current_time < detection_blocked_until:
-            frame_idx += 1
-            continue
-
-        hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        h, s, v = cv2.split(hsv_frame)
-        current_h_std = np.std(h)
-        current_s_std = np.std(s)
+        color_history_h = self.color_history_h
+        color_history_s = self.color_history_s
 
         color_history_h.append(current_h_std)
         color_history_s.append(current_s_std)
@@ -87,17 +130,17 @@ def process_video(video_path):
             color_history_h.pop(0)
             color_history_s.pop(0)
 
-        if current_sec >= record_start_sec and current_sec != sec_counter:
-            if sec_counter in max_std_per_sec:
-                print(f"\n🌈 {sec_counter:02d}초: 최대변화 {max_std_per_sec[sec_counter]:.1f}")
-            sec_counter = current_sec
+        if current_sec >= record_start_sec and current_sec != self.sec_counter:
+            if self.progress and self.sec_counter in self.max_std_per_sec:
+                print(f"\n🌈 {self.sec_counter:02d}초: 최대변화 {self.max_std_per_sec[self.sec_counter]:.1f}")
+            self.sec_counter = current_sec
 
-        max_std_per_sec[current_sec] = max(
-            max_std_per_sec.get(current_sec, 0), current_h_std + current_s_std
+        self.max_std_per_sec[current_sec] = max(
+            self.max_std_per_sec.get(current_sec, 0), current_h_std + current_s_std
         )
 
-        if processed_frames % 20 == 0:
-            print(f"\r🌈 {frame_idx / total_frames * 100:.1f}%({current_time:.0f}s) | "
+        if self.progress and self.processed_frames % 20 == 0:
+            print(f"\r🌈 {frame_idx / self.total_frames * 100:.1f}%({current_time:.0f}s) | "
                   f"색변화: {current_h_std + current_s_std:.1f}", end="")
 
         if current_time >= record_start_sec and len(color_history_h) >= 5:
@@ -108,61 +151,343 @@ def process_video(video_path):
             if color_change > color_change_threshold:
                 start_time = current_time - 60
                 end_time = current_time
-                trial_events.append([trial_num, int(start_time), int(end_time)])
+                self.trial_events.append([self.trial_num, int(start_time), int(end_time)])
+                self.detection_blocked_until = current_time + block_seconds
 
-                print(f"\n🌈 색변화↑: {int(current_time // 60):02d}:{int(current_time % 60):02d} "
-                      f"변화량: {color_change:.1f}")
+                if self.verbose:
+                    print(f"\n🌈 색변화↑: {int(current_time // 60):02d}:{int(current_time % 60):02d} "
+                          f"변화량: {color_change:.1f}")
+                    print(f"   ⏸️ 40초 블록 (~{int(self.detection_blocked_until // 60):02d}:"
+                          f"{int(self.detection_blocked_until % 60):02d})")
+                self.trial_num += 1
 
-                detection_blocked_until = current_time + block_seconds
-                print(
-                    f"   ⏸️ 40초 블록 (~{int(detection_blocked_until // 60):02d}:{int(detection_blocked_until % 60):02d})")
-                trial_num += 1
 
-        frame_idx += 1
+def process_video(video_path, sparse=use_sparse_reader, shards=shard_workers, two_pass=None, timer=NO_TIMER):
+    """단일 영상 처리 함수 (shards>1이면 시간 분할 병렬 검출, two_pass면 2단계 탐색)
 
-    cap.release()
-    return trial_events
+    timer: 단계 시간을 누적할 StageTimer. 'decode'는 prefetch 사용 시 디코딩 스레드 대기 시간.
+    """
+    if two_pass if two_pass is not None else use_two_pass:
+        return process_video_two_pass(video_path, timer)
+    if shards > 1:
+        return process_video_sharded(video_path, shards, sparse=sparse, timer=timer)
 
+    with timer.stage('open'):
+        reader = open_reader(video_path, frame_skip, sparse=sparse, prefetch=use_prefetch,
+                             backend=frame_backend, scale=ffmpeg_scale)
+    fps = reader.fps
+    total_frames = reader.total_frames
 
-# 🔥 하위 폴더 탐색 + 3GB 이상 스킵
-print(f"🔍 {base_folder}에서 재귀 검색 중... (3GB↑ 스킵)")
-video_files = []
-skipped_files = []
-video_extensions = ['*.mp4', '*.mkv', '*.avi', '*.mov']
-max_file_size_bytes = max_file_size_gb * 1024 * 1024 * 1024
+    print(f"\n📹 처리 중: {os.path.basename(video_path)} | {total_frames // fps / 60:.1f}분")
 
-for root, dirs, files in os.walk(base_folder):
-    for ext in video_extensions:
-        videos = glob.glob(os.path.join(root, ext))
-        for video_path in videos:
-            file_size_bytes = os.path.getsize(video_path)
-            file_size_gb = file_size_bytes / (1024 * 1024 * 1024)
+    detector = TrialDetector(fps, total_frames)
 
-            if file_size_bytes > max_file_size_bytes:
-                skipped_files.append((video_path, file_size_gb))
-                print(f"⏭️  스킵: {os.path.basename(video_path)} ({file_size_gb:.1f}GB)")
+    # frame_skip 배수 프레임만 방문 (사이 프레임은 reader가 grab/seek 처리)
+    frame_idx = 0
+    while True:
+        if not detector.visit(frame_idx):
+            frame_idx += frame_skip
+            continue
+
+        timer.mark()
+        frame = reader.read(frame_idx)
+        timer.lap('decode')
+        if frame is None:
+            break
+
+        detector.update(frame_idx, *frame_hs_std(frame, timer))
+        timer.lap('detect')
+        frame_idx += frame_skip
+
+    reader.release()
+    return detector.trial_events
+
+
+def detect_shard(video_path, start_frame, end_frame, sparse=use_sparse_reader):
+    """구간 [start_frame, end_frame) 추측 검출 → 계산한 샘플 {frame_idx: (h_std, s_std)}
+
+    이력 15샘플 워밍업을 위해 start_frame 앞 15*frame_skip 프레임부터 읽음.
+    샘플 계산만 목적이며 차단/trial 확정은 merge 단계에서 순차로 재현.
+    end_frame=None이면 EOF까지, EOF 위치와 샤드 단계 시간(StageTimer stages)도 함께 반환.
+    """
+    timer = StageTimer(enabled=collect_metrics)
+    with timer.stage('open'):
+        reader = open_reader(video_path, frame_skip, sparse=sparse, prefetch=use_prefetch,
+                             backend=frame_backend, scale=ffmpeg_scale)
+    detector = TrialDetector(reader.fps, reader.total_frames, verbose=False)
+    samples = {}
+    eof_frame = None
+
+    # 워밍업 초반 이력 5개 시점의 빈 평균 경고 무시 (추측 검출용)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        frame_idx = max(0, start_frame - shard_warmup_samples * frame_skip)
+        while end_frame is None or frame_idx < end_frame:
+            if not detector.visit(frame_idx):
+                frame_idx += frame_skip
                 continue
 
-            video_files.append((root, video_path))
+            timer.mark()
+            frame = reader.read(frame_idx)
+            timer.lap('decode')
+            if frame is None:
+                eof_frame = frame_idx
+                break
+
+            samples[frame_idx] = frame_hs_std(frame, timer)
+            detector.update(frame_idx, *samples[frame_idx])
+            timer.lap('detect')
+            frame_idx += frame_skip
+
+    reader.release()
+    return samples, eof_frame, timer.as_dict()['stages']
+
+
+def process_video_sharded(video_path, shards, sparse=use_sparse_reader, timer=NO_TIMER):
+    """시간 분할 병렬 검출: 샤드별 샘플 계산 → 순차 재현으로 블록/trial 번호 확정
+
+    샤드 시작 시점의 실제 상태(앞 trial의 블록, 이력)가 추측과 달라
+    빠진 샘플은 재현 중 직접 디코딩해서 채우므로 결과는 순차 실행과 동일.
+    timer에는 샤드별 단계 시간의 합(프로세스 합산이라 경과 시간보다 클 수 있음) + 재현 단계 'merge'.
+    """
+    info = video_info(video_path)  # 샤드 분할용 메타데이터는 인덱스에서 (컨테이너 재오픈 없음)
+    fps = info['fps']
+    total_frames = info['frame_count']
+
+    print(f"\n📹 처리 중: {os.path.basename(video_path)} | {total_frames // fps / 60:.1f}분 "
+          f"| 샤드 {shards}개")
+
+    # 샤드 경계는 frame_skip 배수, 마지막 샤드는 EOF까지 (프레임 수 메타데이터 오차 대비)
+    shard_len = -(-total_frames // shards // frame_skip) * frame_skip
+    bounds = [(k * shard_len, (k + 1) * shard_len if k < shards - 1 else None)
+              for k in range(shards)]
+
+    samples = {}
+    eof_frame = None
+    with ProcessPoolExecutor(max_workers=shards) as pool:
+        futures = [pool.submit(detect_shard, video_path, start, end, sparse) for start, end in bounds]
+        for future in futures:
+            shard_samples, shard_eof, shard_stages = future.result()
+            samples.update(shard_samples)
+            timer.merge(shard_stages)
+            if shard_eof is not None:
+                eof_frame = shard_eof if eof_frame is None else min(eof_frame, shard_eof)
+
+    # 순차 재현 (process_video와 동일한 방문 순서)
+    timer.mark()
+    detector = TrialDetector(fps, total_frames)
+    fill_reader = None
+    filled = 0
+    frame_idx = 0
+    while True:
+        if not detector.visit(frame_idx):
+            frame_idx += frame_skip
+            continue
 
-print(f"🎬 처리대상 영상: {len(video_files)}개 | 스킵: {len(skipped_files)}개")
-print("-" * 80)
+        sample = samples.get(frame_idx)
+        if sample is None:
+            if eof_frame is not None and frame_idx >= eof_frame:
+                break
+            timer.lap('merge')
+            if fill_reader is None:
+                fill_reader = open_reader(video_path, frame_skip, prefetch=False,
+                                          backend=frame_backend, scale=ffmpeg_scale)
+            frame = fill_reader.read(frame_idx)
+            timer.lap('decode')
+            if frame is None:
+                break
+            sample = frame_hs_std(frame, timer)
+            filled += 1
+
+        detector.update(frame_idx, *sample)
+        frame_idx += frame_skip
+    timer.lap('merge')
+
+    if fill_reader is not None:
+        fill_reader.release()
+    print(f"\n🧩 샤드 병합 완료 | 샘플 {len(samples)}개 + 보충 디코딩 {filled}개")
+    return detector.trial_events
+
+
+def find_candidate_windows(video_path, timer=NO_TIMER):
+    """1차: record_start_sec부터 two_pass_coarse_sec 간격 seek 샘플의 H+S std 급증 → 정밀 재검출 구간
+
+    후보 샘플 k의 구간은 [k-2 샘플 - 워밍업, k + 1샘플], 겹치면 병합.
+    """
+    reader = VideoFrameReader(video_path, sparse=True, seek_min_gap_sec=two_pass_coarse_sec)
+    fps = reader.fps
+    warmup_frames = shard_warmup_samples * frame_skip
+    coarse_step = max(frame_skip, int(round(two_pass_coarse_sec * fps)) // frame_skip * frame_skip)
+
+    coarse = []
+    frame_idx = max(0, int(record_start_sec * fps) - warmup_frames) // frame_skip * frame_skip
+    while True:
+        timer.mark()
+        frame = reader.read(frame_idx)
+        timer.lap('decode')
+        if frame is None:
+            break
+        h_std, s_std = frame_hs_std(frame, timer)
+        coarse.append((frame_idx, h_std + s_std))
+        frame_idx += coarse_step
+    reader.release()
+
+    windows = []
+    for k in range(1, len(coarse)):
+        baseline = min(value for _, value in coarse[max(0, k - 2):k])
+        if coarse[k][1] - baseline > color_change_threshold * two_pass_candidate_ratio:
+            start = max(0, coarse[max(0, k - 2)][0] - warmup_frames) // frame_skip * frame_skip
+            end = coarse[k][0] + coarse_step
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            else:
+                windows.append((start, end))
+    return windows, len(coarse)
+
+
+def process_video_two_pass(video_path, timer=NO_TIMER):
+    """2단계 탐색: 1차 sparse 샘플로 후보 구간, 2차는 후보 구간만 frame_skip 간격으로 기존과 같은 판정
+
+    차단/trial 번호는 구간을 시간순으로 이어서 하나의 TrialDetector로 처리.
+    차단 중이 아닌 구간 시작에서는 이력을 비우고 워밍업 샘플 동안 판정하지 않음.
+    1차에서 놓친 변화는 검출되지 않으므로 validate_two_pass로 정밀 실행과 비교 권장.
+    """
+    reader = VideoFrameReader(video_path, sparse=True)
+    fps = reader.fps
+    total_frames = reader.total_frames
+    print(f"\n📹 처리 중 (2단계): {os.path.basename(video_path)} | {total_frames // fps / 60:.1f}분")
+
+    windows, coarse_count = find_candidate_windows(video_path, timer)
+    dense_frames = sum(end - start for start, end in windows)
+    print(f"🔎 1차 샘플 {coarse_count}개 → 후보 구간 {len(windows)}개 "
+          f"({dense_frames / fps:.0f}초, 전체의 {dense_frames / max(1, total_frames) * 100:.1f}%)")
+
+    detector = TrialDetector(fps, total_frames, verbose=False)
+    pending = [(start, end, True) for start, end in windows]  # (시작, 끝, 이력 초기화 여부)
+    while pending:
+        start, end, reset = pending.pop(0)
+        warm = 0
+        if reset and not detector.is_blocked(start):
+            detector.reset_history()
+            warm = shard_warmup_samples
+
+        trial_count = len(detector.trial_events)
+        eof = False
+        frame_idx = start
+        while frame_idx < end:
+            if not detector.visit(frame_idx):
+                frame_idx += frame_skip
+                continue
 
-# 🔥 모든 영상 처리
-processed_count = 0
-for video_idx, (video_folder, video_path) in enumerate(video_files, 1):
+            timer.mark()
+            frame = reader.read(frame_idx)
+            timer.lap('decode')
+            if frame is None:
+                eof = True
+                break
+
+            if warm > 0:
+                detector.warm_up(*frame_hs_std(frame, timer))
+                warm -= 1
+            else:
+                detector.update(frame_idx, *frame_hs_std(frame, timer))
+            timer.lap('detect')
+            frame_idx += frame_skip
+
+        if eof:
+            break
+        if len(detector.trial_events) > trial_count:
+            # 차단 해제 직후에는 차단 전 이력과 비교하므로 이력이 갱신될 때까지 이어서 재검출
+            resume = int(detector.detection_blocked_until * fps) // frame_skip * frame_skip
+            while resume / fps < detector.detection_blocked_until:
+                resume += frame_skip
+            post_end = resume + (shard_warmup_samples + 1) * frame_skip
+            if post_end > end:
+                pending.append((max(resume, end), post_end, False))
+                pending.sort(key=lambda w: w[0])
+                merged = []
+                for w in pending:
+                    if merged and w[0] <= merged[-1][1]:
+                        merged[-1] = (merged[-1][0], max(merged[-1][1], w[1]), merged[-1][2])
+                    else:
+                        merged.append(w)
+                pending = merged
+
+    reader.release()
+    for trial_num, start_sec, end_sec in detector.trial_events:
+        print(f"🌈 색변화↑: trial {trial_num} → {end_sec // 60:02d}:{end_sec % 60:02d}")
+    return detector.trial_events
+
+
+def validate_two_pass(video_path):
+    """2단계 탐색 결과를 기존 정밀 실행과 비교한 검증 리포트"""
+    results = {}
+    for mode, two_pass in (('dense', False), ('two_pass', True)):
+        start = time.perf_counter()
+        events = process_video(video_path, shards=1, two_pass=two_pass)
+        results[mode] = {'events': events, 'elapsed': time.perf_counter() - start}
+
+    dense, two_pass = results['dense']['events'], results['two_pass']['events']
+    print(f"\n{'=' * 50}")
+    print(f"📋 2단계 검증: {os.path.basename(video_path)}")
+    print(f"  정밀: {len(dense)}개 {results['dense']['elapsed']:.1f}s | "
+          f"2단계: {len(two_pass)}개 {results['two_pass']['elapsed']:.1f}s")
+    missing = [e for e in dense if e not in two_pass]
+    extra = [e for e in two_pass if e not in dense]
+    for event in missing:
+        print(f"  ❌ 누락: {event}")
+    for event in extra:
+        print(f"  ❌ 불일치: {event}")
+    results['match'] = dense == two_pass
+    print("  ✅ 결과 일치" if results['match'] else "  ⚠️ 결과 불일치 → two_pass_candidate_ratio 하향 검토")
+    return results
+
+
+def find_video_files(base_folder):
+    """🔥 하위 폴더 탐색 + 대용량 스킵 → (처리대상 [(폴더, 경로)], 스킵 [(경로, GB)])"""
+    print(f"🔍 {base_folder}에서 재귀 검색 중... (3GB↑ 스킵)")
+    video_files = []
+    skipped_files = []
+    video_extensions = ['*.mp4', '*.mkv', '*.avi', '*.mov']
+    max_file_size_bytes = max_file_size_gb * 1024 * 1024 * 1024
+
+    # 폴더마다 scandir 한 번, 크기는 scandir의 stat (인덱스 DB는 쓰지 않음: 읽기 전용 드라이브에서도 동작)
+    for root, files in scan_tree(base_folder).items():
+        root = os.fspath(root)
+        for ext in video_extensions:
+            for video_path, stat in video_entries(files, ext):
+                file_size_bytes = stat.st_size
+                file_size_gb = file_size_bytes / (1024 * 1024 * 1024)
+
+                if file_size_bytes > max_file_size_bytes:
+                    skipped_files.append((video_path, file_size_gb))
+                    print(f"⏭️  스킵: {os.path.basename(video_path)} ({file_size_gb:.1f}GB)")
+                    continue
+
+                video_files.append((root, video_path))
+
+    return video_files, skipped_files
+
+
+def analyze_video(video_idx, total, video_folder, video_path):
+    """워커 단위 작업: 영상 1개 검출 → (trial_events, 단계 시간 메트릭). CSV 저장은 메인 프로세스에서 순서대로"""
     print(f"\n{'=' * 80}")
-    print(f"[{video_idx}/{len(video_files)}] {os.path.basename(video_path)}")
+    print(f"[{video_idx}/{total}] {os.path.basename(video_path)}")
     print(f"📁 폴더: {os.path.basename(video_folder)}")
     print("-" * 80)
+    timer = StageTimer(enabled=collect_metrics)
+    trial_events = process_video(video_path, timer=timer)
+    return trial_events, timer.as_dict()
 
-    trial_events = process_video(video_path)
-    processed_count += 1
 
-    # 🔥 중복 파일명 처리 함수 사용
-    video_base_name = os.path.splitext(os.path.basename(video_path))[0]
-    csv_filename = get_unique_filename(video_folder, video_base_name)
-    csv_path = os.path.join(video_folder, csv_filename)
+def save_trial_csv(video_folder, video_path, trial_events, csv_path=None):
+    """🔥 중복 파일명 처리 후 Trial CSV 저장 (csv_path 지정 시 해당 파일 덮어쓰기)"""
+    if csv_path is None:
+        video_base_name = os.path.splitext(os.path.basename(video_path))[0]
+        csv_filename = get_unique_filename(video_folder, video_base_name)
+        csv_path = os.path.join(video_folder, csv_filename)
+    else:
+        csv_filename = os.path.basename(csv_path)
 
     print(f"\n{'=' * 50}")
     print(f"✅ [{csv_filename[:-4]}] 결과 ({len(trial_events)}개)")
@@ -178,9 +503,74 @@ for video_idx, (video_folder, video_path) in enumerate(video_files, 1):
             f.write(f'{trial_num},{start_sec},{end_sec}\n')
 
     print(f"💾 저장: {csv_path}")
+    return csv_path
+
+
+def save_metrics(base_folder, metrics_records):
+    """영상별 단계 시간 메트릭 저장 + 전체 합산 출력"""
+    if not (collect_metrics and metrics_records):
+        return
+    total = StageTimer()
+    for rec in metrics_records:
+        total.merge(rec['stages'])
+    print_stages({'elapsed': sum(rec['elapsed'] for rec in metrics_records),
+                  'stages': total.as_dict()['stages']}, title="전체 영상 단계별 시간")
+    if metrics_filename:
+        print(f"📏 메트릭 저장: {write_metrics(os.path.join(base_folder, metrics_filename), metrics_records)}")
+
+
+def batch_process(base_folder, workers=batch_workers, force=False):
+    """🔥 모든 영상 처리 (workers>1이면 프로세스 풀, 결과/CSV는 입력 순서대로)
+
+    매니페스트에 같은 (크기, mtime, 파라미터)로 기록된 영상은 건너뛰고,
+    재처리하는 영상은 이전 CSV를 덮어씀 (_aimlab(N).csv 누적 방지). force=True면 전부 재처리.
+    """
+    video_files, skipped_files = find_video_files(base_folder)
+    manifest = Manifest(base_folder, manifest_filename) if use_manifest else None
+    params = detector_params()
+
+    up_to_date = []
+    if manifest is not None and not force:
+        up_to_date = [v for v in video_files if manifest.is_current(v[1], params)]
+        video_files = [v for v in video_files if v not in up_to_date]
+    print(f"🎬 처리대상 영상: {len(video_files)}개 | 스킵: {len(skipped_files)}개"
+          + (f" | 변경없음: {len(up_to_date)}개" if up_to_date else ""))
+    print("-" * 80)
 
-print(f"\n🎉 모든 영상 처리 완료! ({processed_count}/{len(video_files)}개)")
-if skipped_files:
-    print(f"\n⏭️ 스킵된 대용량 영상:")
-    for video_path, size_gb in skipped_files[:5]:
-        print(f"  - {os.path.basename(video_path)} ({size_gb:.1f}GB)")
+    jobs = [(video_idx, len(video_files), video_folder, video_path)
+            for video_idx, (video_folder, video_path) in enumerate(video_files, 1)]
+
+    metrics_records = []
+
+    def on_result(idx, args, result):
+        _, _, video_folder, video_path = args
+        trial_events, metrics = result
+        timer = StageTimer(enabled=collect_metrics)
+        timer.merge(metrics['stages'])
+        with timer.stage('write'):
+            csv_path = None
+            if manifest is not None:
+                previous = [p for p in manifest.previous_outputs(video_path) if os.path.exists(p)]
+                csv_path = previous[0] if previous else None
+            csv_path = save_trial_csv(video_folder, video_path, trial_events, csv_path)
+            if manifest is not None:
+                manifest.record(video_path, params, [csv_path], len(trial_events))
+        metrics_records.append({'video': os.path.relpath(video_path, base_folder), 'trials': len(trial_events),
+                                'elapsed': metrics['elapsed'], 'stages': timer.as_dict()['stages']})
+
+    records = run_batch(analyze_video, jobs, workers=workers, on_result=on_result)
+    processed_count = sum(1 for rec in records if rec['error'] is None)
+
+    print_summary(records, label=lambda args: os.path.basename(args[3]),
+                  describe=lambda result: f"trial {len(result[0])}개")
+    save_metrics(base_folder, metrics_records)
+    print(f"\n🎉 모든 영상 처리 완료! ({processed_count}/{len(video_files)}개)")
+    if skipped_files:
+        print(f"\n⏭️ 스킵된 대용량 영상:")
+        for video_path, size_gb in skipped_files[:5]:
+            print(f"  - {os.path.basename(video_path)} ({size_gb:.1f}GB)")
+    return records
+
+
+if __name__ == "__main__":
+    batch_process(base_folder)
@@ -1,29 +1,53 @@
-import cv2
 import pandas as pd
 import os
 import numpy as np
 
+from csv_sniffer import read_csv_sniffed, sniff_csv
+from frame_cache import load_frame_table
+from frame_dtypes import compact_column, compact_frame_table, marker_column, memory_mb
+from gaze_distribution import heatmap_bins, screen_extent, trial_distribution
+from gaze_engine import find_trial_rows, frame_times, trial_stats
+from gaze_fixations import trial_fixations
+from gaze_output import trial_bounds, write_dispersion, write_fixations, write_heatmaps, write_parquet
+from stage_timer import StageTimer, print_stages, write_metrics
+from video_index import video_info
+
 # ===== 실제 사용 시 여기만 수정하세요 =====
 FRAME_DATA_PATH = r'/Volumes/ボリューム/2025_gaze_experiment/sub3/day8/sub3_day8_pre.csv'
 VIDEO_PATH = r'/Volumes/ボリューム/2025_gaze_experiment/sub3/day8/2025-12-03 14-24-06.mp4'
 TRIAL_PATH = r'/Volumes/ボリューム/2025_gaze_experiment/sub3/day8/2025-12-03 14-24-06.csv'
 SAVE_AS = None
+MAX_TRIALS = None  # None이면 trial CSV의 모든 행 (이전 버전은 5개까지)
+STATS_PERCENTILES = ()  # 예: (50, 90) → 통계에 x_p50, y_p50 ... 열 추가
+SAVE_DISTRIBUTION = True  # trial별 _trial_dispersion.csv (BCEA, 볼록 껍질, 중앙 비율) + _heatmaps.npz 저장
+FIXATION_METHOD = None  # 'ivt' (속도) | 'idt' (분산)이면 _fixations.csv + _trial_fixations.csv, None이면 생략
+OUTPUT_MODE = 'csv'  # 'csv': 전체 _final.csv | 'compact': _trial_bounds.csv + 통계만 | 'parquet': compact + _final.parquet
+USE_FRAME_CACHE = True  # Frame CSV를 .frame_cache/에 열별 .npy로 저장해 재실행 시 파싱 생략
+COMPACT_DTYPES = True  # Frame 표를 float32/int32 + 범주형 G열로 줄여 메모리 절약 (CSV 출력 값은 동일)
+QUIET = False  # True면 trial별 출력 끔 (단계/요약 출력은 유지)
+COLLECT_METRICS = True  # 단계 시간 (parse/compact/times/stats/distribution/fixations/write) → _metrics 파일
+METRICS_FORMAT = 'json'  # 'json' | 'csv'
 
 
 # ========================================
 
 def process_frame_data(frame_path, video_path, trial_path, output_path=None):
     print("🚀 시작!")
+    timer = StageTimer(enabled=COLLECT_METRICS)
 
-    # 1. 동영상 FPS
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    cap.release()
+    # 1. 동영상 FPS (영상 메타데이터 인덱스, 처음 한 번만 컨테이너 열기)
+    fps = video_info(video_path)['fps']
     print(f"FPS: {fps}")
 
     # 2. 프레임 데이터 (안전 처리)
     print(f"\n📊 Frame CSV 로드: {frame_path}")
-    df_frame = pd.read_csv(frame_path)
+    timer.mark()
+    parse = lambda path: read_csv_sniffed(path, header=0)  # Frame CSV는 항상 첫 행이 헤더
+    if USE_FRAME_CACHE:
+        df_frame = load_frame_table(frame_path, parse)
+    else:
+        df_frame = parse(frame_path)
+    timer.lap('parse')
     print(f"📊 Frame shape: {df_frame.shape}")
     print(f"📊 Frame 컬럼: {list(df_frame.columns)}")
 
@@ -36,110 +60,93 @@ def process_frame_data(frame_path, video_path, trial_path, output_path=None):
     col_x = df_frame.columns[1]  # B열: x좌표
     col_y = df_frame.columns[2]  # C열: y좌표
     print(f"프레임ID: '{col_frame_id}', x좌표: '{col_x}', y좌표: '{col_y}'")
-
-    # 3. F열 시간 계산 (A열 프레임ID → 초 단위)
-    df_frame['F'] = df_frame[col_frame_id].apply(
-        lambda x: round(int(float(x)) / fps, 3) if pd.notna(x) and str(x).strip() != '' else None
-    )
-
-    # 4. G열 공백 초기화
-    df_frame['G'] = ""
-
-    # 5. Trial CSV 파싱 (인코딩 에러 안전 처리)
+    if COMPACT_DTYPES:
+        with timer.stage('compact'):
+            loaded_mb = memory_mb(df_frame)
+            df_frame = compact_frame_table(df_frame)
+
+    # 3. F열 시간 계산 (A열 프레임ID → 초 단위, 벡터 연산)
+    timer.mark()
+    times = frame_times(df_frame[col_frame_id], fps)
+    df_frame['F'] = compact_column(times) if COMPACT_DTYPES else times
+    timer.lap('times')
+
+    # 5. Trial CSV 파싱 (인코딩/구분자/헤더 자동 판별, 파싱 한 번)
     print(f"\n🔍 Trial CSV 로드: {trial_path}")
-    encodings = ['utf-8-sig', 'utf-8', 'cp949', 'euc-kr', 'latin1']
-
-    df_trial = None
-    for encoding in encodings:
-        try:
-            df_trial = pd.read_csv(trial_path, encoding=encoding)
-            print(f"✅ Trial 로드 성공: encoding={encoding}")
-            print(f"📊 Trial shape: {df_trial.shape}")
-            print(f"📊 Trial 컬럼: {list(df_trial.columns)}")
-            break
-        except UnicodeDecodeError:
-            print(f"⚠️  {encoding} 실패, 다음 시도...")
-            continue
-        except Exception as e:
-            print(f"❌ {encoding} 에러: {e}")
-            continue
-
-    if df_trial is None:
-        print("❌ Trial CSV 모든 인코딩 실패")
+    try:
+        df_trial = read_csv_sniffed(trial_path)
+    except Exception as e:
+        print(f"❌ Trial CSV 로드 실패: {e}")
         return
+    print(f"✅ Trial 로드 성공: {sniff_csv(trial_path)}")
+    print(f"📊 Trial shape: {df_trial.shape}")
+    print(f"📊 Trial 컬럼: {list(df_trial.columns)}")
+
+    # 6. Trial 시간들 + start/end 행 위치 기록 (searchsorted 한 번)
+    timer.mark()
+    n_trials = len(df_trial) if MAX_TRIALS is None else min(MAX_TRIALS, len(df_trial))
+    start_times = np.trunc(pd.to_numeric(df_trial.iloc[:n_trials, 1], errors='coerce').to_numpy(dtype=float))  # B열
+    end_times = np.trunc(pd.to_numeric(df_trial.iloc[:n_trials, 2], errors='coerce').to_numpy(dtype=float))  # C열
+    rows = find_trial_rows(times, np.concatenate([start_times, end_times]))
 
-    # 6. Trial 시간들 + start/end 행 위치 기록
     trial_ranges = []
-    for i in range(min(5, len(df_trial))):
-        try:
-            start_time = int(float(df_trial.iloc[i, 1]))  # B열
-            end_time = int(float(df_trial.iloc[i, 2]))  # C열
-
-            # start 행 찾기
-            mask_start = (
-                    df_frame['F'].notna() &
-                    df_frame['F'].astype(float).apply(lambda x: int(x) == start_time)
-            )
-            start_rows = df_frame[mask_start].index
-            start_row = start_rows[0] if len(start_rows) > 0 else None
-
-            # end 행 찾기
-            mask_end = (
-                    df_frame['F'].notna() &
-                    df_frame['F'].astype(float).apply(lambda x: int(x) == end_time)
-            )
-            end_rows = df_frame[mask_end].index
-            end_row = end_rows[0] if len(end_rows) > 0 else None
-
-            if start_row is not None and end_row is not None:
-                trial_ranges.append((start_row, end_row))
-                df_frame.loc[start_row, 'G'] = f"Trial{i + 1} start"
-                df_frame.loc[end_row, 'G'] = f"Trial{i + 1} end"
-                print(f"Trial{i + 1}: {start_time}s(행{start_row}) ~ {end_time}s(행{end_row})")
-            else:
-                print(f"⚠️  Trial{i + 1} 시간대 데이터 없음")
-        except Exception as e:
-            print(f"❌ Trial{i + 1} 처리 에러: {e}")
+    markers = []  # G열 표시 (행, 라벨)
+    range_trials = []  # trial_ranges 각 구간의 trial 번호 (G열 표시 기준)
+    for i in range(n_trials):
+        if np.isnan(start_times[i]) or np.isnan(end_times[i]):
+            print(f"❌ Trial{i + 1} 처리 에러: 시간 값 변환 불가 {df_trial.iloc[i, 1:3].tolist()}")
             continue
+        start_time, end_time = int(start_times[i]), int(end_times[i])
+        start_row, end_row = rows[i], rows[n_trials + i]
+
+        if start_row >= 0 and end_row >= 0:
+            trial_ranges.append((start_row, end_row))
+            range_trials.append(i + 1)
+            markers += [(start_row, f"Trial{i + 1} start"), (end_row, f"Trial{i + 1} end")]
+            if not QUIET:
+                print(f"Trial{i + 1}: {start_time}s(행{start_row}) ~ {end_time}s(행{end_row})")
+        else:
+            print(f"⚠️  Trial{i + 1} 시간대 데이터 없음")
+
+    # 4. G열: trial 경계 행만 표시, 나머지 공백
+    df_frame['G'] = marker_column(len(df_frame), markers, categorical=COMPACT_DTYPES)
+    timer.lap('times')
+    if COMPACT_DTYPES:
+        print(f"💾 Frame 메모리: 로드 {loaded_mb:.1f}MB → compact {memory_mb(df_frame):.1f}MB (F/G열 포함)")
 
-    # 7. Trial별 B/C열 통계 (start_row ~ end_row 구간)
+    # 7. Trial별 B/C열 통계 (start_row ~ end_row 구간, 전체 trial 한 번에)
     print("\n📊 Trial별 통계 계산 (행 번호 기준)...")
+    timer.mark()
     stats_results = []
+    trial_table = trial_stats(df_frame[col_x], df_frame[col_y],
+                              [r[0] for r in trial_ranges], [r[1] for r in trial_ranges],
+                              percentiles=STATS_PERCENTILES)
+    extra_cols = [c for c in trial_table.columns if c.startswith(('x_p', 'y_p'))]
 
-    for i, (start_row, end_row) in enumerate(trial_ranges):
+    for i, ((start_row, end_row), st) in enumerate(zip(trial_ranges, trial_table.itertuples(index=False))):
         trial_num = i + 1
-
-        try:
-            # start_row 부터 end_row 까지 데이터 (포함)
-            trial_data = df_frame.iloc[start_row:end_row + 1]
-
-            # NaN 제외하고 계산 (B열=x, C열=y)
-            x_data = trial_data[col_x].dropna()
-            y_data = trial_data[col_y].dropna()
-
-            if len(x_data) > 0 and len(y_data) > 0:
-                x_mean = x_data.mean()
-                y_mean = y_data.mean()
-                x_std = x_data.std()
-                y_std = y_data.std()
-
-                stats_results.append({
-                    'trial': trial_num,
-                    'x_cor_aver': round(x_mean, 1),
-                    'y_cor_aver': round(y_mean, 1),
-                    'x_sd': round(x_std, 1),
-                    'y_sd': round(y_std, 1),
-                    'row_count': len(trial_data)
-                })
-                print(f"Trial{trial_num}: 행{start_row}~{end_row} ({len(trial_data)}행)")
-                print(f"  x_avg={x_mean:.1f}, y_avg={y_mean:.1f}, x_sd={x_std:.1f}, y_sd={y_std:.1f}")
-            else:
-                print(f"⚠️  Trial{trial_num}: 유효 데이터 없음")
-        except Exception as e:
-            print(f"❌ Trial{trial_num} 통계 계산 에러: {e}")
-            continue
+        st = st._asdict()
+
+        # NaN 제외 (B열=x, C열=y)
+        if st['x_count'] > 0 and st['y_count'] > 0:
+            stats_results.append({
+                'trial': trial_num,
+                'x_cor_aver': round(st['x_mean'], 1),
+                'y_cor_aver': round(st['y_mean'], 1),
+                'x_sd': round(st['x_sd'], 1),
+                'y_sd': round(st['y_sd'], 1),
+                'row_count': st['row_count'],
+                **{c: round(st[c], 1) for c in extra_cols}
+            })
+            if not QUIET:
+                print(f"Trial{trial_num}: 행{start_row}~{end_row} ({st['row_count']}행)")
+                print(f"  x_avg={st['x_mean']:.1f}, y_avg={st['y_mean']:.1f}, x_sd={st['x_sd']:.1f}, y_sd={st['y_sd']:.1f}")
+        else:
+            print(f"⚠️  Trial{trial_num}: 유효 데이터 없음")
+    timer.lap('stats')
 
     # 8. 통계 저장
+    timer.mark()
     if stats_results:
         stats_df = pd.DataFrame(stats_results)
         stats_file = os.path.splitext(frame_path)[0] + "_trial_stats.csv"
@@ -147,20 +154,67 @@ def process_frame_data(frame_path, video_path, trial_path, output_path=None):
         print(f"\n📈 통계 저장: {stats_file}")
     else:
         print("\n⚠️  통계 데이터 없음")
-
-    # 9. 메인 파일 저장
     root = os.path.splitext(frame_path)[0]
+    timer.lap('write')
+
+    # 8-1. 분포: trial별 고정 격자 히트맵 + 분산 지표 (BCEA, 볼록 껍질 넓이, 중앙 영역 비율), 전체 trial 한 번에
+    if SAVE_DISTRIBUTION and trial_ranges:
+        timer.mark()
+        counts, dispersion = trial_distribution(df_frame[col_x], df_frame[col_y],
+                                                [r[0] for r in trial_ranges], [r[1] for r in trial_ranges])
+        write_dispersion(root + "_trial_dispersion.csv", range_trials, dispersion)
+        write_heatmaps(root + "_heatmaps.npz", range_trials, counts, screen_extent, heatmap_bins)
+        print(f"🗺️ 분포 저장: {root}_trial_dispersion.csv, {os.path.basename(root)}_heatmaps.npz")
+        timer.lap('distribution')
+        if not QUIET:
+            for trial_num, d in zip(range_trials, dispersion.itertuples(index=False)):
+                print(f"  Trial{trial_num}: BCEA={d.bcea:.0f}px², hull={d.hull_area:.0f}px², 중앙 {d.central_share:.1%}")
+
+    # 8-2. Fixation/saccade 분할 (영상 FPS 기준 샘플 시간, 전체 trial 한 번에)
+    if FIXATION_METHOD and trial_ranges:
+        timer.mark()
+        fixations, fixation_summary = trial_fixations(
+            df_frame[col_x], df_frame[col_y], df_frame[col_frame_id], fps,
+            [r[0] for r in trial_ranges], [r[1] for r in trial_ranges], method=FIXATION_METHOD, trials=range_trials)
+        write_fixations(root + "_fixations.csv", root + "_trial_fixations.csv", fixations, fixation_summary)
+        print(f"👁️ Fixation 저장 ({FIXATION_METHOD}, {len(fixations)}개): {root}_trial_fixations.csv")
+        timer.lap('fixations')
+        if not QUIET:
+            for f in fixation_summary.itertuples(index=False):
+                print(f"  Trial{f.trial}: fixation {f.fixation_count}개, 평균 {f.fixation_mean:.3f}s, saccade {f.saccade_count}개")
+
+    # 9. 메인 파일 저장 (compact/parquet 모드는 trial 경계 sidecar + 선택적 Parquet)
     output_path = root + "_final.csv"
 
-    try:
-        df_frame.to_csv(output_path, index=False, encoding='utf-8-sig')
-        print(f"✅ 메인파일 저장: {output_path}")
-    except PermissionError:
-        alt_path = root + "_final_backup.csv"
-        df_frame.to_csv(alt_path, index=False, encoding='utf-8-sig')
-        print(f"🔄 백업 저장: {alt_path}")
-    except Exception as e:
-        print(f"❌ 파일 저장 에러: {e}")
+    timer.mark()
+    if OUTPUT_MODE == 'csv':
+        try:
+            df_frame.to_csv(output_path, index=False, encoding='utf-8-sig')
+            print(f"✅ 메인파일 저장: {output_path}")
+        except PermissionError:
+            alt_path = root + "_final_backup.csv"
+            df_frame.to_csv(alt_path, index=False, encoding='utf-8-sig')
+            print(f"🔄 백업 저장: {alt_path}")
+        except Exception as e:
+            print(f"❌ 파일 저장 에러: {e}")
+    else:
+        start_rows = np.array([r[0] for r in trial_ranges], dtype=np.int64)
+        end_rows = np.array([r[1] for r in trial_ranges], dtype=np.int64)
+        bounds_path = root + "_trial_bounds.csv"
+        trial_bounds(range_trials, start_rows, end_rows, times[start_rows], times[end_rows]) \
+            .to_csv(bounds_path, index=False, encoding='utf-8-sig')
+        print(f"📍 Trial 경계 저장: {bounds_path}")
+        if OUTPUT_MODE == 'parquet' and write_parquet(df_frame, root + "_final.parquet"):
+            print(f"✅ 메인파일 저장: {root}_final.parquet")
+    timer.lap('write')
+
+    # 10. 단계별 시간 메트릭
+    if COLLECT_METRICS:
+        record = {'frame': os.path.basename(frame_path), 'rows': len(df_frame), 'trials': len(trial_ranges),
+                  **timer.as_dict()}
+        metrics_path = write_metrics(f"{root}_metrics.{METRICS_FORMAT}", [record])
+        print_stages(record)
+        print(f"📏 메트릭 저장: {metrics_path}")
 
     print("\n🎉 완벽 완료!")
     if stats_results:
@@ -1,70 +1,93 @@
-import cv2
 import pandas as pd
 import os
 import numpy as np
 from pathlib import Path
 from tqdm import tqdm
 
+from batch_runner import default_workers, print_summary, run_batch
+from csv_sniffer import read_csv_sniffed, sniff_csv
+from excel_reader import read_excel_columns
+from folder_index import file_size, scan_tree
+from frame_cache import cache_dir_name, load_frame_table
+from frame_dtypes import compact_column, compact_frame_table, compact_state, compact_target, marker_column, memory_mb
+from gaze_distribution import heatmap_bins, screen_extent, trial_distribution
+from gaze_engine import RunningTrialStats, find_trial_rows, frame_times, trial_stats
+from gaze_fixations import trial_fixations
+from gaze_output import ChunkWriter, trial_bounds, write_dispersion, write_fixations, write_heatmaps, write_parquet
+from stage_timer import StageTimer, print_stages, write_metrics
+from video_index import video_info
+
 try:
     import openpyxl
-    from openpyxl import load_workbook
 except:
     openpyxl = None
 
+# 설정값
+max_trials = None  # None이면 trial 파일의 모든 행 (이전 버전은 5개까지)
+stats_percentiles = ()  # 예: (50, 90) → _trial_stats.csv에 x_p50, y_p50 ... 열 추가
+save_distribution = False  # True면 trial별 _trial_dispersion.csv (BCEA, 볼록 껍질, 중앙 비율) + _heatmaps.npz 저장
+fixation_method = None  # 'ivt' (속도) | 'idt' (분산)이면 _fixations.csv + _trial_fixations.csv, None이면 생략
+use_frame_cache = True  # Frame 파일을 한 번 파싱해 .frame_cache/에 열별 .npy로 저장, 이후 memory-map 로드
+stream_chunk_rows = None  # 정수면 Frame CSV를 이 행 수 단위로 스트리밍 처리 (메모리 상한), None이면 전체 로드
+compact_dtypes = True  # Frame 표를 float32/int32 + 범주형 G열로 줄여 메모리 절약 (CSV 출력 값은 동일)
+output_mode = 'csv'  # 'csv': 전체 _final.csv (기존) | 'compact': _trial_bounds.csv + 통계만 | 'parquet': compact + _final.parquet
+batch_workers = default_workers  # 폴더 병렬 처리 프로세스 수 (기본 1 = 순차, 빠른 저장장치면 2~4)
+batch_log_filename = 'gaze_batch_log.txt'  # 폴더별 처리 로그를 모아 root에 저장 (None이면 저장 안 함)
+quiet = False  # True면 trial별 출력/데이터 미리보기 끔, 처리 단계/요약 출력은 유지
+collect_metrics = True  # 단계 시간 (parse/compact/times/stats/distribution/fixations/write) → _metrics 파일
+metrics_format = 'json'  # 'json' | 'csv'
+
+
+OUTPUT_SUFFIXES = ('_final', '_final_backup', '_trial_stats', '_trial_bounds', '_trial_dispersion',
+                   '_fixations', '_trial_fixations', '_metrics')  # 이전 실행 출력물 (입력 후보에서 제외)
+
+
+def is_output_file(name):
+    return Path(name).stem.endswith(OUTPUT_SUFFIXES)
 
-def find_data_file(folder_path):
-    """pre CSV 우선, ._ 파일 제외"""
+
+def find_data_file(files):
+    """pre CSV 우선, ._ 파일/이전 출력물 제외 (files: 폴더의 DirEntry 목록)"""
+    files = [f for f in files if not is_output_file(f.name)]
     candidates = []
-    for file in folder_path.iterdir():
+    for file in files:
         if file.name.startswith('._'):  # macOS 메타파일 제외
             continue
-        if file.suffix.lower() == '.csv' and 'pre' in file.stem.lower():
-            candidates.append(('csv', file))
-            print(f"✅ pre CSV: {file.name}")
+        name = Path(file.name)
+        if name.suffix.lower() == '.csv' and 'pre' in name.stem.lower():
+            candidates.append(('csv', Path(file.path)))
 
     if openpyxl and not candidates:
-        for file in folder_path.iterdir():
+        for file in files:
             if file.name.startswith('._'):
                 continue
-            if file.suffix.lower() in ['.xlsx', '.xls'] and 'pre' in file.stem.lower():
-                candidates.append(('excel', file))
-                print(f"✅ pre 엑셀: {file.name}")
+            name = Path(file.name)
+            if name.suffix.lower() in ['.xlsx', '.xls'] and 'pre' in name.stem.lower():
+                candidates.append(('excel', Path(file.path)))
 
-    print(f"🔍 데이터 파일 후보: {len(candidates)}개")
     return candidates[0] if candidates else None
 
 
-def find_trial_file_enhanced(folder_path):
-    """🔥 가장 적합한 trial 파일 적극적 탐색"""
-    videos = find_videos(folder_path)
-    if not videos:
-        return None
+def find_trial_file_enhanced(files):
+    """🔥 가장 적합한 trial 파일 적극적 탐색 (files: 폴더의 DirEntry 목록)"""
+    # glob('*')과 같이 숨김 파일 제외, 이전 출력물(_final.csv 등) 제외
+    visible = [f for f in files if not f.name.startswith('.') and not is_output_file(f.name)]
 
     # 1. 시간형식 CSV들 우선 (2026-01-14 14-20-47.csv 패턴)
-    time_csvs = list(folder_path.glob("*.csv"))
-    time_csvs = [f for f in time_csvs if any(x in f.stem for x in ['202', '14-', '13-', '15-', '16-'])]
-
-    for csv_file in sorted(time_csvs, key=lambda x: x.stat().st_size, reverse=True):
-        if csv_file.name.startswith('._'):
-            continue
-        size_kb = csv_file.stat().st_size / 1024
-        print(f"🔍 시간형식 CSV: {csv_file.name} ({size_kb:.1f}KB)")
-        return ('csv', csv_file)
+    all_csvs = [f for f in visible if f.name.endswith('.csv')]
+    time_csvs = [f for f in all_csvs if any(x in Path(f.name).stem for x in ['202', '14-', '13-', '15-', '16-'])]
+    if time_csvs:
+        return ('csv', Path(max(time_csvs, key=file_size).path))
 
     # 2. 가장 큰 CSV 파일
-    all_csvs = [f for f in folder_path.glob('*.csv') if not f.name.startswith('._')]
     if all_csvs:
-        largest_csv = max(all_csvs, key=lambda x: x.stat().st_size)
-        print(f"✅ 가장 큰 CSV: {largest_csv.name}")
-        return ('csv', largest_csv)
+        return ('csv', Path(max(all_csvs, key=file_size).path))
 
     # 3. 엑셀 파일들
     if openpyxl:
-        excel_files = [f for f in folder_path.glob('*') if f.suffix.lower() in ['.xlsx', '.xls']]
+        excel_files = [f for f in visible if Path(f.name).suffix.lower() in ['.xlsx', '.xls']]
         if excel_files:
-            largest_excel = max(excel_files, key=lambda x: x.stat().st_size)
-            print(f"✅ 가장 큰 엑셀: {largest_excel.name}")
-            return ('excel', largest_excel)
+            return ('excel', Path(max(excel_files, key=file_size).path))
 
     return None
 
@@ -90,18 +113,35 @@ def read_trial_file(file_info):
     # 엑셀 처리
     if file_type == 'excel' and openpyxl:
         try:
-            wb = load_workbook(file_path, data_only=True)
-            ws = wb.active
-            data = [[cell.value for cell in row] for row in ws.iter_rows(min_row=2)]
-            wb.close()
-            df = pd.DataFrame(data)
+            # 첫 행(헤더) 건너뛰고 0, 1, 2 ... 열로 스트리밍 읽기, 한 번 읽으면 열 캐시에서 로드
+            parse = lambda path: read_excel_columns(path, header=False, skip_rows=1)
+            if use_frame_cache:
+                df = load_frame_table(file_path, parse, key='trial-noheader-skip1')  # Frame 파싱 캐시와 구분
+            else:
+                df = parse(file_path)
             if len(df) > 0:
                 print(f"✅ 엑셀: {len(df)}행")
                 return df
         except Exception as e:
             print(f"⚠️  엑셀 실패: {e}")
 
-    # 🔥 CSV 모든 인코딩 + header=None
+    # 🔥 CSV: 인코딩/구분자를 앞부분 샘플로 한 번에 판별 (파일별로 기억) → C 엔진 파싱 한 번
+    # 헤더 행도 데이터로 읽음 (기존과 같은 trial 번호: 헤더가 있으면 첫 trial이 Trial2)
+    try:
+        df = read_csv_sniffed(file_path, header=None)
+        if len(df) > 0:
+            dialect = sniff_csv(file_path)
+            print(f"✅ 로드 성공! {len(df)}행 x {len(df.columns)}컬럼 "
+                  f"(encoding={dialect['encoding']}, sep={dialect['sep']!r})")
+            if not quiet:
+                print("📋 데이터 미리보기:")
+                print(df.head(3).to_string())
+            return df
+        print("⚠️  빈 데이터")
+    except Exception as e:
+        print(f"⚠️  자동 판별 파싱 실패 → 인코딩별 재시도: {e}")
+
+    # 판별이 틀린 경우만: 모든 인코딩 + header=None
     strategies = [
         {'encoding': 'utf-8-sig', 'sep': ',', 'header': None},
         {'encoding': 'utf-8', 'sep': ',', 'header': None},
@@ -114,7 +154,7 @@ def read_trial_file(file_info):
 
     for strategy in strategies:
         try:
-            df = pd.read_csv(file_path, nrows=10, **strategy)
+            df = pd.read_csv(file_path, **strategy)
             if len(df) > 0:
                 print(f"✅ 로드 성공! {len(df)}행 x {len(df.columns)}컬럼")
 
@@ -129,8 +169,9 @@ def read_trial_file(file_info):
                         continue
 
                 if has_numbers:
-                    print("📋 데이터 미리보기:")
-                    print(df.head(3).to_string())
+                    if not quiet:
+                        print("📋 데이터 미리보기:")
+                        print(df.head(3).to_string())
                     return df
                 else:
                     print("⚠️  숫자 데이터 없음")
@@ -151,154 +192,446 @@ def read_trial_file(file_info):
     return None
 
 
-def find_videos(folder_path):
-    """비디오 찾기 (._ 제외)"""
+def find_videos(files):
+    """비디오 찾기 (._ 제외, files: 폴더의 DirEntry 목록)"""
     video_exts = ['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v']
-    videos = [f for f in folder_path.iterdir() if f.suffix.lower() in video_exts and not f.name.startswith('._')]
-    print(f"🎥 비디오: {len(videos)}개")
-    return videos
+    return [f for f in files if Path(f.name).suffix.lower() in video_exts and not f.name.startswith('._')]
 
 
 def read_data_file(file_info):
-    """Frame 데이터 읽기"""
+    """Frame 데이터 읽기 (캐시 사용 시 원본이 바뀌었을 때만 다시 파싱)"""
     file_type, file_path = file_info
     if file_path.name.startswith('._'):
         return None
 
+    if use_frame_cache:
+        return load_frame_table(file_path, lambda path: parse_data_file(file_type, path))
+    return parse_data_file(file_type, file_path)
+
+
+def parse_data_file(file_type, file_path):
+    """Frame 원본(CSV/엑셀) 파싱"""
     if file_type == 'csv':
-        return pd.read_csv(file_path)
+        return read_csv_sniffed(file_path, header=0)
     elif file_type == 'excel' and openpyxl:
         try:
-            wb = load_workbook(file_path, data_only=True)
-            ws = wb.active
-            data = []
-            for row in ws.iter_rows(values_only=True):
-                data.append(row)
-            wb.close()
-            return pd.DataFrame(data[1:], columns=data[0])
-        except:
+            return read_excel_columns(file_path)
+        except Exception as e:
+            print(f"⚠️  엑셀 실패: {e}")
             return None
     return None
 
 
-def process_frame_data(frame_path_info, video_path, trial_df):
-    """메인 처리"""
-    print("🚀 처리 시작!")
-
-    df_frame = read_data_file(frame_path_info)
-    if df_frame is None or len(df_frame.columns) < 3:
-        print("❌ Frame 데이터 문제")
-        return False
-
-    print(f"📊 Frame: {df_frame.shape}")
-    col_frame_id, col_x, col_y = df_frame.columns[:3]
-
-    # FPS
-    cap = cv2.VideoCapture(str(video_path))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    cap.release()
+def video_fps(video_path, fps=None):
+    """영상 FPS (계획 단계에서 받은 값이 없으면 영상 인덱스 조회)"""
+    if fps is None:
+        fps = video_info(video_path)['fps']
     print(f"FPS: {fps}")
+    return fps
 
-    # 시간 계산
-    df_frame['F'] = df_frame[col_frame_id].apply(
-        lambda x: round(int(float(x)) / fps, 3) if pd.notna(x) and str(x).strip() != '' else None
-    )
-    df_frame['G'] = ""
 
-    # Trial 처리
-    stats_results = []
-    for i in range(min(5, len(trial_df))):
-        try:
-            start_time = int(float(trial_df.iloc[i, 1]))  # B열
-            end_time = int(float(trial_df.iloc[i, 2])) if len(trial_df.columns) > 2 else start_time + 10
+def trial_times(trial_df):
+    """Trial 파일 B/C열 → (start 초, end 초) 배열. C열이 없으면 start+10"""
+    n_trials = len(trial_df) if max_trials is None else min(max_trials, len(trial_df))
+    start_times = np.trunc(pd.to_numeric(trial_df.iloc[:n_trials, 1], errors='coerce').to_numpy(dtype=float))  # B열
+    if len(trial_df.columns) > 2:
+        end_times = np.trunc(pd.to_numeric(trial_df.iloc[:n_trials, 2], errors='coerce').to_numpy(dtype=float))
+    else:
+        end_times = start_times + 10
+    return start_times, end_times
 
-            mask_start = df_frame['F'].notna() & df_frame['F'].astype(float).apply(lambda x: int(x) == start_time)
-            start_rows = df_frame[mask_start].index
-            mask_end = df_frame['F'].notna() & df_frame['F'].astype(float).apply(lambda x: int(x) == end_time)
-            end_rows = df_frame[mask_end].index
 
-            if len(start_rows) > 0 and len(end_rows) > 0:
-                start_row, end_row = start_rows[0], end_rows[0]
-                df_frame.loc[start_row, 'G'] = f"Trial{i + 1} start"
-                df_frame.loc[end_row, 'G'] = f"Trial{i + 1} end"
+def trial_markers(start_rows, end_rows, found):
+    """G열 표시 (행, 라벨) 목록. 경계 행이 겹치면 뒤 trial이 덮어쓰도록 trial 순서 유지"""
+    markers = []
+    for i in np.flatnonzero(found):
+        markers.append((start_rows[i], f"Trial{i + 1} start"))
+        markers.append((end_rows[i], f"Trial{i + 1} end"))
+    return markers
 
-                trial_data = df_frame.iloc[start_row:end_row + 1]
-                x_data = trial_data[col_x].dropna()
-                y_data = trial_data[col_y].dropna()
 
-                if len(x_data) > 0:
+def summarize_trials(trial_df, start_times, end_times, found, trial_table):
+    """trial별 통계표(trial_table, 찾은 trial 번호 index) → _trial_stats.csv 행 목록"""
+    extra_cols = [c for c in trial_table.columns if c.startswith(('x_p', 'y_p'))]
+    stats_results = []
+    for i in range(len(start_times)):
+        try:
+            if np.isnan(start_times[i]) or np.isnan(end_times[i]):
+                raise ValueError(f"시간 값 변환 불가: {trial_df.iloc[i, 1:3].tolist()}")
+            start_time, end_time = int(start_times[i]), int(end_times[i])
+
+            if found[i]:
+                st = trial_table.loc[i]
+                if st['x_count'] > 0:
+                    has_y = st['y_count'] > 0
                     stats_results.append({
                         'trial': i + 1,
-                        'x_cor_aver': round(x_data.mean(), 1),
-                        'y_cor_aver': round(y_data.mean(), 1) if len(y_data) > 0 else 0,
-                        'x_sd': round(x_data.std(), 1),
-                        'y_sd': round(y_data.std(), 1) if len(y_data) > 0 else 0,
-                        'row_count': len(trial_data)
+                        'x_cor_aver': round(st['x_mean'], 1),
+                        'y_cor_aver': round(st['y_mean'], 1) if has_y else 0,
+                        'x_sd': round(st['x_sd'], 1),
+                        'y_sd': round(st['y_sd'], 1) if has_y else 0,
+                        'row_count': int(st['row_count']),
+                        **{c: round(st[c], 1) for c in extra_cols}
                     })
-                    print(f"✅ Trial{i + 1}: {start_time}s~{end_time}s")
+                    if not quiet:
+                        print(f"✅ Trial{i + 1}: {start_time}s~{end_time}s")
         except Exception as e:
             print(f"⚠️  Trial{i + 1} 에러: {e}")
             continue
+    return stats_results
 
-    # 저장
-    frame_path = frame_path_info[1]
-    stats_file = frame_path.parent / (frame_path.stem + "_trial_stats.csv")
-    final_file = frame_path.parent / (frame_path.stem + "_final.csv")
 
+def output_paths(frame_path):
+    stem = frame_path.parent / frame_path.stem
+    return {'stats': Path(f"{stem}_trial_stats.csv"), 'final': Path(f"{stem}_final.csv"),
+            'bounds': Path(f"{stem}_trial_bounds.csv"), 'parquet': Path(f"{stem}_final.parquet"),
+            'dispersion': Path(f"{stem}_trial_dispersion.csv"), 'heatmaps': Path(f"{stem}_heatmaps.npz"),
+            'fixations': Path(f"{stem}_fixations.csv"), 'fixation_summary': Path(f"{stem}_trial_fixations.csv"),
+            'metrics': Path(f"{stem}_metrics.{metrics_format}")}
+
+
+def save_distribution_outputs(paths, trials, x, y, start_rows, end_rows):
+    """trial별 히트맵 + 분산 지표 (전체 trial 한 번에 계산) 저장"""
+    counts, table = trial_distribution(x, y, start_rows, end_rows)
+    write_dispersion(paths['dispersion'], trials, table)
+    write_heatmaps(paths['heatmaps'], trials, counts, screen_extent, heatmap_bins)
+    print(f"🗺️ 분포 저장: {paths['dispersion']}, {paths['heatmaps'].name}")
+
+
+def save_fixation_outputs(paths, trials, x, y, frame_ids, fps, start_rows, end_rows):
+    """trial별 fixation 분할 (fixation_method) → fixation 목록 + trial 요약 저장"""
+    fixations, summary = trial_fixations(x, y, frame_ids, fps, start_rows, end_rows,
+                                         method=fixation_method, trials=trials)
+    write_fixations(paths['fixations'], paths['fixation_summary'], fixations, summary)
+    print(f"👁️ Fixation 저장 ({fixation_method}, {len(fixations)}개): {paths['fixation_summary']}")
+
+
+def save_trial_outputs(paths, stats_results, bounds):
+    """_trial_stats.csv + (compact/parquet 모드) _trial_bounds.csv 저장"""
     if stats_results:
-        pd.DataFrame(stats_results).to_csv(stats_file, index=False, encoding='utf-8-sig')
-        print(f"📈 통계 저장: {stats_file}")
+        pd.DataFrame(stats_results).to_csv(paths['stats'], index=False, encoding='utf-8-sig')
+        print(f"📈 통계 저장: {paths['stats']}")
+    if output_mode != 'csv':
+        bounds.to_csv(paths['bounds'], index=False, encoding='utf-8-sig')
+        print(f"📍 Trial 경계 저장: {paths['bounds']}")
+
+
+def save_metrics(paths, timer, **fields):
+    """폴더(Frame 파일) 1개의 단계 시간 메트릭 저장 (collect_metrics=False면 생략)"""
+    if not collect_metrics:
+        return
+    record = {**fields, **timer.as_dict()}
+    write_metrics(paths['metrics'], [record])
+    print_stages(record)
+    print(f"📏 메트릭 저장: {paths['metrics']}")
 
-    df_frame.to_csv(final_file, index=False, encoding='utf-8-sig')
-    print(f"✅ 완료: {final_file}")
+
+def process_frame_data(frame_path_info, video_path, trial_df, fps=None):
+    """메인 처리"""
+    if stream_chunk_rows and frame_path_info[0] == 'csv':
+        return process_frame_data_streaming(frame_path_info, video_path, trial_df, fps)
+
+    print("🚀 처리 시작!")
+    timer = StageTimer(enabled=collect_metrics)
+
+    with timer.stage('parse'):
+        df_frame = read_data_file(frame_path_info)
+    if df_frame is None or len(df_frame.columns) < 3:
+        print("❌ Frame 데이터 문제")
+        return False
+
+    print(f"📊 Frame: {df_frame.shape}")
+    col_frame_id, col_x, col_y = df_frame.columns[:3]
+    if compact_dtypes:
+        with timer.stage('compact'):
+            loaded_mb = memory_mb(df_frame)
+            df_frame = compact_frame_table(df_frame)
+
+    # FPS
+    fps = video_fps(video_path, fps)
+
+    # 시간 계산 (벡터 연산)
+    timer.mark()
+    times = frame_times(df_frame[col_frame_id], fps)
+    df_frame['F'] = compact_column(times) if compact_dtypes else times
+
+    # Trial 시간 → start/end 행 위치 (searchsorted 한 번)
+    start_times, end_times = trial_times(trial_df)
+    n_trials = len(start_times)
+    rows = find_trial_rows(times, np.concatenate([start_times, end_times]))
+    start_rows, end_rows = rows[:n_trials], rows[n_trials:]
+    found = (start_rows >= 0) & (end_rows >= 0)
+
+    df_frame['G'] = marker_column(len(df_frame), trial_markers(start_rows, end_rows, found),
+                                  categorical=compact_dtypes)
+    timer.lap('times')
+    if compact_dtypes:
+        print(f"💾 Frame 메모리: 로드 {loaded_mb:.1f}MB → compact {memory_mb(df_frame):.1f}MB (F/G열 포함)")
+
+    # 전체 trial 통계 한 번에 계산 (행 범위 prefix sum)
+    timer.mark()
+    trial_table = trial_stats(df_frame[col_x], df_frame[col_y], start_rows[found], end_rows[found],
+                              percentiles=stats_percentiles)
+    trial_table.index = np.flatnonzero(found)
+    stats_results = summarize_trials(trial_df, start_times, end_times, found, trial_table)
+    timer.lap('stats')
+
+    # 저장
+    paths = output_paths(frame_path_info[1])
+    with timer.stage('write'):
+        bounds = trial_bounds(np.flatnonzero(found) + 1, start_rows[found], end_rows[found],
+                              times[start_rows[found]], times[end_rows[found]])
+        save_trial_outputs(paths, stats_results, bounds)
+    if save_distribution:
+        with timer.stage('distribution'):
+            save_distribution_outputs(paths, np.flatnonzero(found) + 1, df_frame[col_x], df_frame[col_y],
+                                      start_rows[found], end_rows[found])
+    if fixation_method:
+        with timer.stage('fixations'):
+            save_fixation_outputs(paths, np.flatnonzero(found) + 1, df_frame[col_x], df_frame[col_y],
+                                  df_frame[col_frame_id], fps, start_rows[found], end_rows[found])
+
+    timer.mark()
+    if output_mode == 'csv':
+        df_frame.to_csv(paths['final'], index=False, encoding='utf-8-sig')
+        print(f"✅ 완료: {paths['final']}")
+    elif output_mode == 'parquet' and write_parquet(df_frame, paths['parquet']):
+        print(f"✅ 완료: {paths['parquet']}")
+    else:
+        print("✅ 완료")
+    timer.lap('write')
+    save_metrics(paths, timer, frame=frame_path_info[1].name, rows=len(df_frame), trials=int(found.sum()))
     return True
 
 
-def process_folder(folder_path):
-    """폴더 처리 (로그 최소화)"""
-    folder = Path(folder_path)
+def merge_chunk_dtypes(seen):
+    """청크별로 추론된 열 타입 → 전체 파일을 한 번에 읽었을 때의 타입 (정수+실수 → 실수)"""
+    dtypes = {}
+    for col, kinds in seen.items():
+        if len(kinds) > 1 and kinds <= {'i', 'u', 'f', 'b'} and 'f' in kinds:
+            dtypes[col] = 'float64'
+    return dtypes
+
+
+def process_frame_data_streaming(frame_path_info, video_path, trial_df, fps=None):
+    """스트리밍 처리: Frame CSV를 stream_chunk_rows 행씩 두 번 읽어 메모리 상한 유지
+
+    1차: 청크별 F열로 trial 경계 행(첫 등장) + 열 타입 확인
+    2차: 같은 타입으로 다시 읽으며 G열 표시, trial 통계 누적, _final.csv에 이어 쓰기
+    """
+    print(f"🚀 스트리밍 처리 시작! (청크 {stream_chunk_rows}행)")
+    if stats_percentiles:
+        print("⚠️ 스트리밍 모드는 분위수 통계 미지원 → 평균/SD만 저장")
+    if save_distribution:
+        print("⚠️ 스트리밍 모드는 히트맵/분산 지표 미지원 → 생략")
+    if fixation_method:
+        print("⚠️ 스트리밍 모드는 fixation 분할 미지원 → 생략")
+    frame_path = frame_path_info[1]
+    fps = video_fps(video_path, fps)
+    timer = StageTimer(enabled=collect_metrics)
+
+    start_times, end_times = trial_times(trial_df)
+    n_trials = len(start_times)
+    targets = np.concatenate([start_times, end_times])
+
+    # 1차: trial 경계 행 + 열 타입
+    rows = np.full(len(targets), -1, dtype=np.int64)
+    row_times = np.full(len(targets), np.nan)
+    seen = {}
+    states, time_state = {}, None  # compact_dtypes: 열별 compact 판정 누적 (전체 로드와 같은 타입 결정)
+    total_rows = 0
+    columns = None
+    timer.mark()
+    dialect = {**sniff_csv(frame_path), 'header': 0}
+    if dialect['sep'] == ' ':
+        dialect['sep'] = r'\s+'
+    for chunk in pd.read_csv(frame_path, chunksize=stream_chunk_rows, **dialect):
+        timer.lap('parse')
+        if columns is None:
+            columns = list(chunk.columns)
+            if len(columns) < 3:
+                print("❌ Frame 데이터 문제")
+                return False
+        times = frame_times(chunk.iloc[:, 0], fps)
+        local = find_trial_rows(times, targets)
+        new = (rows < 0) & (local >= 0)
+        rows[new] = local[new] + total_rows
+        row_times[new] = times[local[new]]
+        for col in columns:
+            seen.setdefault(col, set()).add(chunk[col].dtype.kind)
+            if compact_dtypes:
+                states[col] = compact_state(chunk[col].to_numpy(), states.get(col))
+        if compact_dtypes:
+            time_state = compact_state(times, time_state)
+        total_rows += len(chunk)
+        timer.lap('times')
+
+    if columns is None:
+        print("❌ Frame 데이터 문제")
+        return False
+    print(f"📊 Frame: ({total_rows}, {len(columns)})")
+
+    start_rows, end_rows = rows[:n_trials], rows[n_trials:]
+    found = (start_rows >= 0) & (end_rows >= 0)
+    markers = trial_markers(start_rows, end_rows, found)
+    labels = list(dict.fromkeys(label for _, label in markers))  # 청크마다 같은 G 범주
+    running = RunningTrialStats(start_rows[found], end_rows[found])
+    compact_types = {col: compact_target(state) for col, state in states.items()}
+    compact_types = {col: dtype for col, dtype in compact_types.items() if dtype is not None}
+    time_type = compact_target(time_state)
+
+    # 2차: 표시 + 통계 누적 + 이어 쓰기 (compact 모드는 통계만)
+    paths = output_paths(frame_path)
+    out_path = paths['final'] if output_mode == 'csv' else paths['parquet']
+    writer = ChunkWriter(out_path, output_mode) if output_mode in ('csv', 'parquet') else None
+    offset = 0
+    timer.mark()
+    try:
+        for chunk in pd.read_csv(frame_path, chunksize=stream_chunk_rows, dtype=merge_chunk_dtypes(seen), **dialect):
+            timer.lap('parse')
+            running.update(offset, chunk.iloc[:, 1].to_numpy(), chunk.iloc[:, 2].to_numpy())
+            timer.lap('stats')
+            if writer is not None:
+                # 전체 로드(compact_frame_table + compact F + 범주형 G)와 같은 열 타입
+                for col, dtype in compact_types.items():
+                    chunk[col] = chunk[col].to_numpy().astype(dtype)
+                times = frame_times(chunk.iloc[:, 0], fps)
+                chunk['F'] = times.astype(time_type) if time_type else times
+                chunk['G'] = marker_column(len(chunk), [(row - offset, label) for row, label in markers
+                                                        if offset <= row < offset + len(chunk)],
+                                           categorical=compact_dtypes, labels=labels)
+                timer.lap('times')
+                writer.write(chunk)
+                timer.lap('write')
+            offset += len(chunk)
+    finally:
+        if writer is not None:
+            with timer.stage('write'):
+                writer.close()
+
+    with timer.stage('stats'):
+        trial_table = running.result()
+        trial_table.index = np.flatnonzero(found)
+        stats_results = summarize_trials(trial_df, start_times, end_times, found, trial_table)
+
+    with timer.stage('write'):
+        bounds = trial_bounds(np.flatnonzero(found) + 1, start_rows[found], end_rows[found],
+                              row_times[:n_trials][found], row_times[n_trials:][found])
+        save_trial_outputs(paths, stats_results, bounds)
+
+    print(f"✅ 완료: {out_path}" if writer is not None and writer.mode else "✅ 완료")
+    save_metrics(paths, timer, frame=frame_path.name, rows=total_rows, trials=int(found.sum()))
+    return True
+
 
+def plan_folder(folder, files, index_root):
+    """폴더 하나의 처리 계획 (파일 선택 + 영상 fps는 index_root의 인덱스 조회). 세션 폴더가 아니면 (None, 사유)
+
+    인덱스를 쓸 수 없으면(읽기 전용 드라이브 등) video_info가 영상 헤더를 직접 읽음.
+    """
     # Frame 파일
-    frame_path_info = find_data_file(folder)
+    frame_path_info = find_data_file(files)
     if not frame_path_info:
-        return False
+        return None, "Frame 파일 없음"
 
     # 비디오 3개
-    videos = find_videos(folder)
+    videos = find_videos(files)
     if len(videos) < 3:
-        return False
-
-    video_path = min(videos, key=lambda x: x.stat().st_size)
+        return None, f"비디오 {len(videos)}개"
 
     # Trial 파일 (강화된 탐색)
-    trial_info = find_trial_file_enhanced(folder)
+    trial_info = find_trial_file_enhanced(files)
     if not trial_info:
-        return False
+        return None, "Trial 파일 없음"
+
+    video = min(videos, key=file_size)
+    fps = video_info(video.path, root=index_root)['fps']
+    return {'folder': folder, 'frame': frame_path_info, 'video': Path(video.path), 'fps': fps,
+            'trial': trial_info}, None
+
 
-    trial_df = read_trial_file(trial_info)
+def build_plan(root_folder):
+    """트리를 한 번 훑어 처리 대상 폴더 계획 목록과 건너뛸 폴더 {사유: 개수}를 만듦"""
+    folders = scan_tree(root_folder, skip_dir_names=(cache_dir_name,), include_root=False)
+    plan, skipped = [], {}
+    for folder, files in folders.items():
+        entry, reason = plan_folder(folder, files, root_folder)
+        if entry is None:
+            skipped[reason] = skipped.get(reason, 0) + 1
+        else:
+            plan.append(entry)
+    return plan, skipped
+
+
+def print_plan(plan, skipped, root_folder):
+    """처리 계획 출력 (실행 전 검토용)"""
+    root = Path(root_folder)
+    print(f"\n🗂️ 처리 계획: 세션 폴더 {len(plan)}개")
+    print("-" * 80)
+    for i, entry in enumerate(plan, 1):
+        print(f"  {i:>3}. {entry['folder'].relative_to(root)}")
+        print(f"       frame={entry['frame'][1].name} | video={entry['video'].name} ({entry['fps']}fps) "
+              f"| trial={entry['trial'][1].name}")
+    if skipped:
+        print("-" * 80)
+        print("  건너뜀: " + ", ".join(f"{reason} {count}개" for reason, count in skipped.items()))
+
+
+def process_planned(entry):
+    """계획된 폴더 처리: Trial 파일 읽기 → Frame 처리"""
+    trial_df = read_trial_file(entry['trial'])
     if trial_df is None or len(trial_df) == 0:
         return False
 
-    print(f"🎯 {folder.name} 처리 시작!")
-    return process_frame_data(frame_path_info, video_path, trial_df)
+    print(f"🎯 {entry['folder'].name} 처리 시작!")
+    return process_frame_data(entry['frame'], entry['video'], trial_df, fps=entry['fps'])
 
 
-def batch_process(root_folder):
-    """배치 처리"""
-    root = Path(root_folder)
-    folders = [f for f in root.rglob('*') if f.is_dir()]
+def process_folder(folder_path):
+    """폴더 처리 (로그 최소화). 세션 폴더가 아니면 None, 처리 성공/실패는 True/False"""
+    folder = Path(folder_path)
+    entry, reason = plan_folder(folder, scan_tree(folder, skip_dir_names=(cache_dir_name,))[folder], folder)
+    if entry is None:
+        print(f"⏭️ {folder.name}: {reason}")
+        return None
+    return process_planned(entry)
 
-    print(f"📁 총 폴더: {len(folders)}개")
-    success = 0
 
-    for folder in tqdm(folders, desc="처리중"):
-        try:
-            if process_folder(folder):
-                success += 1
-        except Exception as e:
-            print(f"❌ {folder.name}: {e}")
+def batch_process(root_folder, workers=batch_workers, dry_run=False):
+    """배치 처리 (workers>1이면 폴더 단위 프로세스 풀)
 
-    print(f"\n🎉 완료! 성공: {success}/{len(folders)}")
+    먼저 트리를 한 번 훑어 처리 계획을 출력하고 (dry_run=True면 여기서 종료),
+    폴더별 로그는 출력하지 않고 모아서 root/batch_log_filename에 저장,
+    끝나면 처리/실패 폴더 요약표 출력.
+    """
+    root = Path(root_folder)
+    plan, skipped = build_plan(root)
+    print_plan(plan, skipped, root)
+    if dry_run:
+        return plan
+
+    with tqdm(total=len(plan), desc="처리중") as bar:
+        records = run_batch(process_planned, [(entry,) for entry in plan],
+                            workers=workers, progress=bar, quiet=True)
+
+    for rec in records:
+        if rec['result'] is False and not rec['error']:
+            rec['error'] = "처리 실패 (로그 확인)"
+
+    if batch_log_filename:
+        log_path = root / batch_log_filename
+        with open(log_path, 'w', encoding='utf-8') as f:
+            for rec in records:
+                f.write(f"===== {rec['args'][0]['folder'].relative_to(root)} =====\n{rec['log']}")
+                if rec['error']:
+                    f.write(f"❌ {rec['error']}\n")
+        print(f"📝 폴더별 로그: {log_path}")
+
+    print_summary(records, label=lambda args: str(args[0]['folder'].relative_to(root)),
+                  describe=lambda result: "처리 완료", title="폴더별 요약")
+    success = sum(1 for rec in records if not rec['error'])
+    print(f"\n🎉 완료! 성공: {success}/{len(plan)} (건너뛴 폴더: {sum(skipped.values())})")
+    return records
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 설정값
+default_workers = 1  # 기본은 순차 (외장 드라이브 1개에서 동시에 여러 파일을 읽으면 디스크 경합 + 메모리 증가), 늘릴 때는 2~4
+
+
+def _run_job(func, args, capture_log):
+    """워커에서 단일 작업 실행: (결과, 로그, 소요시간, 에러)"""
+    start = time.perf_counter()
+    log = io.StringIO()
+    result, error = None, None
+    with contextlib.redirect_stdout(log) if capture_log else contextlib.nullcontext():
+        try:
+            result = func(*args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e).strip()}"
+    return result, log.getvalue(), time.perf_counter() - start, error
+
+
+def run_batch(func, jobs, workers=default_workers, on_result=None, progress=None, quiet=False):
+    """jobs(인자 튜플 리스트)를 프로세스 풀에서 실행, 결과는 입력 순서대로 반환
+
+    workers=1이면 기존처럼 현재 프로세스에서 순차 실행.
+    병렬일 때 워커 출력은 작업별로 모아 입력 순서대로 출력 (로그 뒤섞임 방지).
+    on_result(idx, args, result)는 메인 프로세스에서 입력 순서대로 호출 (CSV 저장 등).
+    progress: 작업마다 update(1)을 호출할 진행바 (tqdm 등)
+    quiet=True면 작업 로그를 출력하지 않고 레코드의 'log'에만 보관 (요약표로 대체).
+    """
+    workers = max(1, min(workers, len(jobs))) if jobs else 1
+    records = []
+
+    def collect(idx, args, outcome):
+        result, log, elapsed, error = outcome
+        if log and not quiet:
+            print(log, end="" if log.endswith("\n") else "\n")
+        if error is None and on_result is not None:
+            try:
+                on_result(idx, args, result)
+            except Exception as e:
+                error = f"{type(e).__name__}: {str(e).strip()}"
+        if error is not None and not quiet:
+            print(f"❌ [{idx + 1}/{len(jobs)}] {error}")
+        records.append({'idx': idx, 'args': args, 'result': result,
+                        'elapsed': elapsed, 'error': error, 'log': log})
+        if progress is not None:
+            progress.update(1)
+
+    if workers == 1:
+        for idx, args in enumerate(jobs):
+            collect(idx, args, _run_job(func, args, capture_log=quiet))
+        return records
+
+    if not quiet:
+        print(f"⚙️ 병렬 처리: 워커 {workers}개")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_job, func, args, True) for args in jobs]
+        for idx, (args, future) in enumerate(zip(jobs, futures)):
+            collect(idx, args, future.result())
+    return records
+
+
+def print_summary(records, label, describe, title="영상별 요약"):
+    """작업별 결과 요약표 출력. describe(result) → 결과 문자열"""
+    print(f"\n{'=' * 80}")
+    print(f"📋 {title} ({len(records)}개)")
+    print("-" * 80)
+    for rec in records:
+        name = label(rec['args'])
+        status = f"❌ {rec['error']}" if rec['error'] else f"✅ {describe(rec['result'])}"
+        print(f"  {rec['idx'] + 1:>3}. {name:<40} {rec['elapsed']:>8.1f}s  {status}")
+    total = sum(rec['elapsed'] for rec in records)
+    failed = sum(1 for rec in records if rec['error'])
+    print("-" * 80)
+    print(f"  합계 작업시간 {total:.1f}s | 성공 {len(records) - failed} | 실패 {failed}")
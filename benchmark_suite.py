@@ -0,0 +1,587 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+
+import frame_reader
+import valo_analyzer as valo
+from frame_reader import FFmpegFrameReader, VideoFrameReader
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 설정값
+bench_folder = None  # 합성 영상/CSV 저장 폴더 (None이면 임시 폴더, 지정하면 다음 실행에서 재사용)
+report_filename = 'benchmark_report.json'  # bench_folder 안에 저장하는 결과
+baseline_report = None  # 이전 benchmark_report.json 경로: 처리량이 regression_tolerance 넘게 떨어지면 실패
+regression_tolerance = 0.15  # 허용 처리량 감소 비율 (측정 오차 감안)
+repeats = 3  # 단계별 반복 횟수, 가장 빠른 결과 사용 (디스크 캐시/스케줄링 잡음 제거)
+
+aimlab_clip = {'size': (320, 180), 'fps': 30, 'duration': 150, 'flashes': (70, 125), 'flash_seconds': 1}
+valo_clip = {'size': (480, 270), 'fps': 30, 'duration': 130, 'events': (20, 115), 'event_seconds': 2}
+reader_clip = {'size': (320, 240), 'fps': 30000 / 1001, 'duration': 20, 'step': 3,
+               'crop': (37, 61, 151, 97)}  # ffmpeg 백엔드 vs OpenCV 비교 (번호 영상, 홀수 crop 좌표)
+hsv_check = {'frames': 24, 'random_pixels': 2_000_000, 'seed': 0}  # LUT 분류기 vs inRange 비교 (원본 해상도 프레임)
+gaze_check_fps = (30000 / 1001, 60000 / 1001)  # 정수가 아닌 fps(29.97/59.94)에서도 F열/trial 통계 확인
+gaze_session = {'rows': 1_000_000, 'samples_per_frame': 4, 'fps': 30.0,
+                'trials': ((70, 130), (140, 200), (210, 270), (300, 360), (380, 440), (450, 510))}
+
+VALO_FULL_SIZE = (1920, 1080)  # valo_analyzer ROI 좌표 기준 해상도 (합성 영상 크기에 맞게 비율 조정)
+VALO_FULL_ROI = (valo.ROI_X, valo.ROI_Y, valo.ROI_W, valo.ROI_H)  # stage_valo가 바꾸기 전 원래 ROI
+INDEX_BITS, INDEX_BAND = 16, 40  # 번호 영상: 위쪽 INDEX_BAND px에 프레임 번호를 16비트 흑/백 막대로 표시
+
+
+# ===== 합성 데이터 생성 =====
+
+def _write_clip(path, size, fps, n_frames, draw):
+    """draw(frame_idx) → BGR 프레임으로 mp4 작성"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    if not writer.isOpened():
+        raise IOError(f"영상 쓰기 실패: {path}")
+    try:
+        for frame_idx in range(n_frames):
+            writer.write(draw(frame_idx))
+    finally:
+        writer.release()
+
+
+def make_aimlab_clip(path, size, fps, duration, flashes, flash_seconds):
+    """AimLab형 영상: 무채색 배경 + 지정 시각마다 flash_seconds 동안 H/S 그라데이션 (H+S 표준편차 급증)"""
+    w, h = size
+    rng = np.random.default_rng(0)
+    base = np.clip(rng.normal(90, 6, (h, w, 3)), 0, 255).astype(np.uint8)
+    base[:] = base[:, :, :1]  # 채도 0 (H/S 표준편차 ≈ 0)
+    hsv = np.zeros((h, w, 3), np.uint8)
+    hsv[:, :, 0] = np.linspace(0, 179, w, dtype=np.uint8)[None, :]
+    hsv[:, :, 1] = np.linspace(0, 255, h, dtype=np.uint8)[:, None]
+    hsv[:, :, 2] = 220
+    flash = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+    flash_frames = set()
+    for t in flashes:
+        flash_frames.update(range(int(t * fps), int((t + flash_seconds) * fps)))
+    _write_clip(path, size, fps, int(duration * fps), lambda i: flash if i in flash_frames else base)
+
+
+def valo_roi(size):
+    """합성 영상 크기에 맞춘 valo ROI (x, y, w, h)"""
+    sx, sy = size[0] / VALO_FULL_SIZE[0], size[1] / VALO_FULL_SIZE[1]
+    x, y, w, h = VALO_FULL_ROI
+    return round(x * sx), round(y * sy), round(w * sx), round(h * sy)
+
+
+def make_valo_clip(path, size, fps, duration, events, event_seconds):
+    """Valorant형 영상: 지정 시각마다 event_seconds 동안 ROI 빨강 + ROI 주변 남색 테두리"""
+    w, h = size
+    x, y, rw, rh = valo_roi(size)
+    m = valo.BORDER_MARGIN
+    base = np.zeros((h, w, 3), np.uint8)
+    base[:] = (60, 110, 70)  # 빨강/남색 범위 밖 배경
+    event = base.copy()
+    navy = cv2.cvtColor(np.uint8([[[110, 200, 80]]]), cv2.COLOR_HSV2BGR)[0, 0]
+    event[max(0, y - m):y + rh + m, max(0, x - m):x + rw + m] = navy
+    event[y:y + rh, x:x + rw] = (0, 0, 255)
+    event_frames = set()
+    for t in events:
+        event_frames.update(range(int(t * fps), int((t + event_seconds) * fps)))
+    _write_clip(path, size, fps, int(duration * fps), lambda i: event if i in event_frames else base)
+
+
+def make_gaze_session(folder, rows, samples_per_frame, fps, trials, seed=0):
+    """Frame CSV (프레임ID, x, y, pupil; 결측 2%) + trial CSV → (frame 경로, trial DataFrame)"""
+    os.makedirs(folder, exist_ok=True)
+    frame_path = os.path.join(folder, 'bench_pre.csv')
+    trial_path = os.path.join(folder, 'bench_trials.csv')
+    if not os.path.exists(frame_path):
+        rng = np.random.default_rng(seed)
+        x = rng.normal(960, 200, rows).round(2)
+        y = rng.normal(540, 150, rows).round(2)
+        x[rng.random(rows) < 0.02] = np.nan
+        y[rng.random(rows) < 0.02] = np.nan
+        pd.DataFrame({'frame': (np.arange(rows) // samples_per_frame).astype(float), 'x': x, 'y': y,
+                      'pupil': rng.random(rows).round(3)}).to_csv(frame_path, index=False)
+    trial_df = pd.DataFrame({'trial': range(1, len(trials) + 1),
+                             'start': [s for s, _ in trials], 'end': [e for _, e in trials]})
+    trial_df.to_csv(trial_path, index=False)
+    return frame_path, trial_df
+
+
+def make_numbered_clip(path, size, fps, duration, **_):
+    """프레임 리더 검증용 영상: 위쪽 막대에 프레임 번호, 아래는 고정 8px 블록 무늬 (채널마다 다름)
+
+    번호로 프레임 선택/재시작 위치를, 블록 경계로 crop 위치(1px 어긋남)와 채널 순서를 확인.
+    """
+    w, h = size
+    rng = np.random.default_rng(0)
+    blocks = rng.integers(40, 216, (h // 8 + 1, w // 8 + 1), dtype=np.uint8)
+    texture = np.repeat(np.repeat(blocks, 8, axis=0), 8, axis=1)[:h, :w]
+    base = cv2.merge([texture, np.ascontiguousarray(texture[::-1]), np.ascontiguousarray(texture[:, ::-1])])
+    bit_w = w // INDEX_BITS
+
+    def draw(frame_idx):
+        frame = base.copy()
+        for bit in range(INDEX_BITS):
+            frame[:INDEX_BAND, bit * bit_w:(bit + 1) * bit_w] = 235 if frame_idx >> bit & 1 else 16
+        return frame
+
+    _write_clip(path, size, fps, int(duration * fps), draw)
+
+
+def frame_number(frame):
+    """번호 영상 프레임의 막대 → 프레임 번호"""
+    bit_w = frame.shape[1] // INDEX_BITS
+    band = frame[4:INDEX_BAND - 4, :, 1]
+    return sum(1 << bit for bit in range(INDEX_BITS)
+               if band[:, bit * bit_w + bit_w // 4:(bit + 1) * bit_w - bit_w // 4].mean() > 128)
+
+
+# ===== 정답 =====
+
+def expected_aimlab_events(flashes):
+    import aimlab_analyzer as aimlab
+    return [[k, int(t) - 60, int(t)] for k, t in enumerate(flashes, 1) if t >= aimlab.record_start_sec]
+
+
+def expected_frame_times(frame_ids, fps):
+    """기존 방식 그대로 행마다 round(int(float(x)) / fps, 3) (빈 값은 NaN)"""
+    return np.array([round(int(float(x)) / fps, 3) if pd.notna(x) else np.nan for x in frame_ids])
+
+
+def expected_gaze_stats(frame_path, trial_df, fps):
+    """trial별로 행을 직접 골라 pandas mean/std로 계산한 기준 통계 (파이프라인과 독립)"""
+    df = pd.read_csv(frame_path)
+    seconds = pd.Series(expected_frame_times(df.iloc[:, 0], fps))
+    rows = []
+    for trial, start, end in trial_df.itertuples(index=False):
+        hit_start = np.flatnonzero(np.trunc(seconds) == start)
+        hit_end = np.flatnonzero(np.trunc(seconds) == end)
+        if len(hit_start) == 0 or len(hit_end) == 0:
+            continue
+        part = df.iloc[hit_start[0]:hit_end[0] + 1]
+        rows.append({'trial': trial, 'x_cor_aver': round(part.iloc[:, 1].mean(), 1),
+                     'y_cor_aver': round(part.iloc[:, 2].mean(), 1), 'x_sd': round(part.iloc[:, 1].std(), 1),
+                     'y_sd': round(part.iloc[:, 2].std(), 1), 'row_count': len(part)})
+    return pd.DataFrame(rows)
+
+
+# ===== 측정 단계 (단계마다 새 프로세스: 최대 메모리 분리) =====
+
+# ===== LUT 도입 전 valo 분류기 (회귀 확인용, 범위 5개를 inRange 5번 + OR) =====
+
+def legacy_red_mask(hsv):
+    mask1 = cv2.inRange(hsv, np.array([0, 80, 80]), np.array([15, 255, 255]))
+    mask2 = cv2.inRange(hsv, np.array([160, 80, 80]), np.array([179, 255, 255]))
+    mask_bright = cv2.inRange(hsv, np.array([0, 60, 120]), np.array([15, 255, 255]))
+    return cv2.bitwise_or(cv2.bitwise_or(mask1, mask2), mask_bright)
+
+
+def legacy_blue_mask(hsv):
+    blue_mask1 = cv2.inRange(hsv, np.array([100, 100, 20]), np.array([120, 255, 120]))
+    blue_mask2 = cv2.inRange(hsv, np.array([105, 120, 10]), np.array([115, 255, 80]))
+    return cv2.bitwise_or(blue_mask1, blue_mask2)
+
+
+def legacy_roi_red_and_border_blue(frame, origin=(0, 0)):
+    """ROI/주변 박스를 따로 HSV 변환하던 기존 방식 → (red_ratio, blue_ratio, red_mask, blue_mask)"""
+    ox, oy = origin
+    roi = frame[valo.ROI_Y - oy:valo.ROI_Y - oy + valo.ROI_H, valo.ROI_X - ox:valo.ROI_X - ox + valo.ROI_W]
+    red_mask = legacy_red_mask(cv2.cvtColor(roi, cv2.COLOR_BGR2HSV))
+    red_ratio = cv2.countNonZero(red_mask) / (valo.ROI_W * valo.ROI_H)
+
+    border_left, border_top, border_right, border_bottom = valo.border_box(frame.shape[1] + ox, frame.shape[0] + oy)
+    border_roi = frame[border_top - oy:border_bottom - oy, border_left - ox:border_right - ox]
+    blue_mask = legacy_blue_mask(cv2.cvtColor(border_roi, cv2.COLOR_BGR2HSV))
+    blue_ratio = cv2.countNonZero(blue_mask) / (border_roi.shape[0] * border_roi.shape[1])
+    return red_ratio, blue_ratio, red_mask, blue_mask
+
+
+def hsv_edge_pixels():
+    """범위 경계(±1), 0/255, hue 끝(178~181, cvtColor가 안 내는 180↑ 포함) 값의 모든 H/S/V 조합"""
+    channel_values = []
+    for c in range(3):
+        values = {0, 1, 254, 255}
+        if c == 0:
+            values |= {178, 179, 180, 181}
+        for lower, upper in valo.RED_HSV_RANGES + valo.BLUE_HSV_RANGES:
+            values |= {lower[c] - 1, lower[c], lower[c] + 1, upper[c] - 1, upper[c], upper[c] + 1}
+        channel_values.append(sorted(v for v in values if 0 <= v <= 255))
+    grid = np.stack(np.meshgrid(*channel_values, indexing='ij'), axis=-1).reshape(1, -1, 3)
+    return grid.astype(np.uint8)
+
+
+def hsv_check_frames(n_frames, seed):
+    """원본 해상도 프레임: 무작위 노이즈 + 무작위 HSV 색 블록 (ROI/주변 박스 경계에 걸치도록)"""
+    rng = np.random.default_rng(seed)
+    w, h = VALO_FULL_SIZE
+    frames = []
+    for _ in range(n_frames):
+        frame = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+        for _ in range(20):
+            x = int(rng.integers(valo.ROI_X - 60, valo.ROI_X + valo.ROI_W + 20))
+            y = int(rng.integers(valo.ROI_Y - 60, valo.ROI_Y + valo.ROI_H + 20))
+            hsv = np.uint8([[rng.integers(0, 180), rng.integers(0, 256), rng.integers(0, 256)]])
+            frame[max(0, y):y + 40, max(0, x):x + 40] = cv2.cvtColor(hsv[None], cv2.COLOR_HSV2BGR)[0, 0]
+        frames.append(frame)
+    return frames
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024  # macOS는 bytes, Linux는 KB
+
+
+def stage_aimlab(clip_path, flashes):
+    import aimlab_analyzer as aimlab
+    total_frames = int(cv2.VideoCapture(clip_path).get(cv2.CAP_PROP_FRAME_COUNT))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        events = aimlab.process_video(clip_path)
+    elapsed = time.perf_counter() - start
+    expected = expected_aimlab_events(flashes)
+    return {'elapsed': elapsed, 'throughput': total_frames / elapsed, 'unit': 'frames/s',
+            'ok': events == expected, 'detail': f"검출 {events} / 정답 {expected}"}
+
+
+def stage_valo(clip_path, size, events):
+    valo.ROI_X, valo.ROI_Y, valo.ROI_W, valo.ROI_H = valo_roi(size)
+    valo.capture_format = 'csv'  # 이미지 대신 캡쳐 시각만 기록
+    folder, base_name = os.path.dirname(clip_path), Path(clip_path).stem
+    for old in Path(folder).glob(f"{base_name}_red_blue*.csv"):
+        old.unlink()
+
+    cap = cv2.VideoCapture(clip_path)
+    total_frames, fps = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        count, paths = valo.process_video(clip_path)
+    elapsed = time.perf_counter() - start
+
+    captured = pd.read_csv(paths[0])['시간(초)'].tolist() if paths else []
+    tolerance = valo.frame_skip / fps
+    ok = len(captured) == len(events) and all(abs(c - e) <= tolerance for c, e in zip(captured, events))
+    return {'elapsed': elapsed, 'throughput': total_frames / elapsed, 'unit': 'frames/s',
+            'ok': ok, 'detail': f"캡쳐 {[round(c, 2) for c in captured]}초 / 정답 {list(events)}초"}
+
+
+def stage_gaze(frame_path, trial_df, fps, use_cache):
+    import aimlab_gaze_wholefile as wholefile
+    wholefile.use_frame_cache = use_cache
+    rows = sum(1 for _ in open(frame_path, 'rb')) - 1
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = wholefile.process_frame_data(('csv', Path(frame_path)), None, trial_df, fps=fps)
+    elapsed = time.perf_counter() - start
+
+    paths = wholefile.output_paths(Path(frame_path))
+    expected = expected_gaze_stats(frame_path, trial_df, fps)
+    got = pd.read_csv(paths['stats'], encoding='utf-8-sig')[list(expected.columns)] if ok else None
+    match = got is not None and got.reset_index(drop=True).equals(expected)
+    # F열: 기존 행별 Python round와 값이 같은지 (np.round는 29.97fps 등에서 0.001 어긋남)
+    times_match = False
+    if ok:
+        got_times = pd.read_csv(paths['final'], encoding='utf-8-sig', usecols=['F'])['F'].to_numpy()
+        times_match = np.array_equal(got_times, expected_frame_times(pd.read_csv(frame_path).iloc[:, 0], fps),
+                                     equal_nan=True)
+    return {'elapsed': elapsed, 'throughput': rows / elapsed, 'unit': 'rows/s', 'ok': bool(match and times_match),
+            'detail': f"trial 통계 {len(expected)}개 " + ("일치" if match else "불일치") +
+                      f", F열({fps:.2f}fps) " + ("일치" if times_match else "불일치")}
+
+
+def stage_hsv_lut(frames, random_pixels, seed):
+    """LUT 분류기(valo.rule_bits + 빨강/파랑 LUT)가 기존 inRange 5번 + OR과 픽셀 단위로 같은지 확인
+
+    HSV 직접 입력(경계 조합 + 무작위)과 원본 해상도 프레임(전체 프레임 / ffmpeg crop처럼 잘라낸 프레임)을 비교.
+    처리량은 프레임 판정(is_roi_red_and_border_blue) 기준.
+    """
+    valo.ROI_X, valo.ROI_Y, valo.ROI_W, valo.ROI_H = VALO_FULL_ROI
+    rng = np.random.default_rng(seed)
+    pixel_sets = {'경계': hsv_edge_pixels(), '무작위': rng.integers(0, 256, (1, random_pixels, 3), dtype=np.uint8)}
+    mismatches = []
+    for label, hsv in pixel_sets.items():
+        bits = valo.rule_bits(hsv)
+        for color, lut, legacy in (('빨강', valo.RED_BITS_LUT, legacy_red_mask),
+                                   ('파랑', valo.BLUE_BITS_LUT, legacy_blue_mask)):
+            diff = int(np.count_nonzero(cv2.LUT(bits, lut) != legacy(hsv)))
+            if diff:
+                mismatches.append(f"{label} HSV {color} {diff}px")
+
+    test_frames = hsv_check_frames(frames, seed)
+    left, top, right, bottom = valo.border_box(*VALO_FULL_SIZE)
+    cases = [(frame, (0, 0)) for frame in test_frames] + \
+            [(np.ascontiguousarray(frame[top:bottom, left:right]), (left, top)) for frame in test_frames]
+    for i, (frame, origin) in enumerate(cases):
+        new = valo.is_roi_red_and_border_blue(frame, origin, return_masks=True)
+        old = legacy_roi_red_and_border_blue(frame, origin)
+        if new[:2] != old[:2] or not (np.array_equal(new[2], old[2]) and np.array_equal(new[3], old[3])):
+            mismatches.append(f"프레임 {i} (origin {origin})")
+
+    start = time.perf_counter()
+    for frame, origin in cases:
+        valo.is_roi_red_and_border_blue(frame, origin)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for frame, origin in cases:
+        legacy_roi_red_and_border_blue(frame, origin)
+    legacy_elapsed = time.perf_counter() - start
+
+    n_pixels = sum(hsv.shape[1] for hsv in pixel_sets.values())
+    detail = (f"HSV {n_pixels:,}px + 프레임 {len(cases)}개 일치 (inRange 대비 {legacy_elapsed / elapsed:.1f}배)"
+              if not mismatches else "불일치: " + ", ".join(mismatches[:5]))
+    return {'elapsed': elapsed, 'throughput': len(cases) / elapsed, 'unit': 'frames/s',
+            'ok': not mismatches, 'detail': detail}
+
+
+def ffmpeg_available():
+    return shutil.which(frame_reader.ffmpeg_binary) is not None
+
+
+def reader_requests(step, seek_gap, total_frames):
+    """FFmpegFrameReader 검증용 요청 프레임 순서 (단조 증가)
+
+    연속 step 선택 → seek 간격 3배 건너뛰기(-ss 재시작) → step 배수가 아닌 간격(재시작)
+    → 정확히 seek 간격 → 마지막 프레임 → 끝 다음(EOF, None이어야 함)
+    """
+    requests = list(range(0, 10 * step, step))
+    requests += [requests[-1] + 3 * seek_gap + k * step for k in range(5)]
+    requests += [requests[-1] + step + 1 + k * step for k in range(3)]
+    requests.append(requests[-1] + seek_gap)
+    requests += [total_frames - 1 - step, total_frames - 1, total_frames - 1 + step]
+    return requests
+
+
+def _best_shift(frame, reference, x, y, w, h, radius=2):
+    """crop 결과와 가장 비슷한 원본 위치의 어긋남 (dx, dy)과 그때 평균 절대 차이"""
+    diffs = {(dx, dy): cv2.absdiff(frame, reference[y + dy:y + dy + h, x + dx:x + dx + w]).mean()
+             for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)}
+    shift = min(diffs, key=diffs.get)
+    return shift, diffs[shift]
+
+
+def stage_ffmpeg_reader(clip_path, step, crop, tolerance=4.0):
+    """FFmpegFrameReader가 VideoFrameReader(OpenCV)와 같은 프레임을 주는지 확인
+
+    - step 선택(select=not(mod(n,step)))과 -ss 재시작 후 번호: 프레임 막대의 번호 == 요청 번호
+    - 화소: 디코더 색변환 차이만 허용 (평균 절대 차이 tolerance 이하)
+    - bgr24 crop: 원본 프레임을 ±2px 옮겨 비교했을 때 (0, 0)이 가장 가까워야 함
+    처리량은 전체 프레임 ffmpeg 리더 기준.
+    """
+    reference = VideoFrameReader(clip_path, sparse=False)
+    seek_gap = max(1, int(frame_reader.seek_min_gap_sec * reference.fps))
+    requests = reader_requests(step, seek_gap, reference.total_frames)
+    expected = [reference.read(idx) for idx in requests]
+    expected = [None if frame is None else frame.copy() for frame in expected]
+    reference.release()
+
+    problems = []
+    full = FFmpegFrameReader(clip_path, step=step)
+    start = time.perf_counter()
+    frames = [full.read(idx) for idx in requests]
+    frames = [None if frame is None else frame.copy() for frame in frames]
+    elapsed = time.perf_counter() - start
+    restarts = full.restart_count
+    full.release()
+
+    x, y, w, h = crop
+    cropped_reader = FFmpegFrameReader(clip_path, step=step, crop=crop)
+    for idx, ref, frame in zip(requests, expected, frames):
+        cropped = cropped_reader.read(idx)
+        if ref is None or frame is None or cropped is None:
+            if not (ref is None and frame is None and cropped is None):
+                problems.append(f"{idx}: EOF 불일치")
+            continue
+        if frame_number(ref) != idx or frame_number(frame) != idx:
+            problems.append(f"{idx}: 번호 OpenCV {frame_number(ref)} / ffmpeg {frame_number(frame)}")
+        elif cv2.absdiff(frame, ref).mean() > tolerance:
+            problems.append(f"{idx}: 화소 차이 {cv2.absdiff(frame, ref).mean():.1f}")
+        if cropped.shape != (h, w, 3):
+            problems.append(f"{idx}: crop 크기 {cropped.shape}")
+        else:
+            shift, diff = _best_shift(cropped, ref, x, y, w, h)
+            if shift != (0, 0) or diff > tolerance:
+                problems.append(f"{idx}: crop 어긋남 {shift} (차이 {diff:.1f})")
+    cropped_reader.release()
+
+    n_frames = sum(frame is not None for frame in frames)
+    detail = (f"프레임 {n_frames}개 + EOF 일치 (재시작 {restarts}회, crop {crop})" if not problems
+              else "불일치: " + ", ".join(problems[:5]))
+    return {'elapsed': elapsed, 'throughput': n_frames / elapsed, 'unit': 'frames/s',
+            'ok': not problems, 'detail': detail}
+
+
+def screening_pattern_frame(stride):
+    """스크리닝 회귀용 원본 해상도 프레임: ROI 빨강 + 주변 남색, stride 샘플 격자 위치만 남색
+
+    정밀 계산은 빨강 15/16, 파랑 15% 정도로 캡쳐 조건을 넘지만 stride 샘플 추정은 빨강 0.
+    """
+    w, h = VALO_FULL_SIZE
+    left, top, right, bottom = valo.border_box(w, h)
+    frame = np.zeros((h, w, 3), np.uint8)
+    frame[top:bottom, left:right] = (100, 20, 0)  # 남색 (HSV 약 115, 255, 100)
+    frame[valo.ROI_Y:valo.ROI_Y + valo.ROI_H, valo.ROI_X:valo.ROI_X + valo.ROI_W] = (0, 0, 255)
+    frame[top:bottom:stride, left:right:stride] = (100, 20, 0)
+    return frame
+
+
+def stage_screening_pattern(stride, n_runs=50):
+    """샘플 격자에 맞춘 무늬 프레임: 기본 설정 classify_frame이 정밀 경로와 같은 값/캡쳐 판정인지 확인
+
+    (스크리닝을 켜면 이 프레임은 1차에서 탈락 → 기본값은 꺼짐이어야 함)
+    """
+    valo.ROI_X, valo.ROI_Y, valo.ROI_W, valo.ROI_H = VALO_FULL_ROI
+    frame = screening_pattern_frame(stride)
+    exact = valo.is_roi_red_and_border_blue(frame)
+    captured = exact[0] > valo.red_ratio_threshold and exact[1] > valo.blue_ratio_threshold
+
+    start = time.perf_counter()
+    for _ in range(n_runs):
+        red_ratio, blue_ratio, _ = valo.classify_frame(frame)
+    elapsed = time.perf_counter() - start
+    estimate = valo.estimate_roi_red_and_border_blue(frame, stride=stride)
+
+    ok = captured and (red_ratio, blue_ratio) == exact
+    return {'elapsed': elapsed, 'throughput': n_runs / elapsed, 'unit': 'frames/s', 'ok': ok,
+            'detail': f"정밀 red={exact[0]:.3f} blue={exact[1]:.3f}, 기본 설정 red={red_ratio:.3f} "
+                      f"blue={blue_ratio:.3f} (stride {stride} 추정 red={estimate[0]:.3f} blue={estimate[1]:.3f})"}
+
+
+def _run_stage(func, args, n_runs):
+    runs = [func(*args) for _ in range(n_runs)]
+    result = min(runs, key=lambda r: r['elapsed'])
+    result['ok'] = all(r['ok'] for r in runs)
+    result['peak_mb'] = _peak_rss_mb()
+    return result
+
+
+def run_stage(name, func, *args):
+    """단계 하나를 새 프로세스(spawn)에서 repeats번 실행 → 가장 빠른 결과 dict (처리량, 최대 메모리, 정답 일치)"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        try:
+            result = pool.submit(_run_stage, func, args, repeats).result()
+        except Exception as e:
+            result = {'elapsed': None, 'throughput': None, 'unit': '', 'ok': False, 'detail': f"에러: {e}",
+                      'peak_mb': None}
+    result['name'] = name
+    return result
+
+
+# ===== 실행 =====
+
+def prepare_inputs(folder):
+    """합성 입력 생성 (같은 설정으로 이미 만든 파일은 재사용)"""
+    inputs = {}
+    a = aimlab_clip
+    inputs['aimlab'] = os.path.join(folder, f"aimlab_{a['size'][0]}x{a['size'][1]}_{a['duration']}s.mp4")
+    if not os.path.exists(inputs['aimlab']):
+        print("🎬 AimLab 합성 영상 생성...")
+        make_aimlab_clip(inputs['aimlab'], **a)
+
+    v = valo_clip
+    inputs['valo'] = os.path.join(folder, f"valo_{v['size'][0]}x{v['size'][1]}_{v['duration']}s.mp4")
+    if not os.path.exists(inputs['valo']):
+        print("🎬 Valorant 합성 영상 생성...")
+        make_valo_clip(inputs['valo'], **v)
+
+    r = reader_clip
+    inputs['reader'] = os.path.join(folder, f"numbered_{r['size'][0]}x{r['size'][1]}_{r['fps']:.2f}fps.mp4")
+    if not os.path.exists(inputs['reader']):
+        print("🎬 프레임 번호 영상 생성...")
+        make_numbered_clip(inputs['reader'], **r)
+
+    print("📊 합성 gaze 세션 준비...")
+    inputs['gaze'] = make_gaze_session(os.path.join(folder, f"gaze_{gaze_session['rows']}"), **gaze_session)
+    return inputs
+
+
+def compare_baseline(results, baseline_path):
+    """이전 리포트 대비 처리량 감소 단계 목록"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    regressions = []
+    for r in results:
+        old = baseline.get(r['name'])
+        if old and old.get('throughput') and r.get('throughput'):
+            ratio = r['throughput'] / old['throughput']
+            r['vs_baseline'] = ratio
+            if ratio < 1 - regression_tolerance:
+                regressions.append(r['name'])
+    return regressions
+
+
+def run_suite(folder=bench_folder):
+    """전체 벤치마크 + 정답 확인 → (결과 목록, 통과 여부)"""
+    folder = folder or tempfile.mkdtemp(prefix='aimlab_bench_')
+    os.makedirs(folder, exist_ok=True)
+    inputs = prepare_inputs(folder)
+    frame_path, trial_df = inputs['gaze']
+    fps = gaze_session['fps']
+
+    # (이름, 함수, 인자, 측정 전 한 번 실행 여부: 캐시 생성은 측정 제외)
+    stages = [
+        ('aimlab.process_video', stage_aimlab, (inputs['aimlab'], aimlab_clip['flashes']), False),
+        ('valo.process_video', stage_valo, (inputs['valo'], valo_clip['size'], valo_clip['events']), False),
+        ('valo.screening (격자 무늬)', stage_screening_pattern, (valo.coarse_stride,), False),
+        ('frame_reader.ffmpeg (vs OpenCV)', stage_ffmpeg_reader, (inputs['reader'], reader_clip['step'],
+                                                                  reader_clip['crop']), False),
+        ('valo.hsv_lut (vs inRange)', stage_hsv_lut, (hsv_check['frames'], hsv_check['random_pixels'],
+                                                      hsv_check['seed']), False),
+        ('gaze.process_frame_data (파싱)', stage_gaze, (frame_path, trial_df, fps, False), False),
+        ('gaze.process_frame_data (캐시)', stage_gaze, (frame_path, trial_df, fps, True), True),
+    ] + [(f'gaze.process_frame_data ({check_fps:.2f}fps)', stage_gaze, (frame_path, trial_df, check_fps, False), False)
+         for check_fps in gaze_check_fps]
+    results = []
+    for name, func, args, warmup in stages:
+        if func is stage_ffmpeg_reader and not ffmpeg_available():
+            results.append({'name': name, 'elapsed': None, 'throughput': None, 'unit': '', 'ok': True,
+                            'skipped': True, 'detail': f"{frame_reader.ffmpeg_binary} 없음 → 건너뜀", 'peak_mb': None})
+            continue
+        if warmup:
+            run_stage(name, func, *args)
+        print(f"⏱️ {name} ...")
+        results.append(run_stage(name, func, *args))
+
+    regressions = compare_baseline(results, baseline_report) if baseline_report else []
+
+    print(f"\n{'=' * 96}")
+    print(f"{'단계':<34} {'시간':>8} {'처리량':>18} {'최대메모리':>10}  결과")
+    print("-" * 96)
+    for r in results:
+        elapsed = f"{r['elapsed']:.2f}s" if r['elapsed'] is not None else '-'
+        throughput = f"{r['throughput']:,.0f} {r['unit']}" if r['throughput'] else '-'
+        peak = f"{r['peak_mb']:.0f}MB" if r['peak_mb'] else '-'
+        mark = '⏭️' if r.get('skipped') else '✅' if r['ok'] else '❌'
+        if 'vs_baseline' in r:
+            mark += f" (기준 대비 {r['vs_baseline']:.0%})"
+        print(f"{r['name']:<34} {elapsed:>8} {throughput:>18} {peak:>10}  {mark} {r['detail']}")
+    print("=" * 96)
+
+    passed = all(r['ok'] for r in results) and not regressions
+    if regressions:
+        print(f"⚠️ 처리량 감소 ({regression_tolerance:.0%} 초과): {', '.join(regressions)}")
+
+    report_path = os.path.join(folder, report_filename)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'passed': passed,
+                   'settings': {'aimlab_clip': aimlab_clip, 'valo_clip': valo_clip, 'hsv_check': hsv_check,
+                                'gaze_session': gaze_session, 'gaze_check_fps': gaze_check_fps},
+                   'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"{'🎉 통과' if passed else '❌ 실패'} | 리포트: {report_path}")
+    return results, passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_suite()[1] else 1)
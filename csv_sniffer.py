@@ -0,0 +1,155 @@
+import codecs
+import csv
+import json
+import os
+
+import pandas as pd
+
+from frame_cache import cache_dir_name
+
+# 설정값
+sniff_sample_bytes = 64 * 1024  # 인코딩/구분자/헤더 판별에 읽는 앞부분 크기
+sniff_encodings = ['utf-8', 'cp949', 'shift-jis', 'latin1']  # BOM 없을 때 시도 순서 (latin1은 항상 성공)
+sniff_delimiters = ',\t; '
+sniff_cache_filename = 'sniff.json'  # .frame_cache/ 안에 파일별 판별 결과 저장
+sniff_version = 2  # 판별 규칙이 바뀌면 올림 (이전 sniff.json 결과는 다시 판별)
+
+_memo = {}  # 같은 프로세스 안에서 반복 조회 방지: {경로: (시그니처, 결과)}
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _cache_file(path):
+    return os.path.join(os.path.dirname(path), cache_dir_name, sniff_cache_filename)
+
+
+def _load_cache(path):
+    try:
+        with open(_cache_file(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, name, entry):
+    """폴더별 sniff.json 갱신 (쓰기 실패는 무시: 다음 실행에서 다시 판별)"""
+    cache_file = _cache_file(path)
+    try:
+        cache = _load_cache(path)
+        cache[name] = entry
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _decode_sample(raw):
+    """앞부분 바이트 → (인코딩, 텍스트). 샘플 끝에서 잘린 멀티바이트 문자는 무시"""
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig', raw[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
+    for encoding in sniff_encodings:
+        try:
+            return encoding, codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+        except UnicodeDecodeError:
+            continue
+    return 'latin1', raw.decode('latin1')
+
+
+def _is_number(cell):
+    try:
+        float(cell)
+        return True
+    except ValueError:
+        return False
+
+
+def _detect_header(sample, sep):
+    """헤더 유무: 첫 비어있지 않은 행이 모두 숫자일 때만 확실히 없음(None), 그 외는 pandas 기본값 0
+
+    csv.Sniffer.has_header는 열 타입/길이 투표라 빈 행이 섞인 내보내기 파일 등에서 틀리므로 쓰지 않음.
+    """
+    if sep == ' ':
+        rows = [line.split() for line in sample.splitlines()]
+    else:
+        rows = list(csv.reader(sample.splitlines(), delimiter=sep))
+    rows = [[cell.strip() for cell in row] for row in rows]
+    rows = [row for row in rows if any(row)]
+    if rows and all(_is_number(cell) for cell in rows[0] if cell):
+        return None
+    return 0
+
+
+def _detect(path):
+    with open(path, 'rb') as f:
+        raw = f.read(sniff_sample_bytes)
+    encoding, text = _decode_sample(raw)
+
+    # 마지막 줄은 샘플 경계에서 잘렸을 수 있으므로 제외
+    lines = text.splitlines()
+    if len(raw) == sniff_sample_bytes and len(lines) > 1:
+        lines = lines[:-1]
+    sample = "\n".join(lines[:200])
+
+    sniffer = csv.Sniffer()
+    try:
+        sep = sniffer.sniff(sample, delimiters=sniff_delimiters).delimiter
+    except csv.Error:
+        sep = ','
+    return {'encoding': encoding, 'sep': sep, 'header': _detect_header(sample, sep)}
+
+
+def sniff_csv(path):
+    """CSV 인코딩/구분자/헤더 유무를 앞부분 샘플 한 번으로 판별
+
+    결과는 (크기, mtime)과 함께 메모리와 .frame_cache/sniff.json에 기억해
+    원본이 바뀌지 않았으면 다음 실행에서도 다시 판별하지 않음.
+    반환: {'encoding': ..., 'sep': ..., 'header': 0 또는 None}
+    """
+    path = os.fspath(path)
+    signature = _signature(path)
+    memo = _memo.get(path)
+    if memo is not None and memo[0] == signature:
+        return memo[1]
+
+    name = os.path.basename(path)
+    entry = _load_cache(path).get(name)
+    if entry is None or entry.get('signature') != signature or entry.get('version') != sniff_version:
+        entry = {'signature': signature, 'version': sniff_version, 'dialect': _detect(path)}
+        _save_cache(path, name, entry)
+    _memo[path] = (signature, entry['dialect'])
+    return entry['dialect']
+
+
+def forget(path):
+    """판별 결과가 틀렸을 때 (파싱 실패) 기억한 결과 삭제"""
+    path = os.fspath(path)
+    _memo.pop(path, None)
+    cache = _load_cache(path)
+    if cache.pop(os.path.basename(path), None) is not None:
+        try:
+            with open(_cache_file(path), 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+
+def read_csv_sniffed(path, **kwargs):
+    """sniff_csv 결과로 C 엔진 pd.read_csv 한 번. kwargs로 판별값 덮어쓰기 가능 (header=None 등)
+
+    헤더 판별은 trial 파일용. Frame 파일은 항상 첫 행이 헤더이므로 header=0을 넘김.
+    """
+    dialect = sniff_csv(path)
+    options = {**dialect, **kwargs}
+    if options['sep'] == ' ':
+        options['sep'] = r'\s+'  # 공백 구분은 연속 공백을 하나로 (C 엔진 지원)
+    try:
+        return pd.read_csv(path, engine='c', **options)
+    except (UnicodeDecodeError, pd.errors.ParserError):
+        forget(path)
+        raise
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from openpyxl import load_workbook
+except:
+    load_workbook = None
+
+# 설정값
+excel_initial_rows = 65536  # 시트 크기 정보가 없을 때 처음 잡는 열 배열 길이 (부족하면 2배씩 확장)
+
+INT64_MIN, INT64_MAX = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+
+
+def _cell_values(numbers, bits, is_int):
+    """숫자 칸 배열 (float 값, 같은 칸의 int64 보기) → 원래 셀 값 리스트 (int는 int, float는 float, 빈 칸은 None)"""
+    ints = bits.tolist()
+    return [ints[i] if is_int[i] else (v if v == v else None) for i, v in enumerate(numbers.tolist())]
+
+
+def read_excel_columns(file_path, header=True, skip_rows=0):
+    """xlsx 활성 시트를 read-only 모드로 한 행씩 읽어 열별 타입 배열에 바로 채움
+
+    셀 전체를 리스트로 모은 뒤 DataFrame을 만드는 방식보다 메모리/시간이 적게 듦.
+    숫자 열은 float64 배열 (빈 칸 없는 정수 열은 int64), 문자 등이 섞인 열만 object로 전환.
+    header=True면 (skip_rows 다음) 첫 행을 열 이름으로, False면 0, 1, 2 ... 열 이름.
+    """
+    if load_workbook is None:
+        raise ImportError("openpyxl 필요")
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(min_row=1 + skip_rows, values_only=True)
+        names = None
+        if header:
+            names = next(rows, None)
+            if names is None:
+                return pd.DataFrame()
+            names = list(names)
+
+        n_cols = len(names) if names is not None else max(ws.max_column or 0, 1)
+        capacity = max((ws.max_row or 0) - skip_rows, excel_initial_rows)
+        # 숫자 칸: float는 값 그대로, int는 같은 8바이트에 int64 비트로 저장 (is_int로 구분, 정밀도 손실 없음)
+        numbers = np.full((capacity, n_cols), np.nan)
+        bits = numbers.view(np.int64)  # 같은 메모리의 int64 보기 (배열 확장 시 다시 만듦)
+        is_int = np.zeros((capacity, n_cols), dtype=bool)
+        all_int = np.ones(n_cols, dtype=bool)  # 값이 모두 int이고 빈 칸이 없는 열
+        objects = {}  # 숫자가 아닌 값이 나온 열: 열 번호 → object 배열
+
+        n_rows = 0
+        for row in rows:
+            if n_rows == capacity:
+                capacity *= 2
+                numbers = np.vstack([numbers, np.full((capacity - n_rows, n_cols), np.nan)])
+                is_int = np.vstack([is_int, np.zeros((capacity - n_rows, n_cols), dtype=bool)])
+                bits = numbers.view(np.int64)
+                for j in objects:
+                    objects[j] = np.concatenate([objects[j], np.full(capacity - n_rows, None, dtype=object)])
+            if len(row) > n_cols:
+                if names is not None:
+                    raise ValueError(f"열 개수 초과: {len(row)}개 (헤더 {n_cols}개)")
+                grow = len(row) - n_cols
+                numbers = np.hstack([numbers, np.full((capacity, grow), np.nan)])
+                is_int = np.hstack([is_int, np.zeros((capacity, grow), dtype=bool)])
+                bits = numbers.view(np.int64)
+                all_int = np.concatenate([all_int, np.ones(grow, dtype=bool)])
+                all_int[n_cols:] = n_rows == 0
+                n_cols = len(row)
+            if len(row) < n_cols:
+                all_int[len(row):] = False
+
+            for j, value in enumerate(row):
+                if j in objects:
+                    objects[j][n_rows] = value
+                elif value is None:
+                    all_int[j] = False
+                elif type(value) is int and INT64_MIN <= value <= INT64_MAX:
+                    bits[n_rows, j] = value
+                    is_int[n_rows, j] = True
+                elif type(value) is float:
+                    numbers[n_rows, j] = value
+                    all_int[j] = False
+                else:
+                    # 숫자 외 값 (문자/날짜/bool/int64 범위 밖 정수): 지금까지 값을 원래 타입 그대로 옮겨 object 열로 전환
+                    column = np.full(capacity, None, dtype=object)
+                    column[:n_rows] = _cell_values(numbers[:n_rows, j], bits[:n_rows, j], is_int[:n_rows, j])
+                    column[n_rows] = value
+                    objects[j] = column
+            n_rows += 1
+    finally:
+        wb.close()
+
+    columns = {}
+    for j in range(n_cols):
+        if j in objects:
+            columns[j] = pd.Series(objects[j][:n_rows].tolist())  # DataFrame(list)와 같은 타입 추론
+        elif all_int[j] and n_rows > 0:
+            columns[j] = bits[:n_rows, j].copy()
+        else:
+            values = numbers[:n_rows, j].copy()
+            ints = is_int[:n_rows, j]
+            values[ints] = bits[:n_rows, j][ints]  # int+float 혼합 열은 float64 (DataFrame(list)와 같음)
+            columns[j] = values
+    df = pd.DataFrame(columns)
+    if names is not None:
+        df.columns = names + [None] * (n_cols - len(names))
+    return df
@@ -0,0 +1,45 @@
+import fnmatch
+import os
+from pathlib import Path
+
+
+def scan_tree(root, skip_dir_names=(), include_root=True):
+    """root 아래 폴더를 os.scandir로 한 번씩만 열어 {폴더 Path: [파일 DirEntry, ...]} 반환
+
+    DirEntry는 stat() 결과를 자체 캐시하므로 같은 파일 크기를 여러 번 물어도 시스템 호출은 한 번.
+    (외장 볼륨처럼 메타데이터 호출이 느린 경로에서 디렉터리 재나열/반복 stat 제거)
+    skip_dir_names에 있는 이름의 폴더는 내려가지 않음 (캐시 폴더 등).
+    """
+    index = {}
+    stack = [os.fspath(root)]
+    while stack:
+        folder = stack.pop()
+        files, subfolders = [], []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dir_names:
+                            subfolders.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry)
+        except OSError as e:
+            print(f"⚠️ 폴더 읽기 실패: {folder} ({e})")
+            continue
+        index[Path(folder)] = files
+        stack.extend(sorted(subfolders, reverse=True))  # 이름순으로 방문
+
+    if not include_root:
+        index.pop(Path(os.fspath(root)), None)
+    return index
+
+
+def file_size(entry):
+    """DirEntry 크기 (첫 호출 때만 stat)"""
+    return entry.stat().st_size
+
+
+def video_entries(files, pattern):
+    """glob(pattern)과 같은 규칙(대소문자 구분, 숨김 파일 제외)으로 고른 (경로, stat) 목록"""
+    return [(entry.path, entry.stat()) for entry in files
+            if not entry.name.startswith('.') and fnmatch.fnmatchcase(entry.name, pattern)]
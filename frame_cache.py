@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# 설정값
+cache_dir_name = '.frame_cache'  # 원본 파일 옆에 만드는 캐시 폴더 이름
+CACHE_VERSION = 4  # 2: Frame CSV를 항상 header=0으로 파싱, 3: object 열을 타입 태그 + 타입별 열로 저장, 4: 파싱 방식 key
+
+_OBJECT_TYPES = (type(None), bool, int, float, str)  # object 열 값의 타입 태그 = 이 튜플의 인덱스
+
+
+def cache_path(source_path, key='frame'):
+    """원본 파일 + 파싱 방식(key)별 캐시 폴더: <원본 폴더>/.frame_cache/<원본 파일명>@<key>/"""
+    source_path = os.fspath(source_path)
+    return os.path.join(os.path.dirname(source_path), cache_dir_name, f"{os.path.basename(source_path)}@{key}")
+
+
+def _signature(source_path, key):
+    stat = os.stat(source_path)
+    return {'version': CACHE_VERSION, 'name': os.path.basename(source_path), 'key': key,
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _object_parts(values):
+    """object 열 → (타입 태그, 정수/bool 열, 실수 열, 문자열 열). 복원할 수 없는 값이 있으면 None
+
+    값의 정확한 타입이 _OBJECT_TYPES 중 하나여야 함 (int64 범위 밖 정수, 날짜 등은 캐시하지 않음).
+    """
+    tag_of = {t: i for i, t in enumerate(_OBJECT_TYPES)}
+    try:
+        tags = np.fromiter((tag_of[type(v)] for v in values), dtype=np.int8, count=len(values))
+        ints = np.zeros(len(values), dtype=np.int64)
+        is_int = (tags == 1) | (tags == 2)
+        ints[is_int] = values[is_int].tolist()
+    except (KeyError, OverflowError):
+        return None
+    floats = np.zeros(len(values))
+    floats[tags == 3] = values[tags == 3].tolist()
+    texts = np.where(tags == 4, values, '').astype(str)
+    return {'tag': tags, 'int': ints, 'float': floats, 'text': texts}
+
+
+def _load_object(folder, i, rows):
+    """타입 태그 + 타입별 열에서 object 열 복원 (None/bool/int/float/str 그대로)"""
+    parts = {part: np.load(os.path.join(folder, f'col_{i}_{part}.npy'))
+             for part in ('tag', 'int', 'float', 'text')}
+    tags = parts['tag']
+    values = np.full(rows, None, dtype=object)
+    for tag, converted in ((1, lambda: parts['int'].astype(bool)), (2, lambda: parts['int']),
+                           (3, lambda: parts['float']), (4, lambda: parts['text'])):
+        mask = tags == tag
+        if mask.any():
+            values[mask] = converted()[mask].tolist()
+    return values
+
+
+def _load(folder, meta):
+    """열별 .npy를 memory-map으로 열어 DataFrame 구성 (문자열/object 열은 원래 타입으로 복원)
+
+    copy-on-write 매핑이라 값을 수정해도 캐시 파일은 바뀌지 않음.
+    """
+    columns = {}
+    for i, col in enumerate(meta['columns']):
+        if col['kind'] == 'object':
+            columns[i] = pd.Series(_load_object(folder, i, meta['rows']), dtype=object, copy=False)  # str 추론 방지
+            continue
+        values = np.load(os.path.join(folder, f'col_{i}.npy'), mmap_mode='c')
+        if col['kind'] == 'text':
+            values = values.astype(object)
+            mask = np.load(os.path.join(folder, f'col_{i}_na.npy'))
+            values[mask] = np.nan
+            values = pd.array(values, dtype=col['dtype'])
+        columns[i] = values
+    df = pd.DataFrame(columns, copy=False)
+    df.columns = [col['name'] for col in meta['columns']]
+    return df
+
+
+def _store(folder, df, signature):
+    """열마다 타입 있는 .npy로 저장. 임시 폴더에 다 쓴 뒤 교체 (중간에 끊겨도 깨진 캐시 없음)
+
+    숫자 열은 그대로, 문자열 dtype 열은 문자열 + 결측 마스크, object 열은 _object_parts로 나눠 저장.
+    그 밖의 열(날짜, 범주 등)이나 복원할 수 없는 값이 있으면 ValueError (아무것도 쓰지 않음).
+    """
+    arrays, columns = {}, []
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        entry = {'name': name if isinstance(name, (str, int, float)) or name is None else str(name)}
+        if series.dtype.kind in 'biuf':
+            arrays[f'col_{i}'] = series.to_numpy()
+            entry['kind'] = 'numeric'
+        elif isinstance(series.dtype, pd.StringDtype):
+            mask = series.isna().to_numpy()
+            arrays[f'col_{i}'] = series.astype(object).where(~mask, '').to_numpy(dtype=str)
+            arrays[f'col_{i}_na'] = mask
+            entry.update(kind='text', dtype=str(series.dtype))
+        else:
+            parts = _object_parts(series.to_numpy()) if series.dtype == object else None
+            if parts is None:
+                raise ValueError(f"캐시할 수 없는 열 '{name}' ({series.dtype})")
+            arrays.update({f'col_{i}_{part}': values for part, values in parts.items()})
+            entry['kind'] = 'object'
+        columns.append(entry)
+
+    tmp_folder = folder + '.tmp'
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    os.makedirs(tmp_folder)
+    for file_name, values in arrays.items():
+        np.save(os.path.join(tmp_folder, f'{file_name}.npy'), values)
+
+    with open(os.path.join(tmp_folder, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({**signature, 'rows': len(df), 'columns': columns}, f, ensure_ascii=False)
+
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp_folder, folder)
+
+
+def load_frame_table(source_path, parse, key='frame'):
+    """Frame 파일을 캐시에서 읽기. 캐시가 없거나 원본(크기/mtime)이 바뀌었으면 parse(source_path) 후 저장
+
+    key: 파싱 방식 이름. 같은 파일을 다른 방식(헤더 유무, 건너뛸 행 등)으로 읽으면 key를 달리해 따로 캐시.
+
+    parse가 None을 돌려주면 캐시하지 않고 None 반환.
+    캐시 폴더를 쓸 수 없거나(읽기 전용 볼륨 등) 타입을 보존할 수 없는 열이 있으면 경고만 출력하고 파싱 결과 사용.
+    """
+    folder = cache_path(source_path, key)
+    signature = _signature(source_path, key)
+
+    meta_path = os.path.join(folder, 'meta.json')
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if all(meta.get(k) == v for k, v in signature.items()):
+                return _load(folder, meta)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 캐시 읽기 실패 → 다시 파싱: {e}")
+
+    df = parse(source_path)
+    if df is None:
+        return None
+    try:
+        _store(folder, df, signature)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 캐시 저장 실패 (파싱 결과 그대로 사용): {e}")
+    return df
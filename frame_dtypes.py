@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+# 설정값
+float32_max_decimals = 6  # float32로 줄일 때 허용하는 소수 자릿수 상한
+float32_max_scaled = 2 ** 22  # |값| × 10^자릿수 상한: 소수 간격이 float32 간격의 2배 이상이어야 값이 그대로 복원됨
+float32_min_abs = 1e-3  # 0이 아닌 |값|이 이보다 작으면 float32 출력이 지수 표기로 바뀌므로 유지
+
+
+def float32_decimals(values):
+    """float32로 바꿔도 원래 소수 값이 그대로 돌아오는 최소 소수 자릿수, 불가하면 None
+
+    float64 값: 소수 d자리 이하이고 크기 조건을 만족하는지 확인.
+    float32 값: 같은 float32로 돌아가는 소수 d자리 값이 있는지 확인 (exact_float64 복원용).
+    """
+    values = np.asarray(values)
+    finite = values[~np.isnan(values)]
+    if len(finite) == 0:
+        return 0
+    if not np.all(np.isfinite(finite)):
+        return None
+    magnitude = np.abs(finite).astype(np.float64)
+    if magnitude.max() == 0:
+        return 0
+    if magnitude[magnitude > 0].min() < float32_min_abs:
+        return None
+
+    as_float64 = finite.astype(np.float64)
+    for d in range(float32_max_decimals + 1):
+        scale = 10.0 ** d
+        if magnitude.max() * scale >= float32_max_scaled:
+            return None
+        decimal = np.rint(as_float64 * scale) / scale
+        if np.array_equal(decimal.astype(finite.dtype), finite):
+            return d
+    return None
+
+
+def exact_float64(values):
+    """float32 열 → 원래(CSV에서 읽은) float64 값. 다른 타입은 float64 변환만
+
+    compact_frame_table은 소수 자릿수가 복원 가능한 열만 float32로 줄이므로
+    통계는 줄이기 전과 같은 값으로 계산됨.
+    """
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        d = float32_decimals(values)
+        if d is not None:
+            scale = 10.0 ** d
+            return np.rint(values.astype(np.float64) * scale) / scale
+    return values.astype(np.float64)
+
+
+def compact_column(values):
+    """열 하나를 더 작은 타입으로 (CSV 출력이 바뀌지 않는 경우만)
+
+    float64 → float32 (소수 자릿수/크기 조건 충족 시, NaN은 결측 그대로)
+    int64 → int32 (범위 안일 때), 그 외 타입은 그대로.
+    """
+    values = np.asarray(values)
+    if values.dtype == np.float64:
+        if float32_decimals(values) is not None:
+            return values.astype(np.float32)
+    elif values.dtype.kind in 'iu' and values.dtype.itemsize > 4 and len(values):
+        info = np.iinfo(np.int32)
+        if info.min <= values.min() and values.max() <= info.max:
+            return values.astype(np.int32)
+    return values
+
+
+def compact_state(values, state=None):
+    """compact_column 판정 재료를 청크마다 누적 (스트리밍처럼 열 전체를 한 번에 못 볼 때)
+
+    state: 앞 청크까지의 누적 (첫 청크는 None). 줄일 수 없는 타입이면 False.
+    → (종류 'i'/'f', float32 소수 자릿수 또는 None, 최솟값, 최댓값). 끝까지 본 뒤 compact_target으로 타입 결정.
+    """
+    values = np.asarray(values)
+    if state is False or values.dtype.kind not in 'iuf' or values.dtype.kind == 'f' and values.dtype != np.float64:
+        return False
+    kind = 'f' if values.dtype.kind == 'f' else 'i'
+    decimals = float32_decimals(values)
+    finite = values[np.isfinite(values)] if kind == 'f' else values
+    lo, hi = (finite.min(), finite.max()) if len(finite) else (np.inf, -np.inf)
+    if state is not None:
+        kind = 'f' if 'f' in (kind, state[0]) else 'i'  # 정수 + 실수 청크 → 실수 열
+        decimals = None if decimals is None or state[1] is None else max(decimals, state[1])
+        lo, hi = min(lo, state[2]), max(hi, state[3])
+    return kind, decimals, lo, hi
+
+
+def compact_target(state):
+    """compact_state 누적 → 열 전체를 compact_column에 넣었을 때의 타입 (np.float32/np.int32), 그대로면 None
+
+    청크마다 복원 가능한 소수 자릿수의 최댓값과 전체 최대 |값|으로 float32 조건을 다시 확인.
+    """
+    if not state:
+        return None
+    kind, decimals, lo, hi = state
+    if kind == 'i':
+        info = np.iinfo(np.int32)
+        return np.int32 if lo <= hi and info.min <= lo and hi <= info.max else None
+    if decimals is None:
+        return None
+    magnitude = max(abs(lo), abs(hi)) if lo <= hi else 0
+    return np.float32 if magnitude * 10.0 ** decimals < float32_max_scaled else None
+
+
+def compact_frame_table(df):
+    """Frame 표의 숫자 열을 compact_column으로 줄인 새 DataFrame (원래 표의 메모리는 해제 가능)"""
+    compact = pd.DataFrame({i: compact_column(df.iloc[:, i].to_numpy()) if df.iloc[:, i].dtype.kind in 'iuf'
+                            else df.iloc[:, i] for i in range(len(df.columns))}, copy=False)
+    compact.columns = df.columns
+    return compact
+
+
+def marker_column(n_rows, markers, categorical=True, labels=None):
+    """G열: markers [(행, 라벨), ...]만 값이 있고 나머지는 ""
+
+    categorical=True면 행마다 1~2바이트 코드 (object 문자열 열 대비 수십 분의 1),
+    False면 기존과 같은 object 열. 같은 행에 여러 라벨이면 뒤 라벨.
+    labels: 범주 목록 (None이면 markers의 라벨). 스트리밍 청크끼리 범주/코드 타입을 맞출 때 전체 라벨을 넘김.
+    """
+    if not categorical:
+        column = np.full(n_rows, "", dtype=object)
+        for row, label in markers:
+            column[row] = label
+        return column
+
+    if labels is None:
+        labels = list(dict.fromkeys(label for _, label in markers))
+    codes = np.zeros(n_rows, dtype=np.int8 if len(labels) < 127 else np.int32)
+    code_of = {label: i + 1 for i, label in enumerate(labels)}
+    for row, label in markers:
+        codes[row] = code_of[label]
+    return pd.Categorical.from_codes(codes, categories=[""] + labels)
+
+
+def memory_mb(df):
+    """DataFrame 메모리 (MB, object 문자열 포함)"""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
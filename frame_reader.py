@@ -0,0 +1,285 @@
+import queue
+import subprocess
+import threading
+
+import cv2
+import numpy as np
+
+# 설정값
+seek_min_gap_sec = 2.0  # 이 간격 이상 건너뛸 때만 seek (그 미만은 grab)
+seek_preroll_frames = 0  # seek 목표보다 앞에서 착지 후 grab으로 전진할 프레임 수
+prefetch_buffers = 8  # 디코딩 스레드가 앞서 채워둘 프레임 버퍼 수
+ffmpeg_binary = 'ffmpeg'  # ffmpeg 파이프 백엔드 실행 파일
+
+
+class VideoFrameReader:
+    """cv2.VideoCapture 래퍼: 요청한 프레임 번호까지 전진 후 해당 프레임만 디코딩
+
+    sparse=False: 기존과 동일하게 모든 프레임 cap.read()
+    sparse=True : 건너뛰는 프레임은 grab()만 (retrieve/BGR 변환 생략),
+                  긴 구간은 seek 후 위치 확인, 실패 시 순차 grab으로 폴백
+    """
+
+    def __init__(self, video_path, sparse=True, seek_min_gap_sec=seek_min_gap_sec,
+                 seek_preroll_frames=seek_preroll_frames):
+        self.video_path = str(video_path)
+        self.sparse = sparse
+        self.cap = cv2.VideoCapture(self.video_path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.seek_min_gap = max(1, int(seek_min_gap_sec * self.fps)) if self.fps else 0
+        self.seek_preroll = seek_preroll_frames
+        self.seekable = sparse and self.seek_min_gap > 0
+        self.pos = 0  # 다음에 디코딩될 프레임 번호
+        self.seek_count = 0
+        self.grab_count = 0
+
+    def read(self, frame_idx, out=None):
+        """frame_idx 프레임 반환 (EOF면 None). frame_idx는 단조 증가해야 함"""
+        if frame_idx < self.pos:
+            raise ValueError(f"역방향 읽기 불가: {frame_idx} < {self.pos}")
+
+        if self.seekable and frame_idx - self.pos >= self.seek_min_gap:
+            self._seek(frame_idx)
+
+        while self.pos < frame_idx:
+            if self.sparse:
+                ok = self.cap.grab()
+                self.grab_count += 1
+            else:
+                ok, _ = self.cap.read()
+            if not ok:
+                return None
+            self.pos += 1
+
+        ok, frame = self.cap.read(out) if out is not None else self.cap.read()
+        if not ok:
+            return None
+        self.pos += 1
+        return frame
+
+    def _seek(self, frame_idx):
+        """키프레임 기반 seek 후 위치 검증, 어긋나면 재오픈 + 순차 grab 폴백"""
+        target = max(self.pos, frame_idx - self.seek_preroll)
+        if self.total_frames and target >= self.total_frames:
+            return  # 끝 부근: 순차 grab으로 EOF 확인
+        if self.cap.set(cv2.CAP_PROP_POS_FRAMES, target) and \
+                int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == target:
+            self.pos = target
+            self.seek_count += 1
+            return
+
+        # ⚠️ 정확한 seek 불가 컨테이너: 이후로는 grab만 사용
+        print(f"\n⚠️ seek 위치 불일치 → 순차 grab 폴백: {self.video_path}")
+        self.seekable = False
+        resume = self.pos
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.video_path)
+        self.pos = 0
+        while self.pos < resume and self.cap.grab():
+            self.pos += 1
+
+    def release(self):
+        self.cap.release()
+
+
+class PrefetchFrameReader:
+    """디코딩 스레드가 source의 step 간격 프레임을 미리 할당한 버퍼 링에 채우고, 메인 스레드가 소비
+
+    read()가 돌려주는 프레임은 버퍼 뷰라서 다음 read() 호출 전까지만 유효 (보관하려면 copy).
+    요청 번호가 앞서 나가면(차단 구간) 디코딩 스레드도 그 위치로 건너뜀.
+    """
+
+    def __init__(self, source, step, buffers=prefetch_buffers):
+        self.source = source
+        self.video_path = self.source.video_path
+        self.fps = self.source.fps
+        self.total_frames = self.source.total_frames
+        self.step = step
+        self.n_buffers = max(2, buffers)
+        self._buffers = []
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        self._want = 0
+        self._held = None
+        self._eof = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            frame = self.source.read(0)
+            if frame is None:
+                self._filled.put(None)
+                return
+            # 첫 프레임 크기로 버퍼 링 할당
+            self._buffers = [frame] + [np.empty_like(frame) for _ in range(self.n_buffers - 1)]
+            for slot in range(1, self.n_buffers):
+                self._free.put(slot)
+            self._filled.put((0, 0))
+
+            frame_idx = 0
+            while True:
+                slot = self._free.get()
+                if slot is None or self._stopped:
+                    return
+                frame_idx = max(frame_idx + self.step, self._want)
+                frame = self.source.read(frame_idx, out=self._buffers[slot])
+                if frame is None:
+                    self._filled.put(None)
+                    return
+                if frame is not self._buffers[slot]:
+                    self._buffers[slot] = frame
+                self._filled.put((frame_idx, slot))
+        except Exception as e:
+            self._filled.put(e)
+
+    def read(self, frame_idx):
+        """frame_idx 프레임 반환 (EOF면 None). frame_idx는 단조 증가해야 함"""
+        if self._held is not None:
+            self._free.put(self._held)
+            self._held = None
+        if self._eof:
+            return None
+        self._want = frame_idx
+
+        while True:
+            item = self._filled.get()
+            if item is None:
+                self._eof = True
+                return None
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            got_idx, slot = item
+            if got_idx < frame_idx:
+                self._free.put(slot)
+                continue
+            if got_idx > frame_idx:
+                raise ValueError(f"step 간격 밖 프레임 요청: {frame_idx} (디코딩 위치 {got_idx})")
+            self._held = slot
+            return self._buffers[slot]
+
+    def release(self):
+        self._stopped = True
+        self._free.put(None)
+        self._thread.join()
+        self.source.release()
+
+
+class FFmpegFrameReader:
+    """ffmpeg rawvideo 파이프 프레임 소스 (bgr24 바이트를 NumPy 버퍼로 직접 readinto)
+
+    step 간격 선택(select), crop=(x, y, w, h), scale=(w, h)를 디코더 안에서 처리해
+    Python 쪽은 필요한 프레임의 필요한 영역만 받음. 긴 간격은 -ss로 재시작 (CFR 가정).
+    frame_idx는 원본 영상 기준 번호, 반환 프레임은 crop/scale 적용 후 크기.
+    """
+
+    def __init__(self, video_path, step=1, crop=None, scale=None,
+                 seek_min_gap_sec=seek_min_gap_sec, ffmpeg=None):
+        self.video_path = str(video_path)
+        self.step = step
+        self.crop = crop
+        self.scale = scale
+        self.ffmpeg = ffmpeg or ffmpeg_binary
+
+        # 메타데이터만 OpenCV로 읽음 (헤더)
+        cap = cv2.VideoCapture(self.video_path)
+        self.fps = cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        if crop is not None:
+            width, height = crop[2], crop[3]
+        if scale is not None:
+            width, height = scale
+        self.shape = (height, width, 3)
+        self.frame_bytes = width * height * 3
+        self.seek_min_gap = max(1, int(seek_min_gap_sec * self.fps)) if self.fps else 0
+
+        self.proc = None
+        self.pos = 0  # 다음 파이프 출력 프레임의 원본 번호
+        self.restart_count = 0
+
+    def _start(self, start_frame):
+        self.release()
+        cmd = [self.ffmpeg, '-v', 'error', '-nostdin']
+        if start_frame > 0:
+            # 프레임 중간 시각으로 정확 seek (그 이전 프레임은 ffmpeg가 디코딩 후 버림)
+            cmd += ['-ss', f'{(start_frame - 0.5) / self.fps:.6f}']
+        cmd += ['-i', self.video_path, '-an', '-sn']
+
+        filters = []
+        if self.step > 1:
+            filters.append(f'select=not(mod(n\\,{self.step}))')
+        if self.crop is not None:
+            # yuv420 상태로 자르면 홀수 좌표가 짝수로 밀리므로 BGR 변환 후 자름
+            x, y, w, h = self.crop
+            filters.append(f'format=bgr24,crop={w}:{h}:{x}:{y}')
+        if self.scale is not None:
+            filters.append(f'scale={self.scale[0]}:{self.scale[1]}:flags=area')
+        if filters:
+            cmd += ['-vf', ','.join(filters)]
+        cmd += ['-vsync', '0', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=self.frame_bytes)
+        self.pos = start_frame
+        self.restart_count += 1
+
+    def _read_into(self, out):
+        """파이프에서 프레임 1장을 out 버퍼에 직접 읽기 (EOF면 False)"""
+        view = memoryview(out).cast('B')
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.proc.stdout.readinto(view[filled:])
+            if not n:
+                return False
+            filled += n
+        self.pos += self.step
+        return True
+
+    def read(self, frame_idx, out=None):
+        """frame_idx 프레임 반환 (EOF면 None). frame_idx는 단조 증가해야 함"""
+        if self.proc is not None and frame_idx < self.pos:
+            raise ValueError(f"역방향 읽기 불가: {frame_idx} < {self.pos}")
+
+        gap = frame_idx - self.pos
+        if self.proc is None or gap % self.step != 0 or \
+                (self.seek_min_gap and gap >= self.seek_min_gap):
+            self._start(frame_idx)
+
+        if out is None or out.shape != self.shape or out.dtype != np.uint8:
+            out = np.empty(self.shape, np.uint8)
+        while self.pos < frame_idx:
+            if not self._read_into(out):
+                return None
+        if not self._read_into(out):
+            return None
+        return out
+
+    def release(self):
+        if self.proc is not None:
+            # 파이프를 먼저 닫으면 ffmpeg가 Broken pipe를 출력하므로 종료 후 닫음
+            self.proc.kill()
+            self.proc.wait()
+            self.proc.stdout.close()
+            self.proc = None
+
+
+def open_reader(video_path, step, sparse=True, prefetch=True, backend='opencv', crop=None, scale=None):
+    """분석기용 프레임 소스 생성
+
+    backend='opencv': VideoFrameReader (crop/scale 미지원, 전체 프레임)
+    backend='ffmpeg': FFmpegFrameReader (step 선택, crop/scale 디코더 내 처리)
+    prefetch=True면 백그라운드 디코딩 스레드로 감쌈.
+    """
+    if backend == 'ffmpeg':
+        source = FFmpegFrameReader(video_path, step=step, crop=crop, scale=scale)
+    else:
+        source = VideoFrameReader(video_path, sparse=sparse)
+    if prefetch:
+        return PrefetchFrameReader(source, step)
+    return source
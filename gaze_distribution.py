@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from frame_dtypes import exact_float64
+from gaze_engine import range_rows
+
+# 설정값
+screen_extent = (0, 1920, 0, 1080)  # 히트맵 범위 (x0, x1, y0, y1), 화면 좌표 px
+heatmap_bins = (48, 27)  # (x칸, y칸) → 40px 격자
+bcea_probability = 0.682  # BCEA 타원에 들어가는 샘플 비율 (±1 SD)
+central_radius = 200  # 중앙 영역 반지름 px (화면 중앙 기준 원)
+
+DISPERSION_COLUMNS = ['n', 'x_mean', 'y_mean', 'x_sd', 'y_sd', 'xy_corr', 'bcea', 'hull_area',
+                      'central_share', 'outside_share']
+
+
+def trial_heatmaps(x, y, labels, n_groups, bins=heatmap_bins, extent=screen_extent):
+    """그룹(trial)별 고정 격자 2D 히스토그램을 np.bincount 한 번으로 계산
+
+    x, y, labels는 샘플별 배열 (labels: 0 ~ n_groups-1). NaN 샘플은 제외.
+    반환: (counts[n_groups, y칸, x칸] int64, 범위 밖 샘플 수[n_groups])
+    칸 경계는 np.histogram2d와 같음 (마지막 칸은 오른쪽/아래 끝 포함), counts[:, 0, 0]이 화면 왼쪽 위.
+    """
+    nx, ny = bins
+    x0, x1, y0, y1 = extent
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y, labels = x[valid], y[valid], labels[valid]
+
+    ix = np.floor((x - x0) / (x1 - x0) * nx).astype(np.int64)
+    iy = np.floor((y - y0) / (y1 - y0) * ny).astype(np.int64)
+    ix[x == x1] = nx - 1
+    iy[y == y1] = ny - 1
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+    cells = (labels[inside] * ny + iy[inside]) * nx + ix[inside]
+    counts = np.bincount(cells, minlength=n_groups * ny * nx).reshape(n_groups, ny, nx)
+    outside = np.bincount(labels[~inside], minlength=n_groups)
+    return counts, outside
+
+
+def _new_running_max(values, labels, big):
+    """labels 오름차순으로 정렬된 샘플에서 같은 그룹 안 앞 값들보다 큰 위치 (그룹 첫 샘플 포함)
+
+    그룹마다 big(값 범위보다 큼)씩 올려 누적 최댓값 한 번으로 그룹별 계산.
+    """
+    shifted = values + labels * big
+    previous = np.concatenate([[-np.inf], np.maximum.accumulate(shifted)[:-1]])
+    return shifted > previous
+
+
+def _chain_area(px, py):
+    """(x, y) 순으로 정렬된 점들의 볼록 껍질 넓이 (Andrew monotone chain + 신발끈 공식)"""
+    if len(px) < 3:
+        return 0.0
+
+    def half(order):
+        hull = []
+        for i in order:
+            while len(hull) >= 2:
+                a, b = hull[-2], hull[-1]
+                if (px[b] - px[a]) * (py[i] - py[a]) - (py[b] - py[a]) * (px[i] - px[a]) > 0:
+                    break
+                hull.pop()
+            hull.append(i)
+        return hull
+
+    lower = half(range(len(px)))
+    upper = half(range(len(px) - 1, -1, -1))
+    ring = np.array(lower[:-1] + upper[:-1])
+    if len(ring) < 3:
+        return 0.0
+    hx, hy = px[ring], py[ring]
+    return 0.5 * abs(np.dot(hx, np.roll(hy, -1)) - np.dot(hy, np.roll(hx, -1)))
+
+
+def hull_areas(x, y, labels, n_groups):
+    """그룹별 볼록 껍질 넓이 (px²)
+
+    x 순으로 정렬했을 때 껍질 꼭짓점은 앞/뒤에서부터의 y 최댓값/최솟값 갱신 지점 중에만 있으므로
+    정렬 + 누적 최대 네 번으로 후보를 (보통 그룹당 수십 개로) 줄인 뒤 후보만 monotone chain.
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y, labels = x[valid], y[valid], labels[valid]
+    areas = np.zeros(n_groups)
+    if len(x) == 0:
+        return areas
+
+    order = np.lexsort((y, x, labels))
+    x, y, labels = x[order], y[order], labels[order]
+    big = (y.max() - y.min()) * 2 + 1
+    reverse = labels.max() - labels[::-1]
+    candidate = (_new_running_max(y, labels, big) | _new_running_max(-y, labels, big)
+                 | _new_running_max(y[::-1], reverse, big)[::-1] | _new_running_max(-y[::-1], reverse, big)[::-1])
+
+    x, y, labels = x[candidate], y[candidate], labels[candidate]
+    bounds = np.flatnonzero(np.diff(labels)) + 1
+    for lo, hi in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(labels)]])):
+        areas[labels[lo]] = _chain_area(x[lo:hi], y[lo:hi])
+    return areas
+
+
+def dispersion_table(x, y, labels, n_groups, center=None, radius=central_radius, probability=bcea_probability):
+    """그룹별 분산 지표 (x, y 둘 다 있는 샘플 기준)
+
+    bcea: 2kπ·σx·σy·√(1-ρ²), k = -ln(1-probability) (bivariate contour ellipse area, px²)
+    central_share: center(기본 화면 중앙)에서 radius 안 샘플 비율
+    """
+    if center is None:
+        center = ((screen_extent[0] + screen_extent[1]) / 2, (screen_extent[2] + screen_extent[3]) / 2)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y, labels = x[valid], y[valid], labels[valid]
+
+    n = np.bincount(labels, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = np.bincount(labels, x, n_groups) / n
+        y_mean = np.bincount(labels, y, n_groups) / n
+        dx = x - x_mean[labels]
+        dy = y - y_mean[labels]
+        x_var = np.bincount(labels, dx * dx, n_groups) / (n - 1)
+        y_var = np.bincount(labels, dy * dy, n_groups) / (n - 1)
+        xy_cov = np.bincount(labels, dx * dy, n_groups) / (n - 1)
+        x_sd, y_sd = np.sqrt(x_var), np.sqrt(y_var)
+        corr = xy_cov / (x_sd * y_sd)
+        k = -np.log(1 - probability)
+        bcea = 2 * k * np.pi * x_sd * y_sd * np.sqrt(np.maximum(1 - corr * corr, 0.0))
+        near = (x - center[0]) ** 2 + (y - center[1]) ** 2 <= radius * radius
+        central_share = np.bincount(labels, near, n_groups) / n
+
+    small = n < 2
+    return pd.DataFrame({
+        'n': n, 'x_mean': x_mean, 'y_mean': y_mean,
+        'x_sd': np.where(small, np.nan, x_sd), 'y_sd': np.where(small, np.nan, y_sd),
+        'xy_corr': np.where(small, np.nan, corr), 'bcea': np.where(small, np.nan, bcea),
+        'central_share': central_share,
+    })
+
+
+def trial_distribution(x, y, start_rows, end_rows, bins=heatmap_bins, extent=screen_extent,
+                       center=None, radius=central_radius, probability=bcea_probability):
+    """Trial 구간(start_row~end_row, 포함)별 히트맵 + 분산 지표를 trial 수와 무관하게 한 번에 계산
+
+    반환: (counts[trial, y칸, x칸], DataFrame[DISPERSION_COLUMNS])
+    여러 세션을 합칠 때는 샘플을 이어 붙이고 labels를 겹치지 않게 잡아
+    trial_heatmaps / dispersion_table / hull_areas를 직접 호출.
+    """
+    x = exact_float64(pd.to_numeric(pd.Series(x), errors='coerce').to_numpy())
+    y = exact_float64(pd.to_numeric(pd.Series(y), errors='coerce').to_numpy())
+    n_groups = len(start_rows)
+    labels, rows = range_rows(start_rows, end_rows)
+    x, y = x[rows], y[rows]
+
+    counts, outside = trial_heatmaps(x, y, labels, n_groups, bins, extent)
+    table = dispersion_table(x, y, labels, n_groups, center, radius, probability)
+    table['hull_area'] = hull_areas(x, y, labels, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['outside_share'] = outside / table['n'].to_numpy()
+    return counts, table[DISPERSION_COLUMNS]
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+from frame_dtypes import exact_float64
+
+
+def frame_times(frame_ids, fps):
+    """프레임ID 열 → 초 단위 시간 (F열). round(int(float(x)) / fps, 3), 빈 값은 NaN
+
+    np.round는 나눈 2진 값을 1000배해 반올림해서 29.97/59.94fps 등에서 Python round와 0.001 다를 수 있음
+    (4.5045 → 4.504, Python은 4.505). 고유 프레임ID마다 Python round 한 번 후 행으로 펼쳐 기존 lambda와 같은 값.
+    """
+    ids = pd.to_numeric(pd.Series(frame_ids), errors='coerce').to_numpy(dtype=np.float64)
+    unique, inverse = np.unique(np.trunc(ids), return_inverse=True)
+    fps = float(fps)  # NumPy 실수면 round가 np.round로 동작
+    seconds = np.array([round(frame_id / fps, 3) for frame_id in unique.tolist()], dtype=np.float64)
+    return seconds[inverse.reshape(-1)]
+
+
+def find_trial_rows(times, seconds):
+    """각 초(seconds)에 대해 int(F) == 초 인 첫 행 위치, 없으면 -1
+
+    시간이 정렬돼 있으면 searchsorted 한 번, 아니면 np.unique 첫 등장 위치로 조회.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    seconds = np.asarray(seconds, dtype=np.float64)
+    valid = ~np.isnan(times)
+    positions = np.flatnonzero(valid)
+    whole = np.trunc(times[valid])
+
+    if len(whole) == 0:
+        return np.full(len(seconds), -1, dtype=np.int64)
+
+    if np.all(whole[1:] >= whole[:-1]):
+        idx = np.searchsorted(whole, seconds, side='left')
+        idx_clipped = np.minimum(idx, len(whole) - 1)
+        found = (idx < len(whole)) & (whole[idx_clipped] == seconds)
+        return np.where(found, positions[idx_clipped], -1)
+
+    uniq, first = np.unique(whole, return_index=True)
+    idx = np.searchsorted(uniq, seconds)
+    idx_clipped = np.minimum(idx, len(uniq) - 1)
+    found = (idx < len(uniq)) & (uniq[idx_clipped] == seconds)
+    return np.where(found, positions[first[idx_clipped]], -1)
+
+
+def _range_sums(values, starts, ends):
+    """[starts[i], ends[i]] 구간별 (유효 개수, 합, 제곱합, 기준값), NaN 제외. prefix sum 한 번으로 계산
+
+    큰 좌표값 제곱합의 자릿수 손실을 줄이려고 전체 평균(기준값)만큼 이동 후 누적.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    center = values[valid].mean() if valid.any() else 0.0
+    shifted = np.where(valid, values - center, 0.0)
+
+    count = np.concatenate([[0], np.cumsum(valid)])
+    sum1 = np.concatenate([[0.0], np.cumsum(shifted)])
+    sum2 = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+    n = count[ends + 1] - count[starts]
+    return n, sum1[ends + 1] - sum1[starts], sum2[ends + 1] - sum2[starts], center
+
+
+def _range_moments(values, starts, ends):
+    """[starts[i], ends[i]] 구간별 (유효 개수, 평균, 표본 SD), NaN 제외"""
+    n, s1, s2, center = _range_sums(values, starts, ends)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, s1 / n + center, np.nan)
+        var = np.where(n > 1, (s2 - s1 * s1 / n) / (n - 1), np.nan)
+    return n, mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def range_rows(starts, ends):
+    """구간 [starts[i], ends[i]]의 행 번호를 이어 붙인 (구간 번호, 행 번호) 배열 (구간이 겹쳐도 동작)"""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.maximum(np.asarray(ends, dtype=np.int64) - starts + 1, 0)
+    labels = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    rows = np.arange(lengths.sum()) - offsets + np.repeat(starts, lengths)
+    return labels, rows
+
+
+def trial_stats(x, y, start_rows, end_rows, percentiles=()):
+    """Trial 구간(start_row~end_row, 포함)별 x/y 통계를 trial 수와 무관하게 한 번에 계산
+
+    반환 DataFrame 열: row_count, x_count, y_count, x_mean, y_mean, x_sd, y_sd
+    percentiles=(50, 90) 등을 주면 x_p50, y_p50 ... 열 추가 (groupby 한 번).
+    float32로 줄인 열(compact_frame_table)은 원래 소수 값으로 복원해 계산.
+    """
+    x = exact_float64(pd.to_numeric(pd.Series(x), errors='coerce').to_numpy())
+    y = exact_float64(pd.to_numeric(pd.Series(y), errors='coerce').to_numpy())
+    starts = np.asarray(start_rows, dtype=np.int64)
+    ends = np.maximum(np.asarray(end_rows, dtype=np.int64), starts - 1)  # end < start → 빈 구간
+
+    x_count, x_mean, x_sd = _range_moments(x, starts, ends)
+    y_count, y_mean, y_sd = _range_moments(y, starts, ends)
+    stats = pd.DataFrame({
+        'row_count': ends - starts + 1,
+        'x_count': x_count, 'y_count': y_count,
+        'x_mean': x_mean, 'y_mean': y_mean,
+        'x_sd': x_sd, 'y_sd': y_sd,
+    })
+
+    if len(percentiles) and len(starts):
+        # 구간 행 번호를 이어 붙여 trial 라벨과 함께 그룹 분위수
+        labels, rows = range_rows(starts, ends)
+        grouped = pd.DataFrame({'trial': labels, 'x': x[rows], 'y': y[rows]}).groupby('trial')
+        for q in percentiles:
+            quant = grouped.quantile(q / 100).reindex(range(len(starts)))
+            stats[f'x_p{q:g}'] = quant['x'].to_numpy()
+            stats[f'y_p{q:g}'] = quant['y'].to_numpy()
+    return stats
+
+
+class RunningTrialStats:
+    """청크 단위로 들어오는 x/y에서 trial 구간 통계를 누적 (스트리밍 모드용)
+
+    청크 안 구간은 prefix sum으로 (개수, 평균, 편차제곱합)을 구하고,
+    기존 누적값과는 Chan 병합 공식으로 합쳐 긴 녹화에서도 수치적으로 안정.
+    result()는 trial_stats와 같은 열의 DataFrame 반환 (분위수 제외).
+    """
+
+    def __init__(self, start_rows, end_rows):
+        self.starts = np.asarray(start_rows, dtype=np.int64)
+        self.ends = np.maximum(np.asarray(end_rows, dtype=np.int64), self.starts - 1)
+        k = len(self.starts)
+        self.count = {axis: np.zeros(k, dtype=np.int64) for axis in 'xy'}
+        self.mean = {axis: np.zeros(k) for axis in 'xy'}
+        self.m2 = {axis: np.zeros(k) for axis in 'xy'}
+
+    def update(self, offset, x, y):
+        """offset부터 시작하는 청크(x, y)를 누적"""
+        length = len(x)
+        if length == 0 or len(self.starts) == 0:
+            return
+        # 청크와 겹치는 부분만 청크 내 위치로 (겹치지 않으면 빈 구간 [0, -1])
+        starts = np.maximum(self.starts, offset) - offset
+        ends = np.minimum(self.ends, offset + length - 1) - offset
+        empty = ends < starts
+        starts = np.where(empty, 0, starts)
+        ends = np.where(empty, -1, ends)
+
+        for axis, values in (('x', x), ('y', y)):
+            values = exact_float64(pd.to_numeric(pd.Series(values), errors='coerce').to_numpy())
+            n_b, s1, s2, center = _range_sums(values, starts, ends)
+            n_a = self.count[axis]
+            n = n_a + n_b
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_b = s1 / n_b + center
+                m2_b = s2 - s1 * s1 / n_b
+                delta = mean_b - self.mean[axis]
+                merged_mean = self.mean[axis] + delta * n_b / n
+                merged_m2 = self.m2[axis] + m2_b + delta * delta * n_a * n_b / n
+            has_new = n_b > 0
+            self.mean[axis] = np.where(has_new, merged_mean, self.mean[axis])
+            self.m2[axis] = np.where(has_new, merged_m2, self.m2[axis])
+            self.count[axis] = n
+
+    def result(self):
+        columns = {'row_count': self.ends - self.starts + 1}
+        for axis in 'xy':
+            n = self.count[axis]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                columns[f'{axis}_count'] = n
+                columns[f'{axis}_mean'] = np.where(n > 0, self.mean[axis], np.nan)
+                columns[f'{axis}_sd'] = np.where(n > 1, np.sqrt(np.maximum(self.m2[axis], 0.0) / (n - 1)), np.nan)
+        return pd.DataFrame(columns)[['row_count', 'x_count', 'y_count', 'x_mean', 'y_mean', 'x_sd', 'y_sd']]
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+from frame_dtypes import exact_float64
+from gaze_engine import range_rows
+
+# 설정값
+fixation_min_duration = 0.1  # 초, 이보다 짧은 구간은 fixation에서 제외
+ivt_velocity_threshold = 1200  # px/s, I-VT: 이보다 느린 샘플이 fixation (약 30°/s, 1920px ≈ 48° 화면 기준)
+idt_dispersion_threshold = 50  # px, I-DT: (x 범위 + y 범위)가 이 이하인 구간이 fixation (약 1°)
+
+FIXATION_COLUMNS = ['trial', 'start_row', 'end_row', 'start_time', 'duration', 'x', 'y']
+SUMMARY_COLUMNS = ['trial', 'fixation_count', 'fixation_total', 'fixation_mean', 'fixation_share', 'saccade_count']
+
+
+def sample_times(frame_ids, fps):
+    """샘플별 시간 (초). 같은 프레임ID가 이어지는 샘플들은 그 프레임 1/fps 안에 균등 배치
+
+    아이트래커 샘플이 영상 프레임보다 촘촘해 프레임ID가 반복되므로,
+    F열(프레임 시작 시간)을 그대로 쓰면 샘플 간 시간 차가 0이 되어 속도 계산 불가.
+    """
+    ids = np.trunc(pd.to_numeric(pd.Series(frame_ids), errors='coerce').to_numpy(dtype=np.float64))
+    n = len(ids)
+    if n == 0:
+        return ids
+    new_run = np.ones(n, dtype=bool)
+    new_run[1:] = ids[1:] != ids[:-1]
+    run_starts = np.flatnonzero(new_run)
+    run_lengths = np.diff(np.append(run_starts, n))
+    run = np.cumsum(new_run) - 1
+    position = np.arange(n) - run_starts[run]
+    return (ids + position / run_lengths[run]) / fps
+
+
+def _segment_runs(flag, labels):
+    """같은 label 안에서 flag가 연속 True인 구간 → (시작, 끝) 위치 배열 (끝 포함)"""
+    n = len(flag)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    same = np.zeros(n, dtype=bool)
+    same[1:] = labels[1:] == labels[:-1]
+    starts = np.flatnonzero(flag & ~(np.append(False, flag[:-1]) & same))
+    last = np.append(~same[1:], True)
+    ends = np.flatnonzero(flag & (~np.append(flag[1:], False) | last))
+    return starts, ends
+
+
+def ivt_fixations(x, y, t, labels, threshold=ivt_velocity_threshold):
+    """I-VT: 다음 샘플까지 속도(px/s)가 threshold 미만인 샘플의 연속 구간 (trial 경계에서 끊음)
+
+    각 trial 마지막 샘플은 직전 샘플의 분류를 따름. 좌표/시간이 NaN인 샘플은 fixation 아님.
+    반환: (시작, 끝) 위치 배열 (x 등과 같은 샘플 순서, 끝 포함)
+    """
+    n = len(x)
+    if n == 0:
+        return _segment_runs(np.zeros(0, dtype=bool), labels)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dt = np.diff(t)
+        speed = np.hypot(np.diff(x), np.diff(y)) / np.where(dt > 0, dt, np.nan)
+        slow = speed < threshold
+    slow &= labels[1:] == labels[:-1]
+
+    fixation = np.zeros(n, dtype=bool)
+    fixation[:-1] = slow
+    trial_end = np.append(labels[1:] != labels[:-1], True)
+    carry = trial_end & np.append(False, slow)  # 마지막 샘플: 직전 구간이 fixation이면 포함
+    fixation |= carry
+    fixation &= ~(np.isnan(x) | np.isnan(y) | np.isnan(t))
+    return _segment_runs(fixation, labels)
+
+
+def _window_lengths(x, y, threshold):
+    """각 위치 i에서 시작해 (x 범위 + y 범위) <= threshold를 만족하는 가장 긴 구간 길이 (NaN 포함 구간 불가)
+
+    길이 2^k 구간의 최대/최소 표를 만들고 큰 k부터 붙여 보는 binary lifting (샘플별 반복 없음).
+    """
+    n = len(x)
+    levels = [(x, x, y, y)]
+    while 2 ** len(levels) <= n:
+        half = 2 ** (len(levels) - 1)
+        xmax, xmin, ymax, ymin = levels[-1]
+        levels.append((np.maximum(xmax[:-half], xmax[half:]), np.minimum(xmin[:-half], xmin[half:]),
+                       np.maximum(ymax[:-half], ymax[half:]), np.minimum(ymin[:-half], ymin[half:])))
+
+    length = np.zeros(n, dtype=np.int64)
+    cur = [np.full(n, -np.inf), np.full(n, np.inf), np.full(n, -np.inf), np.full(n, np.inf)]
+    index = np.arange(n)
+    for k in range(len(levels) - 1, -1, -1):
+        xmax, xmin, ymax, ymin = levels[k]
+        at = index + length
+        ok = at < len(xmax)
+        at = np.where(ok, at, 0)
+        grown = [np.maximum(cur[0], xmax[at]), np.minimum(cur[1], xmin[at]),
+                 np.maximum(cur[2], ymax[at]), np.minimum(cur[3], ymin[at])]
+        with np.errstate(invalid='ignore'):
+            ok &= (grown[0] - grown[1]) + (grown[2] - grown[3]) <= threshold
+        for j in range(4):
+            cur[j] = np.where(ok, grown[j], cur[j])
+        length += np.where(ok, 2 ** k, 0)
+    return length
+
+
+def _greedy_chain(seed, succ):
+    """seed에서 succ를 반복 적용해 지나는 위치 표시 (pointer doubling, 라운드마다 방문 수 2배)"""
+    visited = np.zeros(len(succ), dtype=bool)
+    visited[seed] = True
+    jump = succ.copy()
+    while True:
+        targets = jump[visited]
+        if visited[targets].all():
+            return visited
+        visited[targets] = True
+        jump = jump[jump]
+
+
+def idt_fixations(x, y, t, labels, threshold=idt_dispersion_threshold, min_duration=fixation_min_duration,
+                  sample_dt=0.0):
+    """I-DT (Salvucci & Goldberg): 최소 길이 창의 분산이 threshold 이하면 넘을 때까지 늘려 fixation,
+    아니면 한 샘플 이동. trial마다 처음부터 다시 시작.
+
+    각 위치의 최대 창 길이는 _window_lengths로 한 번에, 창 사이 이동(창 끝 다음 후보로 점프)은
+    _greedy_chain으로 계산. 반복은 trial 단위뿐.
+    반환: (시작, 끝) 위치 배열 (끝 포함)
+    """
+    all_starts, all_ends = [], []
+    bounds = np.flatnonzero(np.diff(labels)) + 1
+    for lo, hi in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(labels)]])):
+        n = hi - lo
+        if n == 0:
+            continue
+        tx, ty, tt = x[lo:hi], y[lo:hi], t[lo:hi]
+        length = _window_lengths(np.where(np.isnan(tt), np.nan, tx), ty, threshold)
+        index = np.arange(n)
+        last = index + np.maximum(length, 1) - 1
+        with np.errstate(invalid='ignore'):
+            candidate = (length > 0) & (tt[last] - tt + sample_dt >= min_duration - 1e-9)
+
+        # 위치 p 이후 첫 후보 (없으면 n), 후보 c의 다음 출발점 = 창 끝 다음의 첫 후보
+        first_candidate = np.minimum.accumulate(np.where(candidate, index, n)[::-1])[::-1]
+        first_candidate = np.append(first_candidate, n)
+        succ = np.append(first_candidate[np.minimum(last + 1, n)], n)
+        chosen = np.flatnonzero(_greedy_chain(first_candidate[0], succ)[:n])
+        all_starts.append(chosen + lo)
+        all_ends.append(last[chosen] + lo)
+
+    if not all_starts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(all_starts), np.concatenate(all_ends)
+
+
+def trial_fixations(x, y, frame_ids, fps, start_rows, end_rows, method='ivt', trials=None,
+                    min_duration=fixation_min_duration):
+    """Trial 구간(start_row~end_row, 포함)별 fixation 분할
+
+    method: 'ivt' (속도 기준) 또는 'idt' (분산 기준). 시간은 sample_times(프레임ID, 영상 fps).
+    반환: (fixation 표 [FIXATION_COLUMNS], trial 요약 표 [SUMMARY_COLUMNS])
+      duration/fixation_total/fixation_mean: 초, fixation_share: trial 시간 중 fixation 비율,
+      saccade_count: fixation 밖 유효 샘플 연속 구간 수
+    """
+    x = exact_float64(pd.to_numeric(pd.Series(x), errors='coerce').to_numpy())
+    y = exact_float64(pd.to_numeric(pd.Series(y), errors='coerce').to_numpy())
+    t_all = sample_times(frame_ids, fps)
+    steps = np.diff(t_all)
+    steps = steps[steps > 0]
+    sample_dt = float(np.median(steps)) if len(steps) else 0.0
+
+    n_trials = len(start_rows)
+    trials = np.arange(1, n_trials + 1) if trials is None else np.asarray(trials)
+    labels, rows = range_rows(start_rows, end_rows)
+    x, y, t = x[rows], y[rows], t_all[rows]
+
+    if method == 'ivt':
+        starts, ends = ivt_fixations(x, y, t, labels)
+        durations = t[ends] - t[starts] + sample_dt
+        keep = durations >= min_duration - 1e-9
+        starts, ends = starts[keep], ends[keep]
+    elif method == 'idt':
+        starts, ends = idt_fixations(x, y, t, labels, min_duration=min_duration, sample_dt=sample_dt)
+    else:
+        raise ValueError(f"알 수 없는 fixation 방식: {method}")
+
+    durations = t[ends] - t[starts] + sample_dt
+    cum_x = np.concatenate([[0.0], np.cumsum(np.nan_to_num(x))])
+    cum_y = np.concatenate([[0.0], np.cumsum(np.nan_to_num(y))])
+    size = ends - starts + 1
+    fixations = pd.DataFrame({
+        'trial': trials[labels[starts]], 'start_row': rows[starts], 'end_row': rows[ends],
+        'start_time': t[starts], 'duration': durations,
+        'x': (cum_x[ends + 1] - cum_x[starts]) / size, 'y': (cum_y[ends + 1] - cum_y[starts]) / size,
+    })
+
+    # trial 요약: fixation 밖 유효 샘플 연속 구간 = saccade
+    inside = np.zeros(len(x) + 1, dtype=np.int64)
+    np.add.at(inside, starts, 1)
+    np.add.at(inside, ends + 1, -1)
+    in_fixation = np.cumsum(inside)[:-1] > 0
+    moving = ~in_fixation & ~(np.isnan(x) | np.isnan(y) | np.isnan(t))
+    saccade_starts, _ = _segment_runs(moving, labels)
+
+    count = np.bincount(labels[starts], minlength=n_trials)
+    total = np.bincount(labels[starts], durations, n_trials)
+    starts_t = np.asarray(start_rows, dtype=np.int64)
+    ends_t = np.asarray(end_rows, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        span = np.where(ends_t >= starts_t, t_all[np.maximum(ends_t, 0)] - t_all[starts_t.clip(0)] + sample_dt, np.nan)
+        summary = pd.DataFrame({
+            'trial': trials, 'fixation_count': count, 'fixation_total': total,
+            'fixation_mean': np.where(count > 0, total / count, np.nan),
+            'fixation_share': total / span,
+            'saccade_count': np.bincount(labels[saccade_starts], minlength=n_trials),
+        })
+    return fixations[FIXATION_COLUMNS], summary[SUMMARY_COLUMNS]
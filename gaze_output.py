@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except:
+    pa = None
+
+
+def trial_bounds(trials, start_rows, end_rows, start_times, end_times):
+    """Trial 경계 sidecar 표: trial 번호, start/end 행 (Frame 표 0부터), 그 행의 F 시간"""
+    return pd.DataFrame({
+        'trial': np.asarray(trials, dtype=np.int64),
+        'start_row': np.asarray(start_rows, dtype=np.int64),
+        'end_row': np.asarray(end_rows, dtype=np.int64),
+        'start_time': np.asarray(start_times, dtype=np.float64),
+        'end_time': np.asarray(end_times, dtype=np.float64),
+    })
+
+
+def _string_columns(df):
+    """Parquet는 열 이름이 문자열이어야 함 (엑셀 헤더 빈 칸/숫자 대비)"""
+    if all(isinstance(c, str) for c in df.columns):
+        return df
+    return df.set_axis([str(c) for c in df.columns], axis=1)
+
+
+def write_parquet(df, path):
+    """전체 주석 표를 Parquet로 저장 (pyarrow 없으면 False)"""
+    if pa is None:
+        print("⚠️ pyarrow 없음 → Parquet 저장 생략")
+        return False
+    _string_columns(df).to_parquet(path, index=False)
+    return True
+
+
+def write_dispersion(path, trials, table):
+    """trial별 분산 지표 CSV (px 단위 값은 소수 1자리, 비율/상관은 3자리)"""
+    out = table.round({'x_mean': 1, 'y_mean': 1, 'x_sd': 1, 'y_sd': 1, 'xy_corr': 3, 'bcea': 1,
+                       'hull_area': 1, 'central_share': 3, 'outside_share': 3})
+    out.insert(0, 'trial', np.asarray(trials, dtype=np.int64))
+    out.to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def write_fixations(fixation_path, summary_path, fixations, summary):
+    """fixation 목록 CSV + trial별 fixation 요약 CSV (시간은 초 단위 소수 3자리)"""
+    fixations.round({'start_time': 3, 'duration': 3, 'x': 1, 'y': 1}) \
+        .to_csv(fixation_path, index=False, encoding='utf-8-sig')
+    summary.round({'fixation_total': 3, 'fixation_mean': 3, 'fixation_share': 3}) \
+        .to_csv(summary_path, index=False, encoding='utf-8-sig')
+
+
+def write_heatmaps(path, trials, counts, extent, bins):
+    """trial별 히트맵을 압축 .npz로 저장 (칸 값이 들어가는 가장 작은 unsigned 정수 타입)
+
+    배열: trials[k], counts[k, y칸, x칸], x_edges, y_edges. np.load(path)로 바로 읽기 가능.
+    """
+    peak = int(counts.max()) if counts.size else 0
+    dtype = np.uint16 if peak <= np.iinfo(np.uint16).max else np.uint32
+    np.savez_compressed(path, trials=np.asarray(trials, dtype=np.int32), counts=counts.astype(dtype),
+                        x_edges=np.linspace(extent[0], extent[1], bins[0] + 1),
+                        y_edges=np.linspace(extent[2], extent[3], bins[1] + 1))
+
+
+class ChunkWriter:
+    """스트리밍 모드 청크 이어 쓰기: mode='csv'는 _final.csv, 'parquet'은 Parquet row group 추가"""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        self._file = None
+        self._writer = None
+        if mode == 'csv':
+            self._file = open(path, 'w', encoding='utf-8-sig', newline='')
+        elif pa is None:
+            print("⚠️ pyarrow 없음 → Parquet 저장 생략")
+            self.mode = None
+
+    def write(self, chunk):
+        if self.mode == 'csv':
+            chunk.to_csv(self._file, index=False, header=self._file.tell() == 0)
+        elif self.mode == 'parquet':
+            table = pa.Table.from_pandas(_string_columns(chunk), preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,61 @@
+import json
+import os
+
+
+class Manifest:
+    """처리 이력 매니페스트: (영상 경로, 크기, mtime, 검출 파라미터)가 같으면 재처리 생략
+
+    base_folder/<파일명>.json 에 저장, 영상 경로는 base_folder 기준 상대경로로 기록.
+    """
+
+    def __init__(self, base_folder, filename):
+        self.base_folder = base_folder
+        self.path = os.path.join(base_folder, filename)
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.entries = json.load(f).get('videos', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 매니페스트 읽기 실패 → 새로 작성: {e}")
+
+    def _key(self, video_path):
+        return os.path.relpath(video_path, self.base_folder)
+
+    @staticmethod
+    def _signature(video_path, params):
+        stat = os.stat(video_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'params': json.loads(json.dumps(params))}
+
+    def get(self, video_path):
+        return self.entries.get(self._key(video_path))
+
+    def is_current(self, video_path, params):
+        """영상/파라미터 변경 없고 기록된 출력 파일이 모두 남아 있으면 True"""
+        entry = self.get(video_path)
+        if entry is None:
+            return False
+        signature = self._signature(video_path, params)
+        if any(entry.get(k) != v for k, v in signature.items()):
+            return False
+        return all(os.path.exists(os.path.join(self.base_folder, p)) for p in entry.get('outputs', []))
+
+    def previous_outputs(self, video_path):
+        """이전 실행의 출력 파일 절대경로 (재처리 시 덮어쓰기/정리용)"""
+        entry = self.get(video_path) or {}
+        return [os.path.join(self.base_folder, p) for p in entry.get('outputs', [])]
+
+    def record(self, video_path, params, outputs, result):
+        entry = self._signature(video_path, params)
+        entry['outputs'] = [os.path.relpath(p, self.base_folder) for p in outputs]
+        entry['result'] = result
+        self.entries[self._key(video_path)] = entry
+        self.save()
+
+    def save(self):
+        """중간에 끊겨도 이어서 돌릴 수 있게 영상마다 원자적으로 저장"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'videos': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
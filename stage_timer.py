@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """단계별 누적 시간(초)/호출 수. 프로파일러 없이 병목 단계 확인용
+
+    루프 안에서는 mark() 후 단계가 끝날 때마다 lap(이름): 직전 mark/lap 이후 시간을 그 단계에 누적.
+    한 번뿐인 단계는 with timer.stage(이름): 블록.
+    enabled=False면 모든 메서드가 바로 반환 (측정 끔).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.seconds = {}
+        self.calls = {}
+        self.created = time.perf_counter()
+        self.last = self.created
+
+    def mark(self):
+        if self.enabled:
+            self.last = time.perf_counter()
+
+    def lap(self, name):
+        if self.enabled:
+            now = time.perf_counter()
+            self.seconds[name] = self.seconds.get(name, 0.0) + now - self.last
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.last = now
+
+    def add(self, name, seconds, calls=1):
+        if self.enabled:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + calls
+
+    @contextmanager
+    def stage(self, name):
+        self.mark()
+        try:
+            yield
+        finally:
+            self.lap(name)
+
+    def merge(self, stages):
+        """다른 타이머의 as_dict()['stages'] 합산 (워커/샤드 프로세스 결과)"""
+        for name, entry in stages.items():
+            self.add(name, entry['seconds'], entry['calls'])
+
+    def as_dict(self):
+        """{'elapsed': 생성 후 경과 초, 'stages': {단계: {'seconds', 'calls'}}}"""
+        return {'elapsed': round(time.perf_counter() - self.created, 6),
+                'stages': {name: {'seconds': round(seconds, 6), 'calls': self.calls[name]}
+                           for name, seconds in self.seconds.items()}}
+
+
+NO_TIMER = StageTimer(enabled=False)  # 측정하지 않을 때 넘기는 공용 타이머 (기록 없음)
+
+
+def write_metrics(path, records):
+    """메트릭 레코드 목록 저장. 확장자 .csv면 레코드당 1행 ({단계}_s, {단계}_calls 열), 그 외 JSON
+
+    레코드: 식별 정보(영상/폴더 등) + StageTimer.as_dict() 항목.
+    """
+    path = os.fspath(path)
+    if not path.lower().endswith('.csv'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'records': records},
+                      f, ensure_ascii=False, indent=1)
+        return path
+
+    stage_names = list(dict.fromkeys(name for rec in records for name in rec.get('stages', {})))
+    fields = list(dict.fromkeys(k for rec in records for k in rec if k != 'stages'))
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + [f"{name}_{kind}" for name in stage_names for kind in ('s', 'calls')])
+        for rec in records:
+            stages = rec.get('stages', {})
+            row = [rec.get(k, '') for k in fields]
+            for name in stage_names:
+                entry = stages.get(name, {})
+                row += [entry.get('seconds', ''), entry.get('calls', '')]
+            writer.writerow(row)
+    return path
+
+
+def print_stages(record, title="단계별 시간"):
+    """레코드의 단계별 시간을 큰 순서로 출력 (전체 경과 대비 비율)"""
+    elapsed = record.get('elapsed') or 0
+    stages = sorted(record.get('stages', {}).items(), key=lambda item: -item[1]['seconds'])
+    print(f"⏱️ {title} (전체 {elapsed:.2f}s)")
+    for name, entry in stages:
+        share = entry['seconds'] / elapsed if elapsed else 0
+        print(f"   {name:<16} {entry['seconds']:>9.3f}s {share:>6.1%}  ({entry['calls']}회)")
@@ -1,11 +1,18 @@
 import cv2
 import numpy as np
 import os
-import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import default_workers, print_summary, run_batch
+from folder_index import scan_tree, video_entries
+from frame_reader import open_reader
+from manifest import Manifest
+from stage_timer import NO_TIMER, StageTimer, print_stages, write_metrics
+from video_index import video_info
 
 # ✅ 자동 계산된 ROI 적용
 ROI_X, ROI_Y, ROI_W, ROI_H = 520, 265, 809, 641
-print(f"✅ 자동 계산된 ROI: ({ROI_X}, {ROI_Y}, {ROI_W}, {ROI_H})")
 
 # 🔥 설정값들
 base_folder = r'/Volumes/ボリューム/2025_gaze_experiment/sub5/day11'
@@ -14,19 +21,45 @@ blue_ratio_threshold = 0.10  # 주변 파랑 10%↑
 frame_skip = 3
 min_file_size_gb = 1.5
 DETECTION_BLOCK_SECONDS = 90
-
-
-def get_unique_filename(folder_path, base_filename, suffix="_red_blue"):
+batch_workers = default_workers  # 영상 병렬 처리 프로세스 수 (기본 1 = 순차, 빠른 저장장치면 2~4)
+use_prefetch = True  # 디코딩 스레드와 분석 병행 (스킵 프레임은 grab만)
+frame_backend = 'opencv'  # 'ffmpeg'이면 파이프로 ROI+주변 박스만 디코딩 (캡쳐도 박스 크기)
+BORDER_MARGIN = 20
+coarse_screening = False  # True면 축소 샘플로 먼저 추정, 후보 프레임만 전체 해상도 계산 (추정이 상한이 아니라 검출 누락 가능)
+coarse_stride = 4  # 추정용 픽셀 간격 (4 → 1/16 픽셀)
+coarse_margin = 0.3  # 추정값이 임계값의 (1 - margin)배를 넘으면 후보
+capture_format = 'png'  # 'png' | 'jpg' | 'webp' | 'csv' (이미지 없이 시각/프레임만 CSV 기록)
+capture_quality = 90  # jpg/webp 품질
+capture_region = 'frame'  # 'frame' 전체 | 'roi' ROI만 잘라 저장
+capture_writer_threads = 2  # 캡쳐 인코딩/저장 백그라운드 스레드 수
+use_manifest = True  # 영상/파라미터 변경 없는 영상은 재처리 생략
+manifest_filename = '.valo_manifest.json'
+quiet = False  # True면 프레임 단위 진행 출력 끔, 캡쳐/요약 출력은 유지
+collect_metrics = True  # 영상별 단계 시간 측정 (open/decode/color/mask/detect/write)
+metrics_filename = 'valo_metrics.json'  # base_folder에 영상별 메트릭 저장 (.csv면 CSV), None이면 저장 안 함
+
+
+def detector_params():
+    """결과에 영향을 주는 검출 파라미터 (매니페스트 키)"""
+    return {'roi': [ROI_X, ROI_Y, ROI_W, ROI_H], 'red_ratio_threshold': red_ratio_threshold,
+            'blue_ratio_threshold': blue_ratio_threshold, 'frame_skip': frame_skip,
+            'detection_block_seconds': DETECTION_BLOCK_SECONDS, 'border_margin': BORDER_MARGIN,
+            'frame_backend': frame_backend, 'capture_format': capture_format,
+            'capture_quality': capture_quality, 'capture_region': capture_region,
+            'coarse_screening': coarse_screening, 'coarse_stride': coarse_stride, 'coarse_margin': coarse_margin}
+
+
+def get_unique_filename(folder_path, base_filename, suffix="_red_blue", ext=".png"):
     """중복 파일명 처리"""
-    if base_filename.endswith('.png'):
-        base_filename = base_filename[:-4]
+    if base_filename.endswith(ext):
+        base_filename = base_filename[:-len(ext)]
 
     counter = 0
     while True:
         if counter == 0:
-            filename = f"{base_filename}{suffix}.png"
+            filename = f"{base_filename}{suffix}{ext}"
         else:
-            filename = f"{base_filename}{suffix}({counter}).png"
+            filename = f"{base_filename}{suffix}({counter}){ext}"
 
         filepath = os.path.join(folder_path, filename)
         if not os.path.exists(filepath):
@@ -34,111 +67,295 @@ def get_unique_filename(folder_path, base_filename, suffix="_red_blue"):
         counter += 1
 
 
-def is_roi_red_and_border_blue(frame):
-    """ROI 빨강 45%↑ + ROI 주변 20px 진한 파랑 검출"""
-
-    # 1) ROI 빨강 검출
-    roi = frame[ROI_Y:ROI_Y + ROI_H, ROI_X:ROI_X + ROI_W]
-    hsv_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-
-    # ROI 빨강 마스크
-    lower_red1 = np.array([0, 80, 80])
-    upper_red1 = np.array([15, 255, 255])
-    mask1 = cv2.inRange(hsv_roi, lower_red1, upper_red1)
-
-    lower_red2 = np.array([160, 80, 80])
-    upper_red2 = np.array([179, 255, 255])
-    mask2 = cv2.inRange(hsv_roi, lower_red2, upper_red2)
-
-    lower_red_bright = np.array([0, 60, 120])
-    upper_red_bright = np.array([15, 255, 255])
-    mask_bright = cv2.inRange(hsv_roi, lower_red_bright, upper_red_bright)
-
-    red_mask = cv2.bitwise_or(mask1, mask2)
-    red_mask = cv2.bitwise_or(red_mask, mask_bright)
-
-    red_pixels = cv2.countNonZero(red_mask)
-    total_roi_pixels = ROI_W * ROI_H
-    red_ratio = red_pixels / total_roi_pixels
+# 🔥 HSV 범위 (inRange와 동일하게 양끝 포함)
+RED_HSV_RANGES = [
+    ((0, 80, 80), (15, 255, 255)),
+    ((160, 80, 80), (179, 255, 255)),
+    ((0, 60, 120), (15, 255, 255)),  # 밝은 빨강
+]
+# 첨부 이미지의 진한 남색/네이비 파랑 범위
+BLUE_HSV_RANGES = [
+    ((100, 100, 20), (120, 255, 120)),
+    ((105, 120, 10), (115, 255, 80)),
+]
 
-    # 2) ROI 주변 20px 진한 파랑 검출
-    border_margin = 20
 
-    border_top = max(0, ROI_Y - border_margin)
-    border_bottom = min(frame.shape[0], ROI_Y + ROI_H + border_margin)
-    border_left = max(0, ROI_X - border_margin)
-    border_right = min(frame.shape[1], ROI_X + ROI_W + border_margin)
+def build_hsv_luts():
+    """범위마다 비트 하나: 채널별 LUT 비트를 AND 하면 픽셀이 만족하는 범위 비트만 남음
+
+    → (채널별 규칙 LUT, 규칙비트→빨강 255 LUT, 규칙비트→파랑 255 LUT)
+    """
+    ranges = RED_HSV_RANGES + BLUE_HSV_RANGES
+    rule_lut = np.zeros((1, 256, 3), np.uint8)
+    for bit, (lower, upper) in enumerate(ranges):
+        for c in range(3):
+            rule_lut[0, lower[c]:upper[c] + 1, c] |= 1 << bit
 
-    border_roi = frame[border_top:border_bottom, border_left:border_right]
-    hsv_border = cv2.cvtColor(border_roi, cv2.COLOR_BGR2HSV)
+    red_bits = (1 << len(RED_HSV_RANGES)) - 1
+    blue_bits = ((1 << len(BLUE_HSV_RANGES)) - 1) << len(RED_HSV_RANGES)
+    values = np.arange(256)
+    red_lut = np.where(values & red_bits, 255, 0).astype(np.uint8)
+    blue_lut = np.where(values & blue_bits, 255, 0).astype(np.uint8)
+    return rule_lut, red_lut, blue_lut
+
+
+HSV_RULE_LUT, RED_BITS_LUT, BLUE_BITS_LUT = build_hsv_luts()
+
+
+def border_box(frame_w, frame_h):
+    """ROI + 주변 BORDER_MARGIN px 박스 (left, top, right, bottom), 프레임 경계로 자름"""
+    return (max(0, ROI_X - BORDER_MARGIN), max(0, ROI_Y - BORDER_MARGIN),
+            min(frame_w, ROI_X + ROI_W + BORDER_MARGIN), min(frame_h, ROI_Y + ROI_H + BORDER_MARGIN))
+
+
+def is_roi_red_and_border_blue(frame, origin=(0, 0), return_masks=False, timer=NO_TIMER):
+    """ROI 빨강 45%↑ + ROI 주변 20px 진한 파랑 검출 → (red_ratio, blue_ratio)
+
+    주변 박스만 HSV 변환 1회, ROI는 그 안의 뷰. 빨강/파랑 판정은 LUT 한 번에.
+    origin: frame이 원본에서 잘라낸 영역일 때 그 좌상단 좌표 (ffmpeg crop 백엔드)
+    return_masks=True면 (red_ratio, blue_ratio, red_mask, blue_mask)
+    """
+    ox, oy = origin
+    border_left, border_top, border_right, border_bottom = border_box(frame.shape[1] + ox, frame.shape[0] + oy)
+
+    border_roi = frame[border_top - oy:border_bottom - oy, border_left - ox:border_right - ox]
+    rule_bits = hsv_rule_bits(border_roi, timer)
+
+    # 1) ROI 빨강 (주변 박스 안의 ROI 뷰)
+    roi_top, roi_left = ROI_Y - border_top, ROI_X - border_left
+    roi_bits = rule_bits[roi_top:roi_top + ROI_H, roi_left:roi_left + ROI_W]
+    red_mask = cv2.LUT(roi_bits, RED_BITS_LUT)
+    red_ratio = cv2.countNonZero(red_mask) / (ROI_W * ROI_H)
+
+    # 2) ROI 주변 20px 진한 파랑
+    blue_mask = cv2.LUT(rule_bits, BLUE_BITS_LUT)
+    blue_ratio = cv2.countNonZero(blue_mask) / (border_roi.shape[0] * border_roi.shape[1])
+    timer.lap('mask')
+
+    if return_masks:
+        return red_ratio, blue_ratio, red_mask, blue_mask
+    return red_ratio, blue_ratio
+
+
+def hsv_rule_bits(bgr, timer=NO_TIMER):
+    """BGR → HSV 1회 변환 후 픽셀별 만족 범위 비트 (timer: HSV 변환 → 'color')"""
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    timer.lap('color')
+    return rule_bits(hsv)
+
+
+def rule_bits(hsv):
+    """HSV 픽셀별 만족 범위 비트 (RED_HSV_RANGES + BLUE_HSV_RANGES 순서, 범위 하나에 비트 하나)"""
+    h_bits, s_bits, v_bits = cv2.split(cv2.LUT(hsv, HSV_RULE_LUT))
+    return cv2.bitwise_and(cv2.bitwise_and(h_bits, s_bits), v_bits)
+
+
+def estimate_roi_red_and_border_blue(frame, origin=(0, 0), stride=None, timer=NO_TIMER):
+    """stride 간격 픽셀만으로 (red_ratio, blue_ratio) 추정 (1차 스크리닝용)
+
+    점 샘플이라 실제 비율의 상한이 아님: 샘플 격자에 맞춘 무늬면 실제 0.9여도 0으로 추정될 수 있음.
+    """
+    stride = stride or coarse_stride
+    ox, oy = origin
+    border_left, border_top, border_right, border_bottom = border_box(frame.shape[1] + ox, frame.shape[0] + oy)
+    border_roi = frame[border_top - oy:border_bottom - oy:stride, border_left - ox:border_right - ox:stride]
+    rule_bits = hsv_rule_bits(np.ascontiguousarray(border_roi), timer)
+
+    # 샘플 격자에서 ROI에 해당하는 행/열 (박스 좌표 i*stride가 ROI 안)
+    roi_top, roi_left = ROI_Y - border_top, ROI_X - border_left
+    r0, r1 = -(-roi_top // stride), -(-(roi_top + ROI_H) // stride)
+    c0, c1 = -(-roi_left // stride), -(-(roi_left + ROI_W) // stride)
+    roi_bits = rule_bits[r0:r1, c0:c1]
+
+    red_ratio = cv2.countNonZero(cv2.LUT(roi_bits, RED_BITS_LUT)) / max(1, roi_bits.size)
+    blue_ratio = cv2.countNonZero(cv2.LUT(rule_bits, BLUE_BITS_LUT)) / max(1, rule_bits.size)
+    timer.lap('mask')
+    return red_ratio, blue_ratio
+
+
+def classify_frame(frame, origin=(0, 0), screening=None, timer=NO_TIMER):
+    """(red_ratio, blue_ratio, 정밀계산 여부). 스크리닝 탈락 프레임은 추정값 반환"""
+    if screening is None:
+        screening = coarse_screening
+    if screening:
+        red_est, blue_est = estimate_roi_red_and_border_blue(frame, origin, timer=timer)
+        if red_est <= red_ratio_threshold * (1 - coarse_margin) or \
+                blue_est <= blue_ratio_threshold * (1 - coarse_margin):
+            return red_est, blue_est, False
+    red_ratio, blue_ratio = is_roi_red_and_border_blue(frame, origin, timer=timer)
+    return red_ratio, blue_ratio, True
+
+
+def benchmark_screening(video_path, max_frames=300):
+    """frame_skip 간격 샘플 프레임에서 정밀/스크리닝 모드 속도(fps)와 검출 일치 여부 비교
 
-    # 첨부 이미지의 진한 남색/네이비 파랑 범위
-    lower_blue1 = np.array([100, 100, 20])
-    upper_blue1 = np.array([120, 255, 120])
-
-    lower_blue2 = np.array([105, 120, 10])
-    upper_blue2 = np.array([115, 255, 80])
-
-    blue_mask1 = cv2.inRange(hsv_border, lower_blue1, upper_blue1)
-    blue_mask2 = cv2.inRange(hsv_border, lower_blue2, upper_blue2)
-    blue_mask = cv2.bitwise_or(blue_mask1, blue_mask2)
-
-    blue_pixels = cv2.countNonZero(blue_mask)
-    total_border_pixels = border_roi.shape[0] * border_roi.shape[1]
-    blue_ratio = blue_pixels / total_border_pixels
-
-    return red_ratio, blue_ratio, red_mask, blue_mask
-
-
-def process_video(video_path):
-    """단일 영상 처리"""
+    디코딩 시간은 제외하고 분류 시간만 측정. 차단 구간 없이 모든 샘플 프레임 사용.
+    메모리 절약을 위해 ROI+주변 박스만 잘라서 보관.
+    """
+    reader = open_reader(video_path, frame_skip, prefetch=False)
+    frames = []
+    frame_idx = 0
+    origin = (0, 0)
+    while len(frames) < max_frames:
+        frame = reader.read(frame_idx)
+        if frame is None:
+            break
+        left, top, right, bottom = border_box(frame.shape[1], frame.shape[0])
+        origin = (left, top)
+        frames.append((frame_idx, frame[top:bottom, left:right].copy()))
+        frame_idx += frame_skip
+    reader.release()
+
+    results = {}
+    for mode, screening in (('exact', False), ('screened', True)):
+        start = time.perf_counter()
+        detected = []
+        escalated = 0
+        for idx, frame in frames:
+            red_ratio, blue_ratio, exact = classify_frame(frame, origin, screening=screening)
+            escalated += exact
+            if red_ratio > red_ratio_threshold and blue_ratio > blue_ratio_threshold:
+                detected.append(idx)
+        elapsed = time.perf_counter() - start
+        results[mode] = {'fps': len(frames) / elapsed if elapsed else 0.0,
+                         'detected': detected, 'exact_frames': escalated}
+        print(f"⏱️ {mode:<9} {results[mode]['fps']:8.1f} fps | 검출 {len(detected)}프레임 | "
+              f"정밀계산 {escalated}/{len(frames)}")
+
+    missed = sorted(set(results['exact']['detected']) - set(results['screened']['detected']))
+    if missed:
+        print(f"⚠️ 스크리닝 누락 {len(missed)}프레임: {missed[:10]} → coarse_margin 상향 필요")
+    else:
+        print("✅ 검출 프레임 일치")
+    results['missed'] = missed
+    return results
+
+
+class CaptureWriter:
+    """검출 프레임 저장을 백그라운드 스레드로 넘겨 분석 루프가 파일명 확인/인코딩/디스크 쓰기에 막히지 않게 함
+
+    capture_format='csv'면 이미지 없이 캡쳐 정보만 모아 close() 때 CSV 1개로 기록.
+    """
+
+    def __init__(self, folder, base_name, origin=(0, 0)):
+        self.folder = folder
+        self.base_name = base_name
+        self.origin = origin
+        self.rows = []
+        self.futures = []
+        self.pool = None
+        if capture_format != 'csv':
+            self.pool = ThreadPoolExecutor(max_workers=capture_writer_threads)
+
+    def submit(self, frame, frame_idx, current_time, red_ratio, blue_ratio):
+        """캡쳐 1건 등록 → 예정 파일명 (중복 시 실제 이름은 (N)이 붙을 수 있음)"""
+        self.rows.append((len(self.rows) + 1, frame_idx, current_time, red_ratio, blue_ratio))
+        if self.pool is None:
+            return f"{self.base_name}_red_blue.csv"
+
+        # reader 버퍼는 다음 read()에서 재사용되므로 저장할 영역만 복사
+        if capture_region == 'roi':
+            ox, oy = self.origin
+            image = frame[ROI_Y - oy:ROI_Y - oy + ROI_H, ROI_X - ox:ROI_X - ox + ROI_W].copy()
+        else:
+            image = frame.copy()
+        suffix = f"_red_blue_{int(current_time):06d}s"
+        self.futures.append(self.pool.submit(self._write_image, image, suffix))
+        return f"{self.base_name}{suffix}.{capture_format}"
+
+    def _write_image(self, image, suffix):
+        ext = f".{capture_format}"
+        filename = get_unique_filename(self.folder, self.base_name, suffix, ext)
+        save_path = os.path.join(self.folder, filename)
+        params = []
+        if capture_format == 'jpg':
+            params = [cv2.IMWRITE_JPEG_QUALITY, capture_quality]
+        elif capture_format == 'webp':
+            params = [cv2.IMWRITE_WEBP_QUALITY, capture_quality]
+        if not cv2.imwrite(save_path, image, params):
+            raise IOError(f"캡쳐 저장 실패: {save_path}")
+        return save_path
+
+    def close(self):
+        """남은 저장 완료 대기 → 저장된 파일 경로 리스트 (캡쳐 순서)"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            return [future.result() for future in self.futures]
+        if not self.rows:
+            return []
+
+        filename = get_unique_filename(self.folder, self.base_name, "_red_blue", ".csv")
+        csv_path = os.path.join(self.folder, filename)
+        with open(csv_path, 'w') as f:
+            f.write('capture,frame,시간(초),red_ratio,blue_ratio\n')
+            for capture_idx, frame_idx, current_time, red_ratio, blue_ratio in self.rows:
+                f.write(f'{capture_idx},{frame_idx},{current_time:.3f},{red_ratio:.4f},{blue_ratio:.4f}\n')
+        return [csv_path]
+
+
+def process_video(video_path, timer=NO_TIMER):
+    """단일 영상 처리 → (캡쳐 수, 저장한 파일 경로 리스트)
+
+    timer: 단계 시간을 누적할 StageTimer. 'decode'는 prefetch 사용 시 디코딩 스레드 대기 시간,
+    'write'는 남은 캡쳐 저장 대기 (이미지 인코딩은 백그라운드 스레드).
+    """
     # 🔥 영상이 위치한 폴더에 바로 저장! (red_captures 폴더 없이)
     video_folder = os.path.dirname(video_path)
 
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    timer.mark()
+    origin, crop = (0, 0), None
+    if frame_backend == 'ffmpeg':
+        info = video_info(video_path)
+        box = border_box(info['width'], info['height'])
+        origin, crop = box[:2], (box[0], box[1], box[2] - box[0], box[3] - box[1])
+
+    reader = open_reader(video_path, frame_skip, prefetch=use_prefetch, backend=frame_backend, crop=crop)
+    timer.lap('open')
+    fps = reader.fps
+    total_frames = reader.total_frames
 
     print(f"\n📹 처리 중: {os.path.basename(video_path)} | {total_frames // fps / 60:.1f}분")
     print(f"📁 캡쳐 저장: {video_folder}")  # 영상과 같은 폴더에 저장
 
     frame_idx = 0
     capture_idx = 1
-    max_red_ratio = 0
+    max_red_ratio = 0  # 정밀 계산 프레임만 (스크리닝 추정값은 est_max에 따로)
     max_blue_ratio = 0
+    est_max_red, est_max_blue, estimated_frames = 0, 0, 0
     capture_count = 0
     detection_blocked_until = 0
 
     base_name = os.path.splitext(os.path.basename(video_path))[0]
+    writer = CaptureWriter(video_folder, base_name, origin)
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
+    # frame_skip 배수 프레임만 방문 (사이 프레임/차단 구간은 디코딩 생략)
+    while True:
         current_time = frame_idx / fps
 
         if current_time < detection_blocked_until:
-            frame_idx += 1
+            frame_idx += frame_skip
             continue
 
-        if frame_idx % frame_skip != 0:
-            frame_idx += 1
-            continue
+        timer.mark()
+        frame = reader.read(frame_idx)
+        timer.lap('decode')
+        if frame is None:
+            break
 
-        red_ratio, blue_ratio, red_mask, blue_mask = is_roi_red_and_border_blue(frame)
+        red_ratio, blue_ratio, exact = classify_frame(frame, origin, timer=timer)
 
-        if red_ratio > max_red_ratio:
-            max_red_ratio = red_ratio
-        if blue_ratio > max_blue_ratio:
-            max_blue_ratio = blue_ratio
+        if exact:
+            max_red_ratio = max(max_red_ratio, red_ratio)
+            max_blue_ratio = max(max_blue_ratio, blue_ratio)
+        else:
+            est_max_red, est_max_blue = max(est_max_red, red_ratio), max(est_max_blue, blue_ratio)
+            estimated_frames += 1
 
         # 🔥 ROI 빨강 45%↑ + 주변 파랑 10%↑ 둘 다 만족!
         if red_ratio > red_ratio_threshold and blue_ratio > blue_ratio_threshold:
-            filename = get_unique_filename(video_folder, base_name, f"_red_blue_{int(current_time):06d}s")
-            save_path = os.path.join(video_folder, filename)
-
-            cv2.imwrite(save_path, frame)
+            timer.lap('detect')
+            filename = writer.submit(frame, frame_idx, current_time, red_ratio, blue_ratio)
+            timer.lap('write')
             print(f"🔴🔵 캡쳐 #{capture_idx}: {filename} "
                   f"(ROI_red={red_ratio:.3f}, border_blue={blue_ratio:.3f}, t={current_time:.1f}s)")
 
@@ -149,46 +366,112 @@ def process_video(video_path):
             capture_count += 1
             capture_idx += 1
 
-        if frame_idx % 300 == 0:
+        if not quiet and frame_idx % 300 == 0:
             block_status = "차단중" if current_time < detection_blocked_until else "검출중"
             print(f"\r🌈 {frame_idx / total_frames * 100:.1f}% | "
                   f"red={red_ratio:.2f} blue={blue_ratio:.2f} | {block_status}", end="")
 
-        frame_idx += 1
+        timer.lap('detect')
+        frame_idx += frame_skip
 
-    cap.release()
+    reader.release()
+    with timer.stage('write'):
+        saved_paths = writer.close()
     print(f"\n✅ 완료 | 캡쳐: {capture_count}개 | 최고 red={max_red_ratio:.3f}, blue={max_blue_ratio:.3f}")
-    return capture_count
-
-
-# 🔥 3GB 이상 영상만 처리
-print(f"🔍 {base_folder}에서 3GB↑ 영상만 검색 중...")
-
-video_files = []
-small_files = []
-video_extensions = ['*.mp4', '*.mkv', '*.avi', '*.mov']
-min_file_size_bytes = min_file_size_gb * 1024 ** 3
-
-for root, dirs, files in os.walk(base_folder):
-    for ext in video_extensions:
-        videos = glob.glob(os.path.join(root, ext))
-        for video_path in videos:
-            file_size = os.path.getsize(video_path)
-            file_size_gb = file_size / 1024 ** 3
-
-            if file_size >= min_file_size_bytes:
-                video_files.append(video_path)
-                print(f"✅ 포함: {os.path.basename(video_path)} ({file_size_gb:.1f}GB)")
-            else:
-                small_files.append((os.path.basename(video_path), file_size_gb))
-
-print(f"🎬 3GB↑ 처리대상: {len(video_files)}개 | 3GB미만 제외: {len(small_files)}개")
-print("=" * 80)
-
-total_captures = 0
-for idx, video_path in enumerate(video_files, 1):
-    print(f"\n[{idx}/{len(video_files)}]")
-    captures = process_video(video_path)
-    total_captures += captures
-
-print(f"\n🎉 3GB↑ 영상 처리 완료! 총 {total_captures}개 캡쳐")
+    if estimated_frames:
+        print(f"   스크리닝 탈락 {estimated_frames}프레임 추정 최고 red={est_max_red:.3f}, blue={est_max_blue:.3f}")
+    return capture_count, saved_paths
+
+
+def find_video_files(base_folder):
+    """🔥 3GB 이상 영상만 → (처리대상 경로 리스트, 제외 [(이름, GB)])"""
+    print(f"🔍 {base_folder}에서 3GB↑ 영상만 검색 중...")
+
+    video_files = []
+    small_files = []
+    video_extensions = ['*.mp4', '*.mkv', '*.avi', '*.mov']
+    min_file_size_bytes = min_file_size_gb * 1024 ** 3
+
+    # 폴더마다 scandir 한 번, 크기는 scandir의 stat (인덱스 DB는 쓰지 않음: 읽기 전용 드라이브에서도 동작)
+    for root, files in scan_tree(base_folder).items():
+        for ext in video_extensions:
+            for video_path, stat in video_entries(files, ext):
+                file_size = stat.st_size
+                file_size_gb = file_size / 1024 ** 3
+
+                if file_size >= min_file_size_bytes:
+                    video_files.append(video_path)
+                    print(f"✅ 포함: {os.path.basename(video_path)} ({file_size_gb:.1f}GB)")
+                else:
+                    small_files.append((os.path.basename(video_path), file_size_gb))
+
+    return video_files, small_files
+
+
+def analyze_video(idx, total, video_path):
+    """워커 단위 작업: 영상 1개 검출 + 캡쳐 저장 → ((캡쳐 수, 저장 경로), 단계 시간 메트릭)"""
+    print(f"\n[{idx}/{total}]")
+    timer = StageTimer(enabled=collect_metrics)
+    result = process_video(video_path, timer=timer)
+    return result, timer.as_dict()
+
+
+def save_metrics(base_folder, metrics_records):
+    """영상별 단계 시간 메트릭 저장 + 전체 합산 출력"""
+    if not (collect_metrics and metrics_records):
+        return
+    total = StageTimer()
+    for rec in metrics_records:
+        total.merge(rec['stages'])
+    print_stages({'elapsed': sum(rec['elapsed'] for rec in metrics_records),
+                  'stages': total.as_dict()['stages']}, title="전체 영상 단계별 시간")
+    if metrics_filename:
+        print(f"📏 메트릭 저장: {write_metrics(os.path.join(base_folder, metrics_filename), metrics_records)}")
+
+
+def batch_process(base_folder, workers=batch_workers, force=False):
+    """🔥 모든 영상 처리 (workers>1이면 프로세스 풀, 로그/요약은 입력 순서대로)
+
+    매니페스트에 같은 (크기, mtime, 파라미터)로 기록된 영상은 건너뛰고,
+    재처리하는 영상은 이전 캡쳐를 지운 뒤 다시 저장 ((N).png 누적 방지). force=True면 전부 재처리.
+    """
+    print(f"✅ 자동 계산된 ROI: ({ROI_X}, {ROI_Y}, {ROI_W}, {ROI_H})")
+    video_files, small_files = find_video_files(base_folder)
+    manifest = Manifest(base_folder, manifest_filename) if use_manifest else None
+    params = detector_params()
+
+    up_to_date = []
+    if manifest is not None:
+        if not force:
+            up_to_date = [v for v in video_files if manifest.is_current(v, params)]
+            video_files = [v for v in video_files if v not in up_to_date]
+        for video_path in video_files:
+            for old_capture in manifest.previous_outputs(video_path):
+                if os.path.exists(old_capture):
+                    os.remove(old_capture)
+    print(f"🎬 3GB↑ 처리대상: {len(video_files)}개 | 3GB미만 제외: {len(small_files)}개"
+          + (f" | 변경없음: {len(up_to_date)}개" if up_to_date else ""))
+    print("=" * 80)
+
+    metrics_records = []
+
+    def on_result(idx, args, result):
+        (capture_count, saved_paths), metrics = result
+        if manifest is not None:
+            manifest.record(args[2], params, saved_paths, capture_count)
+        metrics_records.append({'video': os.path.relpath(args[2], base_folder), 'captures': capture_count,
+                                **metrics})
+
+    jobs = [(idx, len(video_files), video_path) for idx, video_path in enumerate(video_files, 1)]
+    records = run_batch(analyze_video, jobs, workers=workers, on_result=on_result)
+    total_captures = sum(rec['result'][0][0] for rec in records if rec['error'] is None)
+
+    print_summary(records, label=lambda args: os.path.basename(args[2]),
+                  describe=lambda result: f"캡쳐 {result[0][0]}개")
+    save_metrics(base_folder, metrics_records)
+    print(f"\n🎉 3GB↑ 영상 처리 완료! 총 {total_captures}개 캡쳐")
+    return records
+
+
+if __name__ == "__main__":
+    batch_process(base_folder)
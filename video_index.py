@@ -0,0 +1,110 @@
+import os
+import sqlite3
+
+import cv2
+
+# 설정값
+index_filename = '.video_index.sqlite'  # 실험 루트 폴더에 두는 영상 메타데이터 인덱스
+
+COLUMNS = ['size', 'mtime_ns', 'fps', 'frame_count', 'width', 'height', 'codec', 'duration']
+
+_open_indexes = {}  # 프로세스별로 연 인덱스 재사용: {루트: VideoIndex}
+
+
+def probe_video(video_path):
+    """컨테이너 헤더만 열어 메타데이터 읽기 (디코딩 없음)"""
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        return {
+            'fps': fps,
+            'frame_count': frame_count,
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'codec': ''.join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip('\x00') or None,
+            'duration': frame_count / fps if fps else None,
+        }
+    finally:
+        cap.release()
+
+
+class VideoIndex:
+    """실험 루트별 영상 메타데이터 SQLite 인덱스 (fps, 프레임 수, 길이, 코덱, 크기)
+
+    영상마다 한 번만 컨테이너를 열어 기록, 크기/mtime이 바뀌면 다시 읽음.
+    경로는 루트 기준 상대경로로 저장 (외장 드라이브 마운트 위치가 바뀌어도 유지).
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(os.fspath(root))
+        self.path = os.path.join(self.root, index_filename)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "fps REAL, frame_count INTEGER, width INTEGER, height INTEGER, codec TEXT, duration REAL)")
+        self.conn.commit()
+
+    def _key(self, video_path):
+        return os.path.relpath(os.path.abspath(os.fspath(video_path)), self.root)
+
+    def get(self, video_path, stat=None, probe=True):
+        """영상 메타데이터 dict. stat은 이미 있으면 전달 (DirEntry.stat() 등, 재호출 방지)
+
+        probe=False면 크기/mtime만 확인·기록 (크기 기준 필터링용, 컨테이너 안 엶).
+        """
+        stat = stat or os.stat(video_path)
+        key = self._key(video_path)
+        row = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM videos WHERE path = ?", (key,)).fetchone()
+        info = dict(zip(COLUMNS, row)) if row else None
+
+        if info is None or info['size'] != stat.st_size or info['mtime_ns'] != stat.st_mtime_ns:
+            info = dict.fromkeys(COLUMNS)
+            info.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        elif info['fps'] is not None or not probe:
+            return info
+
+        if probe:
+            info.update(probe_video(video_path))
+        self.conn.execute(f"INSERT OR REPLACE INTO videos (path, {', '.join(COLUMNS)}) "
+                          f"VALUES (?, {', '.join('?' * len(COLUMNS))})", [key] + [info[c] for c in COLUMNS])
+        self.conn.commit()
+        return info
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def find_index_root(video_path):
+    """영상 폴더부터 위로 올라가며 인덱스 파일이 있는 폴더 (없으면 영상 폴더)"""
+    folder = os.path.dirname(os.path.abspath(os.fspath(video_path)))
+    current = folder
+    while True:
+        if os.path.exists(os.path.join(current, index_filename)):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return folder
+        current = parent
+
+
+def video_info(video_path, root=None):
+    """영상 메타데이터 조회 (루트 인덱스 자동 탐색, 프로세스 안에서 연결 재사용)"""
+    root = os.path.abspath(os.fspath(root)) if root else find_index_root(video_path)
+    try:
+        index = _open_indexes.get(root)
+        if index is None:
+            index = _open_indexes[root] = VideoIndex(root)
+        return index.get(video_path)
+    except sqlite3.Error as e:
+        # 읽기 전용 볼륨 등: 인덱스 없이 헤더만 읽음
+        print(f"⚠️ 영상 인덱스 사용 불가 ({e}) → 직접 읽기")
+        stat = os.stat(video_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, **probe_video(video_path)}